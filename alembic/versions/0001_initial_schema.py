@@ -0,0 +1,53 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", sa.Enum("PENDING", "IN_PROGRESS", "COMPLETED", name="taskstatus"), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.TIMESTAMP(), server_default=sa.func.now(), nullable=True),
+        sa.Column("queued_at", sa.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+    op.create_index("ix_tasks_queued_at", "tasks", ["queued_at"])
+    op.create_index("ix_tasks_priority_created_at_id", "tasks", ["priority", "created_at", "id"])
+
+    op.create_table(
+        "task_logs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=50), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_task_logs_id", "task_logs", ["id"])
+    op.create_index("ix_task_logs_task_id_created_at_id", "task_logs", ["task_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_table("task_logs")
+    op.drop_table("tasks")
+    sa.Enum(name="taskstatus").drop(op.get_bind(), checkfirst=True)
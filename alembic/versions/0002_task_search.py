@@ -0,0 +1,52 @@
+"""task search: trigram and full-text indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return # Trigram and full-text search are Postgres-only; app.search falls back to ILIKE elsewhere.
+
+    # Trigram GIN indexes let ILIKE '%term%' on title/description use an index scan.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_tasks_title_trgm", "tasks", ["title"], postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}
+    )
+    op.create_index(
+        "ix_tasks_description_trgm", "tasks", ["description"],
+        postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+    )
+
+    # Kept in sync by Postgres itself; the text search config must match app.search.TEXT_SEARCH_CONFIG.
+    op.execute(
+        """
+        ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index("ix_tasks_search_vector", "tasks", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.drop_index("ix_tasks_search_vector", table_name="tasks")
+    op.drop_column("tasks", "search_vector")
+    op.drop_index("ix_tasks_description_trgm", table_name="tasks")
+    op.drop_index("ix_tasks_title_trgm", table_name="tasks")
@@ -0,0 +1,98 @@
+"""partition task_logs by month on created_at
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 11:00:00
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 3
+
+
+def _add_months(month_start: datetime, months: int) -> datetime:
+    year, month = divmod(month_start.month - 1 + months, 12)
+    return datetime(month_start.year + year, month + 1, 1)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return # Partitioning is Postgres-only; other databases keep the plain table.
+
+    op.execute("ALTER TABLE task_logs RENAME TO task_logs_unpartitioned")
+    op.execute("ALTER SEQUENCE task_logs_id_seq OWNED BY NONE")
+    op.drop_index("ix_task_logs_id", table_name="task_logs_unpartitioned")
+    op.drop_index("ix_task_logs_task_id_created_at_id", table_name="task_logs_unpartitioned")
+
+    # The partition key has to be part of the primary key.
+    op.execute(
+        """
+        CREATE TABLE task_logs (
+            id INTEGER NOT NULL DEFAULT nextval('task_logs_id_seq'),
+            task_id INTEGER REFERENCES tasks (id) ON DELETE CASCADE,
+            status VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE task_logs_id_seq OWNED BY task_logs.id")
+    # Catches rows outside every monthly partition; `python -m app.maintenance` moves them out.
+    op.execute("CREATE TABLE task_logs_default PARTITION OF task_logs DEFAULT")
+    op.create_index("ix_task_logs_task_id_created_at_id", "task_logs", ["task_id", "created_at", "id"])
+
+    oldest = None
+    if not context.is_offline_mode():
+        oldest = bind.execute(sa.text("SELECT min(created_at) FROM task_logs_unpartitioned")).scalar()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    month = datetime((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(datetime(now.year, now.month, 1), PARTITIONS_AHEAD)
+    while month <= last:
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE task_logs_{month:%Y_%m} PARTITION OF task_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+        )
+        month = next_month
+
+    op.execute(
+        "INSERT INTO task_logs (id, task_id, status, created_at) "
+        "SELECT id, task_id, status, coalesce(created_at, now()) FROM task_logs_unpartitioned"
+    )
+    op.execute("DROP TABLE task_logs_unpartitioned")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE task_logs RENAME TO task_logs_partitioned")
+    op.execute("ALTER SEQUENCE task_logs_id_seq OWNED BY NONE")
+    op.execute("ALTER INDEX ix_task_logs_task_id_created_at_id RENAME TO ix_task_logs_partitioned_task_id_created_at_id")
+    op.execute(
+        """
+        CREATE TABLE task_logs (
+            id INTEGER NOT NULL DEFAULT nextval('task_logs_id_seq') PRIMARY KEY,
+            task_id INTEGER REFERENCES tasks (id) ON DELETE CASCADE,
+            status VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now()
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE task_logs_id_seq OWNED BY task_logs.id")
+    op.execute("INSERT INTO task_logs SELECT id, task_id, status, created_at FROM task_logs_partitioned")
+    op.execute("DROP TABLE task_logs_partitioned")
+    op.create_index("ix_task_logs_id", "task_logs", ["id"])
+    op.create_index("ix_task_logs_task_id_created_at_id", "task_logs", ["task_id", "created_at", "id"])
@@ -0,0 +1,31 @@
+"""add partial index for the priority scheduler's queue scans
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_tasks_queue_priority_queued_at_id",
+        "tasks",
+        ["priority", "queued_at", "id"],
+        postgresql_where=sa.text("queued_at IS NOT NULL"),
+        sqlite_where=sa.text("queued_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_queue_priority_queued_at_id", table_name="tasks")
@@ -0,0 +1,27 @@
+"""add tasks.lease_expires_at
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("lease_expires_at", sa.TIMESTAMP(), nullable=True))
+    op.create_index("ix_tasks_lease_expires_at", "tasks", ["lease_expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_lease_expires_at", table_name="tasks")
+    op.drop_column("tasks", "lease_expires_at")
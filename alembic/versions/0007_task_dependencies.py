@@ -0,0 +1,48 @@
+"""add task dependency graphs: task_dependencies, the FAILED status and run timings
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # ALTER TYPE ... ADD VALUE cannot run inside a transaction block before Postgres 12.
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE taskstatus ADD VALUE IF NOT EXISTS 'FAILED'")
+
+    op.add_column("tasks", sa.Column("started_at", sa.TIMESTAMP(), nullable=True))
+    op.add_column("tasks", sa.Column("finished_at", sa.TIMESTAMP(), nullable=True))
+    op.add_column("tasks", sa.Column("awaiting_upstream", sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    op.create_table(
+        "task_dependencies",
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("depends_on_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["depends_on_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("task_id", "depends_on_id"),
+    )
+    op.create_index("ix_task_dependencies_depends_on_id", "task_dependencies", ["depends_on_id"])
+
+
+def downgrade() -> None:
+    # Postgres cannot drop an enum value; FAILED stays in the taskstatus type.
+    op.execute("UPDATE tasks SET status = 'PENDING' WHERE status = 'FAILED'")
+    op.drop_index("ix_task_dependencies_depends_on_id", table_name="task_dependencies")
+    op.drop_table("task_dependencies")
+    op.drop_column("tasks", "awaiting_upstream")
+    op.drop_column("tasks", "finished_at")
+    op.drop_column("tasks", "started_at")
@@ -0,0 +1,150 @@
+"""store task logs as compact events: event code, from/to status, duration and detail
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16 13:00:00
+
+"""
+import re
+from typing import Optional, Sequence, Tuple, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The existing type; add_column does not create it again.
+taskstatus = sa.Enum("PENDING", "IN_PROGRESS", "COMPLETED", "FAILED", name="taskstatus")
+
+# Event codes of app.models.TaskEvent, and the log lines written before this revision.
+MESSAGE, CREATED, STATUS_CHANGED, PROCESSING_ERROR, UPSTREAM_FAILED, COMPACTED = 0, 1, 2, 7, 10, 11
+FIXED_LINES = {
+    "Task details updated.": 3,
+    "Task queued for worker processing.": 4,
+    "Task processing initiated in background.": 5,
+    "Task processing started by its dependency graph.": 6,
+    "Lease expired; task returned to pending after its runner stopped.": 8,
+    "Processing interrupted by shutdown; task returned to pending.": 9,
+}
+_CREATED = re.compile(r"^Task created with status (\w+)$")
+_STATUS_CHANGED = re.compile(r"^Status changed from (\w+) to (\w+)$")
+_DETAIL_LINES = (
+    (re.compile(r"^Error during background processing: (.*)$", re.S), PROCESSING_ERROR),
+    (re.compile(r"^Upstream task (\d+) failed\.$"), UPSTREAM_FAILED),
+    (re.compile(r"^Compacted (\d+) log entries$"), COMPACTED),
+)
+STATUS_NAMES = {"pending": "PENDING", "in_progress": "IN_PROGRESS", "completed": "COMPLETED", "failed": "FAILED"}
+
+
+def _parse(line: str) -> Optional[Tuple[int, Optional[str], Optional[str], Optional[str]]]:
+    # (event, from_status, to_status, detail) for a known log line, None for free text
+    if line in FIXED_LINES:
+        return FIXED_LINES[line], None, None, None
+    match = _CREATED.match(line)
+    if match and match.group(1) in STATUS_NAMES:
+        return CREATED, None, STATUS_NAMES[match.group(1)], None
+    match = _STATUS_CHANGED.match(line)
+    if match and match.group(1) in STATUS_NAMES and match.group(2) in STATUS_NAMES:
+        return STATUS_CHANGED, STATUS_NAMES[match.group(1)], STATUS_NAMES[match.group(2)], None
+    for pattern, event in _DETAIL_LINES:
+        match = pattern.match(line)
+        if match:
+            return event, None, None, match.group(1)
+    return None
+
+
+def _render(event: int, from_status: Optional[str], to_status: Optional[str], detail: Optional[str]) -> str:
+    values = {name: value for value, name in STATUS_NAMES.items()}
+    if event == CREATED:
+        return f"Task created with status {values[to_status]}"
+    if event == STATUS_CHANGED:
+        return f"Status changed from {values[from_status]} to {values[to_status]}"
+    if event == PROCESSING_ERROR:
+        return f"Error during background processing: {detail}"
+    if event == UPSTREAM_FAILED:
+        return f"Upstream task {detail} failed."
+    if event == COMPACTED:
+        return f"Compacted {detail} log entries"
+    if event == MESSAGE:
+        return detail or ""
+    return next(line for line, code in FIXED_LINES.items() if code == event)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Batch mode, so SQLite copies the tables instead of running ALTERs it does not support.
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.add_column(sa.Column("status_changed_at", sa.TIMESTAMP(), server_default=sa.func.now(), nullable=True))
+    op.execute("UPDATE tasks SET status_changed_at = coalesce(updated_at, created_at)")
+
+    op.add_column("task_logs", sa.Column("event", sa.SmallInteger(), nullable=True))
+    op.add_column("task_logs", sa.Column("from_status", taskstatus, nullable=True))
+    op.add_column("task_logs", sa.Column("to_status", taskstatus, nullable=True))
+    op.add_column("task_logs", sa.Column("duration_ms", sa.BigInteger(), nullable=True))
+    op.add_column("task_logs", sa.Column("detail", sa.Text(), nullable=True))
+
+    # Every line survives as a free-text message; known lines then get their event code.
+    # Durations of past status changes are unknown and stay NULL.
+    op.execute(f"UPDATE task_logs SET event = {MESSAGE}, detail = status")
+    if not context.is_offline_mode():
+        task_logs = sa.table(
+            "task_logs", sa.column("status", sa.String), sa.column("event", sa.SmallInteger),
+            sa.column("from_status", taskstatus), sa.column("to_status", taskstatus), sa.column("detail", sa.Text),
+        )
+        lines = bind.execute(sa.text("SELECT DISTINCT status FROM task_logs")).scalars().all()
+        for line in lines:
+            parsed = _parse(line)
+            if parsed is not None:
+                event, from_status, to_status, detail = parsed
+                bind.execute(
+                    task_logs.update().where(task_logs.c.status == line)
+                    .values(event=event, from_status=from_status, to_status=to_status, detail=detail)
+                )
+
+    with op.batch_alter_table("task_logs") as batch_op:
+        batch_op.alter_column("event", existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.drop_column("status")
+    if bind.dialect.name == "postgresql":
+        op.create_index(
+            "ix_task_logs_event_created_at", "task_logs", ["event", "created_at"],
+            postgresql_include=["from_status", "to_status", "duration_ms"],
+        )
+    else:
+        op.create_index("ix_task_logs_event_created_at", "task_logs", ["event", "created_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    op.drop_index("ix_task_logs_event_created_at", table_name="task_logs")
+    op.add_column("task_logs", sa.Column("status", sa.String(50), nullable=True))
+    if not context.is_offline_mode():
+        task_logs = sa.table(
+            "task_logs", sa.column("status", sa.String), sa.column("event", sa.SmallInteger),
+            sa.column("from_status", taskstatus), sa.column("to_status", taskstatus), sa.column("detail", sa.Text),
+        )
+        columns = (task_logs.c.event, task_logs.c.from_status, task_logs.c.to_status, task_logs.c.detail)
+        for event, from_status, to_status, detail in bind.execute(sa.select(*columns).distinct()).all():
+            bind.execute(
+                task_logs.update()
+                .where(task_logs.c.event == event)
+                .where(*(
+                    column.is_(None) if value is None else column == value
+                    for column, value in zip(columns[1:], (from_status, to_status, detail))
+                ))
+                # The old column is VARCHAR(50): long error details are cut short.
+                .values(status=_render(event, from_status, to_status, detail)[:50])
+            )
+    op.execute("UPDATE task_logs SET status = '' WHERE status IS NULL")
+    with op.batch_alter_table("task_logs") as batch_op:
+        batch_op.alter_column("status", existing_type=sa.String(50), nullable=False)
+        batch_op.drop_column("detail")
+        batch_op.drop_column("duration_ms")
+        batch_op.drop_column("to_status")
+        batch_op.drop_column("from_status")
+        batch_op.drop_column("event")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("status_changed_at")
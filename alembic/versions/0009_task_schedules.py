@@ -0,0 +1,42 @@
+"""add delayed and recurring task scheduling: run_at, cron, interval_seconds, jitter_seconds, catch_up
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+catchup = sa.Enum("RUN_ONCE", "SKIP", name="catchup")
+
+
+def upgrade() -> None:
+    catchup.create(op.get_bind(), checkfirst=True)
+    op.add_column("tasks", sa.Column("run_at", sa.TIMESTAMP(), nullable=True))
+    op.add_column("tasks", sa.Column("cron", sa.String(length=100), nullable=True))
+    op.add_column("tasks", sa.Column("interval_seconds", sa.Integer(), nullable=True))
+    op.add_column("tasks", sa.Column("jitter_seconds", sa.Integer(), nullable=True))
+    op.add_column("tasks", sa.Column("catch_up", catchup, server_default="RUN_ONCE", nullable=False))
+    op.create_index(
+        "ix_tasks_run_at", "tasks", ["run_at"],
+        postgresql_where=sa.text("run_at IS NOT NULL"), sqlite_where=sa.text("run_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_run_at", table_name="tasks")
+    op.drop_column("tasks", "catch_up")
+    op.drop_column("tasks", "jitter_seconds")
+    op.drop_column("tasks", "interval_seconds")
+    op.drop_column("tasks", "cron")
+    op.drop_column("tasks", "run_at")
+    catchup.drop(op.get_bind(), checkfirst=True)
@@ -1,8 +1,13 @@
 import asyncio
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.crud import update_task, create_task_log
-from app.schemas import TaskUpdate
-from app.models import TaskStatus
+from typing import Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app import crud
+from app.config import DAG_CONCURRENCY, TASK_DISPATCH_MODE, WORKER_CONCURRENCY
+from app.crud import get_task, transition_task_status, fail_task, release_tasks
+from app.handlers import register_handler, registry
+from app.leases import lease_manager
+from app.metrics import metrics
+from app.models import LogEntry, TaskEvent, TaskStatus
 from app.database import AsyncSessionLocal
 
 async def simulate_long_task_processing(task_id: int, duration: int = 5):
@@ -11,26 +16,170 @@ async def simulate_long_task_processing(task_id: int, duration: int = 5):
     print(f"Background: Finished processing for task {task_id}")
 
 
-async def process_task_in_background(task_id: int):
-    db: AsyncSession = AsyncSessionLocal()
-    try:
-        print(f"Background Task: Attempting to set task {task_id} to IN_PROGRESS")
-        # Update status to IN_PROGRESS
-        updated_task = await update_task(db, task_id, TaskUpdate(status=TaskStatus.IN_PROGRESS))
-        if not updated_task:
-            print(f"Background Task: Task {task_id} not found for processing.")
-            return
+@register_handler("default")
+async def default_handler(task: dict):
+    # Simulate the actual long-running work
+    await simulate_long_task_processing(task["id"], duration=10) # 10 seconds
+
+
+async def run_task(db: AsyncSession, task_id: int) -> str:
+    """Run the task's handler and mark it COMPLETED. Returns the outcome.
 
-        # Simulate the actual long-running work
-        await simulate_long_task_processing(task_id, duration=10) # 10 seconds
+    The handler only runs while the task is still IN_PROGRESS: one whose lease lapsed, and
+    was returned to PENDING by the reaper, is left for whoever dispatches it next.
+    """
+    db_task = await get_task(db, task_id)
+    if db_task is None:
+        print(f"Background Task: Task {task_id} not found for processing.")
+        return "not_found"
+    if db_task.status != TaskStatus.IN_PROGRESS:
+        print(f"Background Task: Task {task_id} is {db_task.status.value}, not in progress; not processing it.")
+        return "skipped"
+    task = {
+        "id": db_task.id,
+        "title": db_task.title,
+        "description": db_task.description,
+        "priority": db_task.priority,
+        "task_type": db_task.task_type,
+    }
+    await db.commit() # Don't hold the transaction open while the handler runs
+    await registry.run(db_task.task_type, task)
 
-        # Update status to COMPLETED
-        print(f"Background Task: Attempting to set task {task_id} to COMPLETED")
-        await update_task(db, task_id, TaskUpdate(status=TaskStatus.COMPLETED))
-        print(f"Background Task: Task {task_id} marked as COMPLETED.")
+    # Update status to COMPLETED
+    print(f"Background Task: Attempting to set task {task_id} to COMPLETED")
+    await transition_task_status(db, task_id, from_status=TaskStatus.IN_PROGRESS, to_status=TaskStatus.COMPLETED)
+    print(f"Background Task: Task {task_id} marked as COMPLETED.")
+    return "completed"
 
+
+async def process_task_in_background(task_id: int, session_factory: async_sessionmaker = AsyncSessionLocal):
+    """Run a task that /tasks/{id}/process or a worker has already moved to IN_PROGRESS."""
+    db: AsyncSession = session_factory()
+    started = metrics.task_started()
+    outcome = "failed"
+    lease_manager.track(task_id) # Keeps the task's lease alive while it runs
+    try:
+        outcome = await run_task(db, task_id)
+    except asyncio.CancelledError:
+        # Shutdown drain deadline: hand the task back rather than leave it IN_PROGRESS.
+        outcome = "cancelled"
+        print(f"Background Task: Processing of task {task_id} cancelled, returning it to pending")
+        async with session_factory() as release_db:
+            await release_tasks(release_db, [task_id], requeue=lease_manager.requeue)
+        raise
     except Exception as e:
         print(f"Background Task: Error processing task {task_id}: {e}")
-        await create_task_log(db, task_id=task_id, status_message=f"Error during background processing: {str(e)}")
+        await db.rollback()
+        failed = await fail_task(db, task_id, LogEntry(TaskEvent.PROCESSING_ERROR, detail=str(e)))
+        if len(failed) > 1:
+            print(f"Background Task: Failed downstream tasks of task {task_id}: {failed[1:]}")
     finally:
-        await db.close()
\ No newline at end of file
+        lease_manager.untrack(task_id)
+        metrics.task_finished(started, outcome)
+        await db.close()
+    if outcome == "completed":
+        await dependency_dispatcher.release_dependents(task_id, session_factory)
+
+
+async def process_tasks_in_background(
+    task_ids: List[int], session_factory: async_sessionmaker = AsyncSessionLocal, concurrency: int = WORKER_CONCURRENCY
+):
+    """Run tasks dispatched together by POST /tasks/process, at most `concurrency` at a time.
+
+    The tasks are all IN_PROGRESS already, so those waiting for a slot are tracked by the
+    lease manager as well: their leases are renewed, and the shutdown drain hands them back.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(task_id: int):
+        lease_manager.track(task_id)
+        try:
+            await semaphore.acquire()
+        except asyncio.CancelledError:
+            # Drain deadline before a slot came free: hand the task back, as a running one would.
+            lease_manager.untrack(task_id)
+            async with session_factory() as db:
+                await release_tasks(db, [task_id], requeue=lease_manager.requeue)
+            raise
+        try:
+            await process_task_in_background(task_id, session_factory)
+        finally:
+            semaphore.release()
+
+    await asyncio.gather(*(run_one(task_id) for task_id in task_ids))
+
+
+class DependencyDispatcher:
+    """Starts the tasks of dependency graphs as soon as all their upstream tasks have COMPLETED.
+
+    POST /tasks/{id}/dag/process arms a graph, and every completion releases the armed
+    tasks it was the last blocker of, so consecutive steps start without a polling
+    delay. In worker mode released tasks are queued for the workers. Otherwise they run
+    in this process, at most `concurrency` at once; the rest stay PENDING until a slot
+    frees up. Starting goes through the PENDING -> IN_PROGRESS transition, so each task
+    runs once, whichever process released it.
+    """
+
+    def __init__(self, concurrency: int = DAG_CONCURRENCY, queue: bool = TASK_DISPATCH_MODE == "worker"):
+        self.concurrency = concurrency
+        self.queue = queue
+        self._slots = asyncio.Semaphore(concurrency)
+        self._starting: Dict[int, asyncio.Task] = {}
+        self._closed = False
+
+    async def dispatch(self, task_ids: List[int], session_factory: async_sessionmaker = AsyncSessionLocal) -> List[int]:
+        """Queue or start tasks that are ready to run. Returns the ids dispatched."""
+        if not task_ids:
+            return []
+        if self.queue:
+            async with session_factory() as db:
+                queued, _ = await crud.bulk_dispatch(db, task_ids, queue=True)
+            return queued
+        if self._closed:
+            return [] # Shutting down: the tasks stay PENDING and armed
+        started = [task_id for task_id in task_ids if task_id not in self._starting]
+        for task_id in started:
+            self._starting[task_id] = asyncio.create_task(self._run(task_id, session_factory))
+        return started
+
+    async def release_dependents(self, task_id: int, session_factory: async_sessionmaker = AsyncSessionLocal):
+        """Dispatch the tasks that completing `task_id` has made ready."""
+        try:
+            async with session_factory() as db:
+                ready = await crud.get_ready_dependents(db, task_id)
+            if ready:
+                print(f"Background Task: Task {task_id} released downstream tasks {ready}")
+                await self.dispatch(ready, session_factory)
+        except Exception as e:
+            print(f"Background Task: Error releasing the downstream tasks of task {task_id}: {e}")
+
+    async def _run(self, task_id: int, session_factory: async_sessionmaker):
+        try:
+            async with self._slots:
+                if self._closed:
+                    return
+                async with session_factory() as db:
+                    try:
+                        db_task = await transition_task_status(
+                            db, task_id, from_status=TaskStatus.PENDING, to_status=TaskStatus.IN_PROGRESS,
+                            extra_log_entries=(LogEntry(TaskEvent.GRAPH_STARTED),),
+                            lease_expires_at=crud.lease_deadline(),
+                        )
+                    except crud.TaskStatusConflict:
+                        return # Started or changed elsewhere in the meantime
+                if db_task is not None:
+                    await process_task_in_background(task_id, session_factory)
+        finally:
+            self._starting.pop(task_id, None)
+
+    def close(self):
+        """Stop starting tasks. Those still waiting for a slot stay PENDING and armed."""
+        self._closed = True
+
+    async def join(self):
+        """Wait for every task started so far, and the tasks they release in turn."""
+        while self._starting:
+            await asyncio.gather(*list(self._starting.values()), return_exceptions=True)
+
+
+dependency_dispatcher = DependencyDispatcher()
@@ -0,0 +1,162 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from app.config import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TTL, CACHE_URL
+from app.schemas import Task as TaskSchema
+
+
+class CacheBackend:
+    """Minimal async key/value interface the task cache is built on."""
+
+    name = "base"
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    name = "none"
+
+    async def get(self, key: str) -> Optional[str]:
+        return None
+
+    async def set(self, key: str, value: str, ttl: float):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache whose entries also expire after their TTL."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class RedisCache(CacheBackend):
+    """Cache shared by every API and worker process.
+
+    `client` only needs async get/set(ex=)/delete, so any stand-in with that interface
+    (e.g. fakeredis in tests) can replace a real Redis connection.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        return cls(redis.from_url(url, decode_responses=True))
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self.client.set(key, value, ex=max(1, int(ttl)))
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+
+class TaskCache:
+    """Read-through cache of serialized tasks, with hit/miss counters.
+
+    Backend errors are reported and treated as misses, so the cache never takes reads down.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(task_id: int) -> str:
+        return f"task:{task_id}"
+
+    async def get(self, task_id: int) -> Optional[TaskSchema]:
+        try:
+            cached = await self.backend.get(self._key(task_id))
+        except Exception as e:
+            print(f"Cache: Error reading task {task_id}: {e}")
+            cached = None
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return TaskSchema.model_validate_json(cached)
+
+    async def set(self, task: Any):
+        task_data = TaskSchema.model_validate(task)
+        try:
+            await self.backend.set(self._key(task_data.id), task_data.model_dump_json(), self.ttl)
+        except Exception as e:
+            print(f"Cache: Error storing task {task_data.id}: {e}")
+
+    async def invalidate(self, *task_ids: int):
+        for task_id in task_ids:
+            try:
+                await self.backend.delete(self._key(task_id))
+            except Exception as e:
+                print(f"Cache: Error invalidating task {task_id}: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _create_backend(name: str) -> CacheBackend:
+    if name == "memory":
+        return MemoryCache()
+    if name == "redis":
+        return RedisCache.from_url(CACHE_URL)
+    if name == "none":
+        return NullCache()
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+
+
+task_cache = TaskCache(_create_backend(CACHE_BACKEND))
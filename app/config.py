@@ -0,0 +1,107 @@
+import os
+
+# "background" runs /tasks/{id}/process in the API process via FastAPI BackgroundTasks,
+# "worker" only enqueues the task for `python -m app.worker` to claim.
+TASK_DISPATCH_MODE = os.getenv("TASK_DISPATCH_MODE", "background")
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+# Port on which `python -m app.worker` serves its Prometheus metrics (0 = not served).
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+# Rows per multi-row INSERT when creating tasks in bulk.
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "1000"))
+# Most tasks PATCH /tasks/status and POST /tasks/process change in one request, by id list or filter.
+BULK_UPDATE_MAX_TASKS = int(os.getenv("BULK_UPDATE_MAX_TASKS", "1000"))
+
+# Exact GET /tasks totals are cached per (title, status) filter for this many seconds.
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "10"))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "1024"))
+
+# Read-through cache for GET /tasks/{task_id}: "memory" (per process), "redis" (shared) or "none".
+# With workers in separate processes use "redis", or writes they make stay invisible for up to CACHE_TTL.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "5"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+# Rows fetched per round trip by the streaming export endpoints.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# task_logs retention, applied by `python -m app.maintenance`. Per-task logs older than
+# TASK_LOG_COMPACT_AFTER_DAYS are folded into one summary row. On Postgres, monthly
+# partitions are created TASK_LOG_PARTITIONS_AHEAD months in advance, and dropped once
+# they are entirely older than TASK_LOG_RETENTION_DAYS.
+TASK_LOG_COMPACT_AFTER_DAYS = int(os.getenv("TASK_LOG_COMPACT_AFTER_DAYS", "30"))
+TASK_LOG_RETENTION_DAYS = int(os.getenv("TASK_LOG_RETENTION_DAYS", "365"))
+TASK_LOG_PARTITIONS_AHEAD = int(os.getenv("TASK_LOG_PARTITIONS_AHEAD", "3"))
+
+# Task event fan-out: "postgres" (LISTEN/NOTIFY, reaches every process), "memory"
+# (this process only) or "auto" (postgres when DATABASE_URL is Postgres).
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "auto")
+EVENTS_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENTS_SUBSCRIBER_QUEUE_SIZE", "100"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+
+# Task handlers (app.handlers). TASK_HANDLER_MODULES is a comma-separated list of modules
+# imported at startup so their @register_handler decorators run. A timeout of 0 means none.
+TASK_HANDLER_MODULES = [module for module in os.getenv("TASK_HANDLER_MODULES", "").split(",") if module.strip()]
+HANDLER_THREAD_POOL_SIZE = int(os.getenv("HANDLER_THREAD_POOL_SIZE", "8"))
+HANDLER_PROCESS_POOL_SIZE = int(os.getenv("HANDLER_PROCESS_POOL_SIZE", str(os.cpu_count() or 1)))
+HANDLER_DEFAULT_TIMEOUT = float(os.getenv("HANDLER_DEFAULT_TIMEOUT", "0"))
+
+# Priority scheduler used by workers. Each priority level gets a share of claims in
+# proportion to its weight ("priority:weight" pairs). The weight of a level grows by 100% for every
+# SCHEDULER_AGING_SECONDS its oldest task has waited, so low priorities cannot starve.
+# SCHEDULER_GLOBAL_CONCURRENCY caps IN_PROGRESS tasks across all workers (0 = no cap).
+SCHEDULER_PRIORITY_WEIGHTS = {
+    int(priority): float(weight)
+    for priority, weight in (
+        pair.split(":") for pair in os.getenv("SCHEDULER_PRIORITY_WEIGHTS", "1:1,2:2,3:4,4:8,5:16").split(",")
+    )
+}
+SCHEDULER_AGING_SECONDS = float(os.getenv("SCHEDULER_AGING_SECONDS", "60"))
+SCHEDULER_GLOBAL_CONCURRENCY = int(os.getenv("SCHEDULER_GLOBAL_CONCURRENCY", "0"))
+
+# Prometheus metrics at /metrics. When disabled, the request middleware and SQL hooks are not installed.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Connection pool, applied to the primary and the read replica engine (not to SQLite).
+# DB_POOL_RECYCLE=-1 keeps connections forever. DB_STATEMENT_CACHE_SIZE is asyncpg's
+# per-connection prepared statement cache; set it to 0 behind pgbouncer in transaction mode.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+# With DATABASE_READ_URL set, GET routes read from the replica, except for this many seconds
+# after the same client wrote something (tracked with a cookie), so clients read their own writes.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Leases on running tasks. A runner renews its tasks' leases every TASK_HEARTBEAT_INTERVAL
+# seconds. The reaper returns IN_PROGRESS tasks whose lease expired to PENDING (and requeues
+# them in worker mode); it runs at startup and every TASK_REAPER_INTERVAL seconds.
+# On shutdown, running tasks get SHUTDOWN_DRAIN_SECONDS to finish before they are handed back.
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "60"))
+TASK_HEARTBEAT_INTERVAL = float(os.getenv("TASK_HEARTBEAT_INTERVAL", "20"))
+TASK_REAPER_INTERVAL = float(os.getenv("TASK_REAPER_INTERVAL", "30"))
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "25"))
+
+# Task dependency graphs. In background mode, at most DAG_CONCURRENCY graph tasks run at once
+# in each process; in worker mode ready tasks are queued instead, so WORKER_CONCURRENCY applies.
+DAG_CONCURRENCY = int(os.getenv("DAG_CONCURRENCY", "4"))
+
+# Scheduled tasks (run_at, cron, interval_seconds). Every API and worker process runs a
+# timer (app.timers) holding the runs due within TIMER_HORIZON_SECONDS in memory; it
+# reloads them from the run_at index halfway through the horizon instead of polling.
+# Recurring runs are delayed by a random 0..SCHEDULE_JITTER_SECONDS unless the task sets
+# jitter_seconds. With catch_up=skip, a run more than SCHEDULE_MISFIRE_GRACE_SECONDS late is skipped.
+# In background mode at most TIMER_CONCURRENCY scheduled runs execute at once in each process;
+# due runs beyond that wait for a slot. In worker mode they are queued, so WORKER_CONCURRENCY applies.
+TIMER_ENABLED = os.getenv("TIMER_ENABLED", "true").lower() in ("1", "true", "yes")
+TIMER_HORIZON_SECONDS = float(os.getenv("TIMER_HORIZON_SECONDS", "60"))
+TIMER_BATCH_SIZE = int(os.getenv("TIMER_BATCH_SIZE", "500"))
+TIMER_CONCURRENCY = int(os.getenv("TIMER_CONCURRENCY", "4"))
+SCHEDULE_JITTER_SECONDS = int(os.getenv("SCHEDULE_JITTER_SECONDS", "30"))
+SCHEDULE_MISFIRE_GRACE_SECONDS = float(os.getenv("SCHEDULE_MISFIRE_GRACE_SECONDS", "60"))
@@ -0,0 +1,46 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from app.config import COUNT_CACHE_MAX_ENTRIES, COUNT_CACHE_TTL
+
+
+class CountCache:
+    """Caches total row counts per filter, invalidated by a write generation counter.
+
+    Every write that can change a count calls `bump()`. A count computed while a write
+    was in flight is tagged with the generation read before the query, so it can never
+    be stored as current. The TTL bounds staleness from writes made by other processes,
+    such as workers, which cannot bump this process's generation.
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_entries: int = COUNT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, int]]" = OrderedDict()
+
+    def bump(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, count = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return count
+
+    def set(self, key: Hashable, count: int, generation: int):
+        if generation != self.generation or self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, count)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+count_cache = CountCache()
@@ -1,76 +1,466 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import  func
+from sqlalchemy import  case, func, update, insert, delete, literal, tuple_, text, type_coerce, Row
+from sqlalchemy.orm import aliased
 
-from app.models import Task, TaskLog, TaskStatus
-from app.schemas import TaskCreate, TaskUpdate, TaskLogCreate
-from typing import List, Optional, Tuple
+from app.cache import task_cache
+from app.config import SCHEDULE_MISFIRE_GRACE_SECONDS, TASK_LEASE_SECONDS
+from app.count_cache import count_cache
+from app.events import event_broker, log_event, schedule_event, status_event
+from app.schedules import next_run_at
+from app.models import CatchUp, LogEntry, Task, TaskDependency, TaskEvent, TaskLog, TaskStatus, Timestamp
+from app.schemas import BulkSkipReason, CountMode, SkippedTask, TaskCreate, TaskUpdate, TaskLogCreate
+import json
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
-async def create_task_log(db: AsyncSession, task_id: int, status_message: str):
-    db_task_log = TaskLog(task_id=task_id, status=status_message)
+def _add_log(db: AsyncSession, events: List[dict], task_id: int, entry: LogEntry):
+    # Stage a TaskLog in the current transaction and the event announcing it.
+    db.add(TaskLog(task_id=task_id, **entry.values()))
+    events.append(log_event(task_id, entry))
+
+async def _tasks_changed(events: List[dict], *task_ids: int, counts_changed: bool = True):
+    # Post-commit housekeeping shared by every write path.
+    if counts_changed:
+        count_cache.bump()
+    await task_cache.invalidate(*task_ids)
+    await event_broker.publish_many(events)
+
+async def create_task_log(db: AsyncSession, task_id: int, entry: Union[LogEntry, str]) -> TaskLog:
+    """Record a log entry for a task. A plain string is logged as a free-text message."""
+    entry = LogEntry.of(entry)
+    db_task_log = TaskLog(task_id=task_id, **entry.values())
     db.add(db_task_log)
     await db.commit()
     await db.refresh(db_task_log)
+    await event_broker.publish(log_event(task_id, entry))
     return db_task_log
 
+def _with_first_run(values: dict) -> dict:
+    # A recurring task created without a run_at first runs at its next occurrence.
+    if values.get("run_at") is None:
+        values["run_at"] = next_run_at(
+            values.get("cron"), values.get("interval_seconds"), values.get("jitter_seconds"), None,
+            datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+    return values
+
 async def create_task(db: AsyncSession, task: TaskCreate) -> Task:
-    db_task = Task(**task.model_dump())
+    # The creation log goes in the same transaction, so a task is never seen without it.
+    db_task = Task(**_with_first_run(task.model_dump()))
     db.add(db_task)
+    await db.flush()
+    events: List[dict] = []
+    _add_log(db, events, db_task.id, LogEntry.created(db_task.status))
     await db.commit()
     await db.refresh(db_task)
-    await create_task_log(db, task_id=db_task.id, status_message=f"Task created with status {db_task.status.value}")
+    if db_task.run_at is not None:
+        events.append(schedule_event(db_task.id, db_task.run_at))
+    await _tasks_changed(events)
     return db_task
 
+async def _insert_task_batch(db: AsyncSession, tasks: List[TaskCreate], events: List[dict]) -> List[int]:
+    # One multi-row INSERT ... RETURNING for the tasks and one executemany for their logs.
+    rows = []
+    for task in tasks:
+        values = _with_first_run(task.model_dump())
+        if values["status"] is None:
+            values["status"] = TaskStatus.PENDING
+        rows.append(values)
+    result = await db.execute(insert(Task).returning(Task.id, Task.status, Task.run_at, sort_by_parameter_order=True), rows)
+    created = result.all()
+    await _insert_logs(db, events, [(row.id, LogEntry.created(row.status)) for row in created])
+    events.extend(schedule_event(row.id, row.run_at) for row in created if row.run_at is not None)
+    return [row.id for row in created]
+
+async def create_tasks_bulk(db: AsyncSession, batches: AsyncIterable[List[TaskCreate]]) -> List[int]:
+    """Insert every batch of tasks, plus their creation logs, in a single transaction."""
+    task_ids: List[int] = []
+    events: List[dict] = []
+    try:
+        async for batch in batches:
+            if batch:
+                task_ids.extend(await _insert_task_batch(db, batch, events))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await _tasks_changed(events)
+    return task_ids
+
 async def get_task(db: AsyncSession, task_id: int) -> Optional[Task]:
     result = await db.execute(select(Task).where(Task.id == task_id))
     return result.scalar_one_or_none()
 
-async def get_tasks(
-    db: AsyncSession, skip: int = 0, limit: int = 10, title: Optional[str] = None, status: Optional[TaskStatus] = None
-) -> Tuple[List[Task], int]:
-    query = select(Task).order_by(Task.priority.desc(), Task.created_at.desc())
-    count_query = select(func.count()).select_from(Task)
-
+def task_filters(title: Optional[str] = None, status: Optional[TaskStatus] = None) -> list:
+    filters = []
     if title:
-        query = query.where(Task.title.ilike(f"%{title}%"))
-        count_query = count_query.where(Task.title.ilike(f"%{title}%"))
+        filters.append(Task.title.ilike(f"%{title}%"))
     if status:
-        query = query.where(Task.status == status)
-        count_query = count_query.where(Task.status == status)
+        filters.append(Task.status == status)
+    return filters
 
-    total_count_result = await db.execute(count_query)
-    total = total_count_result.scalar_one()
+def _tasks_page_query(
+    columns, skip: int, limit: int, title: Optional[str], status: Optional[TaskStatus], after: Optional[Tuple[int, datetime, int]],
+):
+    query = (
+        select(*columns)
+        .where(*task_filters(title, status))
+        .order_by(Task.priority.desc(), Task.created_at.desc(), Task.id.desc())
+    )
+    if after is not None:
+        query = query.where(tuple_(Task.priority, Task.created_at, Task.id) < after)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+async def get_tasks(
+    db: AsyncSession, skip: int = 0, limit: int = 10, title: Optional[str] = None, status: Optional[TaskStatus] = None,
+    after: Optional[Tuple[int, datetime, int]] = None,
+) -> List[Task]:
+    """Return a page of tasks, highest priority and newest first.
 
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
+    Pages by offset (`skip`) unless `after` holds the (priority, created_at, id) key of the
+    last task already seen, in which case the page starts right after it.
+    """
+    result = await db.execute(_tasks_page_query((Task,), skip, limit, title, status, after))
     tasks = result.scalars().all()
-    return list(tasks), total
+    return list(tasks)
 
+async def get_task_rows(
+    db: AsyncSession, columns: Sequence, skip: int = 0, limit: int = 10, title: Optional[str] = None,
+    status: Optional[TaskStatus] = None, after: Optional[Tuple[int, datetime, int]] = None,
+) -> List[Row]:
+    """Like `get_tasks`, but selects just `columns` and returns plain rows instead of ORM objects."""
+    result = await db.execute(_tasks_page_query(columns, skip, limit, title, status, after))
+    return list(result.all())
 
-async def update_task(db: AsyncSession, task_id: int, task_update_data: TaskUpdate) -> Optional[Task]:
-    db_task = await get_task(db, task_id)
-    if not db_task:
+async def _estimate_task_count(db: AsyncSession, title: Optional[str], status: Optional[TaskStatus]) -> Optional[int]:
+    # Planner statistics: reltuples for the whole table, the EXPLAIN row estimate otherwise.
+    if not title and not status:
+        result = await db.execute(text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'tasks'::regclass"))
+        estimate = result.scalar_one_or_none()
+        return estimate if estimate is not None and estimate >= 0 else None # -1 until first ANALYZE
+    query = select(Task.id).where(*task_filters(title, status))
+    compiled = query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    connection = await db.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}") # Not text(): the literals may contain ':'
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def count_tasks(
+    db: AsyncSession, title: Optional[str] = None, status: Optional[TaskStatus] = None, mode: CountMode = CountMode.EXACT
+) -> Tuple[Optional[int], bool]:
+    """Return (total, is_exact) for the tasks matching the filters.
+
+    Exact counts are served from `count_cache` when possible. Estimates come from Postgres
+    planner statistics; on other databases, or before the table has been analyzed, they
+    fall back to the exact count.
+    """
+    if mode == CountMode.NONE:
+        return None, False
+    if mode == CountMode.ESTIMATE and db.get_bind().dialect.name == "postgresql":
+        estimate = await _estimate_task_count(db, title, status)
+        if estimate is not None:
+            return estimate, False
+
+    key = (title, status)
+    total = count_cache.get(key)
+    if total is None:
+        generation = count_cache.generation
+        result = await db.execute(select(func.count()).select_from(Task).where(*task_filters(title, status)))
+        total = result.scalar_one()
+        count_cache.set(key, total, generation)
+    return total, True
+
+
+def lease_deadline(now: Optional[datetime] = None) -> datetime:
+    """When a lease taken or renewed now expires. Naive UTC, like the other timestamps set from Python."""
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return now + timedelta(seconds=TASK_LEASE_SECONDS)
+
+class TaskStatusConflict(Exception):
+    """Raised when a task's current status does not allow the requested change."""
+
+    def __init__(self, task_id: int, status: TaskStatus, detail: Optional[str] = None):
+        self.task_id = task_id
+        self.status = status
+        self.detail = detail or f"Task is already {status.value}"
+        super().__init__(self.detail)
+
+def _status_values(status: TaskStatus) -> dict:
+    # Column values for a status change, including the run timings shown by GET /tasks/{id}/dag.
+    if status == TaskStatus.IN_PROGRESS:
+        return {"status": status, "status_changed_at": func.now(), "started_at": func.now(), "finished_at": None}
+    if status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+        return {"status": status, "status_changed_at": func.now(), "finished_at": func.now()}
+    return {"status": status, "status_changed_at": func.now(), "started_at": None, "finished_at": None}
+
+def _elapsed_ms(since: Optional[datetime], until: Optional[datetime]) -> Optional[int]:
+    # Time spent in the previous status, for the STATUS_CHANGED log entry.
+    if since is None or until is None:
         return None
+    return max(int((until - since).total_seconds() * 1000), 0)
 
-    old_status = db_task.status
-    update_data = task_update_data.model_dump(exclude_unset=True)
+async def _change_status(db: AsyncSession, returning: tuple, values: dict, *conditions) -> List[tuple]:
+    # UPDATE ... WHERE conditions RETURNING `returning`, for a status change. Each row is followed by
+    # the milliseconds its task spent in the status it left, for the STATUS_CHANGED log entry.
+    if db.get_bind().dialect.name == "postgresql":
+        # RETURNING sees the updated row: a self-join hands it the old one, in the same statement.
+        old = aliased(Task, name="old")
+        result = await db.execute(
+            update(Task)
+            .where(Task.id == old.id, *conditions)
+            .values(**values)
+            .returning(*returning, old.status_changed_at, Task.status_changed_at)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return [(*row[:-2], _elapsed_ms(row[-2], row[-1])) for row in result.all()]
+    # SQLite cannot RETURN a joined table's columns. It runs one writer at a time, so reading
+    # the old values first cannot race with another status change there.
+    since = dict((await db.execute(select(Task.id, Task.status_changed_at).where(*conditions))).all())
+    if not since:
+        return []
+    result = await db.execute(
+        update(Task)
+        .where(Task.id.in_(since), *conditions)
+        .values(**values)
+        .returning(Task.id, *returning, Task.status_changed_at)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return [(*row[1:-1], _elapsed_ms(since[row[0]], row[-1])) for row in result.all()]
 
-    if not update_data: # No fields to update
-        return db_task
+async def _change_status_returning(db: AsyncSession, task_id: int, values: dict, *conditions) -> Tuple[Optional[Task], Optional[int]]:
+    # _update_returning for a status change: the task, and the milliseconds it spent in its old status.
+    rows = await _change_status(db, (Task,), values, Task.id == task_id, *conditions)
+    return rows[0] if rows else (None, None)
+
+async def _update_returning(db: AsyncSession, task_id: int, values: dict, *conditions) -> Optional[Task]:
+    # UPDATE ... WHERE id = :id [AND conditions] RETURNING *, without a prior SELECT.
+    result = await db.execute(
+        update(Task)
+        .where(Task.id == task_id, *conditions)
+        .values(**values)
+        .returning(Task)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return result.scalar_one_or_none()
 
-    for key, value in update_data.items():
-        setattr(db_task, key, value)
+async def _raise_conflict(db: AsyncSession, task_id: int, detail: Optional[str] = None) -> None:
+    # The conditional UPDATE matched nothing: tell a missing task apart from a status conflict.
+    await db.rollback()
+    current_status = (await db.execute(select(Task.status).where(Task.id == task_id))).scalar_one_or_none()
+    if current_status is not None:
+        raise TaskStatusConflict(task_id, current_status, detail)
 
+async def transition_task_status(
+    db: AsyncSession, task_id: int, from_status: TaskStatus, to_status: TaskStatus, extra_log_entries: Tuple[LogEntry, ...] = (),
+    lease_expires_at: Optional[datetime] = None,
+) -> Optional[Task]:
+    """Atomically move a task from `from_status` to `to_status`, logging the change in the same transaction.
+
+    Returns None if the task does not exist and raises TaskStatusConflict if it is not in
+    `from_status`, so two concurrent callers can never both make the same transition.
+    The task's lease is replaced by `lease_expires_at`; pass `lease_deadline()` when
+    moving it to IN_PROGRESS for a runner.
+    """
+    db_task, duration_ms = await _change_status_returning(
+        db, task_id, {**_status_values(to_status), "lease_expires_at": lease_expires_at}, Task.status == from_status
+    )
+    if db_task is None:
+        await _raise_conflict(db, task_id)
+        return None
+    events = [status_event(task_id, from_status, to_status)]
+    status_changed = LogEntry.status_changed(from_status, to_status, duration_ms)
+    for entry in (status_changed, *extra_log_entries):
+        _add_log(db, events, task_id, entry)
     await db.commit()
-    await db.refresh(db_task)
+    await _tasks_changed(events, task_id)
+    return db_task
+
+async def update_task(db: AsyncSession, task_id: int, task_update_data: TaskUpdate) -> Optional[Task]:
+    update_data = task_update_data.model_dump(exclude_unset=True)
+    if "catch_up" in update_data and update_data["catch_up"] is None:
+        del update_data["catch_up"] # Not nullable
+    if not update_data: # No fields to update
+        return await get_task(db, task_id)
+
+    if "cron" in update_data or "interval_seconds" in update_data:
+        # Either one replaces the recurrence
+        update_data.setdefault("cron", None)
+        update_data.setdefault("interval_seconds", None)
+        if "run_at" not in update_data:
+            update_data["run_at"] = None
+            _with_first_run(update_data)
 
-    if "status" in update_data and old_status != db_task.status:
-        await create_task_log(db, task_id=db_task.id, status_message=f"Status changed from {old_status.value} to {db_task.status.value}")
-    elif update_data: # Log general update if not status change
-         await create_task_log(db, task_id=db_task.id, status_message=f"Task details updated.")
+    events: List[dict] = []
+    if "status" not in update_data:
+        db_task = await _update_returning(db, task_id, update_data)
+        if db_task is None:
+            return None
+        _add_log(db, events, task_id, LogEntry(TaskEvent.UPDATED))
+    else:
+        # The old status is needed for the log, and the update only applies if it is still current.
+        # A status set by hand is not backed by a runner, nor by a dependency graph run.
+        update_data.update(lease_expires_at=None, awaiting_upstream=False)
+        old_status = (await db.execute(select(Task.status).where(Task.id == task_id))).scalar_one_or_none()
+        if old_status is None:
+            return None
+        if update_data["status"] != old_status:
+            update_data.update(_status_values(update_data["status"]))
+            db_task, duration_ms = await _change_status_returning(db, task_id, update_data, Task.status == old_status)
+        else:
+            db_task = await _update_returning(db, task_id, update_data, Task.status == old_status)
+        if db_task is None:
+            await _raise_conflict(db, task_id, detail="Task status changed concurrently")
+            return None
+        if old_status != db_task.status:
+            events.append(status_event(task_id, old_status, db_task.status))
+            _add_log(db, events, task_id, LogEntry.status_changed(old_status, db_task.status, duration_ms))
+        else: # Log general update if not status change
+            _add_log(db, events, task_id, LogEntry(TaskEvent.UPDATED))
 
+    if "run_at" in update_data:
+        events.append(schedule_event(task_id, db_task.run_at))
+    await db.commit()
+    await _tasks_changed(events, task_id)
     return db_task
 
+async def get_task_ids(
+    db: AsyncSession, title: Optional[str] = None, status: Optional[TaskStatus] = None, limit: int = 1000
+) -> List[int]:
+    result = await db.execute(select(Task.id).where(*task_filters(title, status)).order_by(Task.id).limit(limit))
+    return list(result.scalars().all())
+
+async def _lock_tasks(db: AsyncSession, task_ids: List[int]) -> Dict[int, Row]:
+    # Row locks in id order, so concurrent bulk operations cannot deadlock on each other.
+    result = await db.execute(
+        select(Task.id, Task.status, Task.queued_at, Task.status_changed_at)
+        .where(Task.id.in_(task_ids)).order_by(Task.id).with_for_update()
+    )
+    return {row.id: row for row in result.all()}
+
+async def _bulk_update_returning(db: AsyncSession, task_ids: List[int], values: dict, *conditions) -> List[int]:
+    if not task_ids:
+        return []
+    result = await db.execute(
+        update(Task)
+        .where(Task.id.in_(task_ids), *conditions)
+        .values(**values)
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars().all())
+
+async def _bulk_change_status(db: AsyncSession, since: Dict[int, Optional[datetime]], values: dict, *conditions) -> Dict[int, Optional[int]]:
+    # Like _bulk_update_returning for a status change, for callers that have read (and locked) the
+    # rows already. `since` maps their ids to their status_changed_at; returns the ids that
+    # changed, with the time spent in the old status.
+    if not since:
+        return {}
+    result = await db.execute(
+        update(Task)
+        .where(Task.id.in_(since), *conditions)
+        .values(**values)
+        .returning(Task.id, Task.status_changed_at)
+        .execution_options(synchronize_session=False)
+    )
+    return {task_id: _elapsed_ms(since[task_id], changed_at) for task_id, changed_at in sorted(result.all())}
+
+async def _insert_logs(db: AsyncSession, events: List[dict], logs: List[Tuple[int, LogEntry]]):
+    # One multi-row INSERT for every log entry of a bulk operation.
+    if logs:
+        await db.execute(insert(TaskLog), [{"task_id": task_id, **entry.values()} for task_id, entry in logs])
+        events.extend(log_event(task_id, entry) for task_id, entry in logs)
+
+async def bulk_update_status(
+    db: AsyncSession, task_ids: List[int], status: TaskStatus
+) -> Tuple[List[int], List[SkippedTask]]:
+    """Set the status of many tasks with one UPDATE and one log INSERT, in one transaction.
+
+    Returns the ids that changed and the ids that were skipped, with the reason. COMPLETED
+    tasks are never changed.
+    """
+    current = await _lock_tasks(db, task_ids)
+    eligible: List[int] = []
+    skipped: List[SkippedTask] = []
+    for task_id in dict.fromkeys(task_ids):
+        row = current.get(task_id)
+        if row is None:
+            skipped.append(SkippedTask(id=task_id, reason=BulkSkipReason.MISSING))
+        elif row.status == TaskStatus.COMPLETED:
+            skipped.append(SkippedTask(id=task_id, reason=BulkSkipReason.COMPLETED, status=row.status))
+        elif row.status == status:
+            skipped.append(SkippedTask(id=task_id, reason=BulkSkipReason.UNCHANGED, status=row.status))
+        else:
+            eligible.append(task_id)
+
+    # The status conditions repeat the checks above for databases that ignore FOR UPDATE.
+    changed = await _bulk_change_status(
+        db, {task_id: current[task_id].status_changed_at for task_id in eligible},
+        {**_status_values(status), "queued_at": None, "lease_expires_at": None, "awaiting_upstream": False},
+        Task.status != status, Task.status != TaskStatus.COMPLETED,
+    )
+    events = [status_event(task_id, current[task_id].status, status) for task_id in changed]
+    await _insert_logs(db, events, [
+        (task_id, LogEntry.status_changed(current[task_id].status, status, duration_ms)) for task_id, duration_ms in changed.items()
+    ])
+    await db.commit()
+    if changed:
+        await _tasks_changed(events, *changed)
+    return list(changed), skipped
+
+async def bulk_dispatch(db: AsyncSession, task_ids: List[int], queue: bool) -> Tuple[List[int], List[SkippedTask]]:
+    """Start processing many PENDING tasks with one UPDATE and one log INSERT, in one transaction.
+
+    With queue=True the tasks are queued for workers, as `enqueue_task` does. Otherwise they
+    move to IN_PROGRESS, as `/tasks/{id}/process` does in background mode, and the caller
+    runs them. Returns the ids dispatched and the ids skipped, with the reason.
+    """
+    current = await _lock_tasks(db, task_ids)
+    eligible: List[int] = []
+    skipped: List[SkippedTask] = []
+    for task_id in dict.fromkeys(task_ids):
+        row = current.get(task_id)
+        if row is None:
+            skipped.append(SkippedTask(id=task_id, reason=BulkSkipReason.MISSING))
+        elif row.status == TaskStatus.COMPLETED:
+            skipped.append(SkippedTask(id=task_id, reason=BulkSkipReason.COMPLETED, status=row.status))
+        elif row.status != TaskStatus.PENDING:
+            skipped.append(SkippedTask(id=task_id, reason=BulkSkipReason.NOT_PENDING, status=row.status))
+        elif queue and row.queued_at is not None:
+            skipped.append(SkippedTask(id=task_id, reason=BulkSkipReason.QUEUED, status=row.status))
+        else:
+            eligible.append(task_id)
+
+    events: List[dict] = []
+    if queue:
+        changed = await _bulk_update_returning(
+            db, eligible, {"queued_at": func.now()}, Task.status == TaskStatus.PENDING, Task.queued_at.is_(None)
+        )
+        logs = [(task_id, LogEntry(TaskEvent.QUEUED)) for task_id in changed]
+    else:
+        started = await _bulk_change_status(
+            db, {task_id: current[task_id].status_changed_at for task_id in eligible},
+            {**_status_values(TaskStatus.IN_PROGRESS), "queued_at": None, "lease_expires_at": lease_deadline()},
+            Task.status == TaskStatus.PENDING,
+        )
+        changed = list(started)
+        events.extend(status_event(task_id, TaskStatus.PENDING, TaskStatus.IN_PROGRESS) for task_id in changed)
+        logs = [
+            (task_id, entry) for task_id, duration_ms in started.items()
+            for entry in (
+                LogEntry.status_changed(TaskStatus.PENDING, TaskStatus.IN_PROGRESS, duration_ms), LogEntry(TaskEvent.PROCESSING_STARTED),
+            )
+        ]
+    await _insert_logs(db, events, logs)
+    await db.commit()
+    if changed:
+        await _tasks_changed(events, *changed, counts_changed=not queue)
+    return changed, skipped
+
 async def delete_task(db: AsyncSession, task_id: int) -> bool:
     db_task = await get_task(db, task_id)
     if not db_task:
@@ -78,14 +468,475 @@ async def delete_task(db: AsyncSession, task_id: int) -> bool:
     # TaskLogs are deleted by CASCADE on foreign key
     await db.delete(db_task)
     await db.commit()
+    await _tasks_changed([{"type": "deleted", "task_id": task_id}], task_id)
     return True
 
-async def get_task_logs(db: AsyncSession, task_id: int, skip: int = 0, limit: int = 10) -> List[TaskLog]:
-    result = await db.execute(
-        select(TaskLog)
+def _task_logs_page_query(columns, task_id: int, skip: int, limit: int, after: Optional[Tuple[datetime, int]]):
+    query = (
+        select(*columns)
         .where(TaskLog.task_id == task_id)
-        .order_by(TaskLog.created_at.desc())
-        .offset(skip)
+        .order_by(TaskLog.created_at.desc(), TaskLog.id.desc())
+    )
+    if after is not None:
+        query = query.where(tuple_(TaskLog.created_at, TaskLog.id) < after)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+async def get_task_logs(
+    db: AsyncSession, task_id: int, skip: int = 0, limit: int = 10, after: Optional[Tuple[datetime, int]] = None
+) -> List[TaskLog]:
+    result = await db.execute(_task_logs_page_query((TaskLog,), task_id, skip, limit, after))
+    return list(result.scalars().all())
+
+async def get_task_log_rows(
+    db: AsyncSession, task_id: int, columns: Sequence, skip: int = 0, limit: int = 10,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[Row]:
+    """Like `get_task_logs`, but selects just `columns` and returns plain rows."""
+    result = await db.execute(_task_logs_page_query(columns, task_id, skip, limit, after))
+    return list(result.all())
+
+
+async def enqueue_task(db: AsyncSession, task_id: int) -> Optional[Task]:
+    """Mark a PENDING task as waiting for a worker. Raises TaskStatusConflict if it is not PENDING or already queued."""
+    db_task = await _update_returning(
+        db, task_id, {"queued_at": func.now()}, Task.status == TaskStatus.PENDING, Task.queued_at.is_(None)
+    )
+    if db_task is None:
+        current_status = (await db.execute(select(Task.status).where(Task.id == task_id))).scalar_one_or_none()
+        await db.rollback()
+        if current_status == TaskStatus.PENDING:
+            raise TaskStatusConflict(task_id, current_status, detail="Task is already queued")
+        if current_status is not None:
+            raise TaskStatusConflict(task_id, current_status)
+        return None
+    events: List[dict] = []
+    _add_log(db, events, task_id, LogEntry(TaskEvent.QUEUED))
+    await db.commit()
+    await _tasks_changed(events, task_id, counts_changed=False)
+    return db_task
+
+class ClaimedTask(NamedTuple):
+    task_id: int
+    priority: int
+    queued_at: datetime
+
+async def claim_tasks(db: AsyncSession, limit: int, priority: Optional[int] = None) -> List[ClaimedTask]:
+    """Claim up to `limit` of the longest-queued tasks, optionally of a single priority."""
+    return await claim_tasks_by_priority(db, {priority: limit})
+
+async def claim_tasks_by_priority(db: AsyncSession, limits: Dict[Optional[int], int]) -> List[ClaimedTask]:
+    """Atomically move queued PENDING tasks to IN_PROGRESS, up to limits[priority] per priority.
+
+    A None key means any priority. Everything is claimed in one transaction, and the tasks
+    are returned in queue order. On Postgres the candidate rows are locked with FOR UPDATE
+    SKIP LOCKED, so concurrent workers never block on or claim the same row. SQLite ignores
+    the locking clause, but it serializes writers, and the UPDATE re-checks the status,
+    so a row is never claimed twice there either.
+    """
+    candidates: Dict[int, ClaimedTask] = {}
+    since: Dict[int, Optional[datetime]] = {}
+    for priority, limit in limits.items():
+        query = (
+            select(Task.id, Task.priority, Task.queued_at, Task.status_changed_at)
+            .where(Task.status == TaskStatus.PENDING, Task.queued_at.is_not(None))
+        )
+        if priority is not None:
+            query = query.where(Task.priority == priority)
+        result = await db.execute(query.order_by(Task.queued_at, Task.id).limit(limit).with_for_update(skip_locked=True))
+        for row in result.all():
+            candidates[row.id] = ClaimedTask(row.id, row.priority, row.queued_at)
+            since[row.id] = row.status_changed_at
+    if not candidates:
+        await db.commit()
+        return []
+
+    started = await _bulk_change_status(
+        db, since, {**_status_values(TaskStatus.IN_PROGRESS), "queued_at": None, "lease_expires_at": lease_deadline()},
+        Task.status == TaskStatus.PENDING,
+    )
+    claimed = sorted((candidates[task_id] for task_id in started), key=lambda task: (task.queued_at, task.task_id))
+    events: List[dict] = []
+    for task in claimed:
+        events.append(status_event(task.task_id, TaskStatus.PENDING, TaskStatus.IN_PROGRESS))
+        _add_log(db, events, task.task_id, LogEntry.status_changed(TaskStatus.PENDING, TaskStatus.IN_PROGRESS, started[task.task_id]))
+    await db.commit()
+    if claimed:
+        await _tasks_changed(events, *(task.task_id for task in claimed))
+    return claimed
+
+async def renew_leases(db: AsyncSession, task_ids: List[int]) -> int:
+    """Extend the leases of tasks this process is running. Returns how many were still IN_PROGRESS."""
+    if not task_ids:
+        return 0
+    result = await db.execute(
+        update(Task)
+        .where(Task.id.in_(task_ids), Task.status == TaskStatus.IN_PROGRESS)
+        .values(lease_expires_at=lease_deadline())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+async def _return_to_pending(db: AsyncSession, conditions: list, requeue: bool, reason: TaskEvent) -> List[int]:
+    # IN_PROGRESS -> PENDING with one UPDATE ... RETURNING; requeued tasks go back to the worker queue.
+    returned = dict(sorted(await _change_status(
+        db, (Task.id,),
+        {**_status_values(TaskStatus.PENDING), "lease_expires_at": None, "queued_at": func.now() if requeue else None},
+        Task.status == TaskStatus.IN_PROGRESS, *conditions,
+    )))
+    task_ids = list(returned)
+    events = [status_event(task_id, TaskStatus.IN_PROGRESS, TaskStatus.PENDING) for task_id in task_ids]
+    await _insert_logs(db, events, [
+        (task_id, entry) for task_id, duration_ms in returned.items()
+        for entry in (LogEntry.status_changed(TaskStatus.IN_PROGRESS, TaskStatus.PENDING, duration_ms), LogEntry(reason))
+    ])
+    await db.commit()
+    if task_ids:
+        await _tasks_changed(events, *task_ids)
+    return task_ids
+
+async def reap_expired_leases(db: AsyncSession, requeue: bool, now: Optional[datetime] = None) -> List[int]:
+    """Return IN_PROGRESS tasks whose runner stopped renewing their lease to PENDING."""
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return await _return_to_pending(
+        db, [Task.lease_expires_at < now], requeue, TaskEvent.LEASE_EXPIRED
+    )
+
+async def release_tasks(db: AsyncSession, task_ids: List[int], requeue: bool) -> List[int]:
+    """Hand back tasks this process could not finish, e.g. when shutting down."""
+    if not task_ids:
+        return []
+    return await _return_to_pending(
+        db, [Task.id.in_(task_ids)], requeue, TaskEvent.INTERRUPTED
+    )
+
+async def get_queue_depths(db: AsyncSession) -> Tuple[List[Tuple[int, int, datetime]], datetime]:
+    """Return (priority, queued task count, oldest queued_at) per priority, plus the database's current time."""
+    result = await db.execute(
+        select(Task.priority, func.count(), func.min(Task.queued_at))
+        .where(Task.status == TaskStatus.PENDING, Task.queued_at.is_not(None))
+        .group_by(Task.priority)
+        .order_by(Task.priority.desc())
+    )
+    depths = [tuple(row) for row in result.all()]
+    # queued_at is a timestamp without time zone, so on Postgres compare against LOCALTIMESTAMP rather than now().
+    current_time = func.localtimestamp() if db.get_bind().dialect.name == "postgresql" else func.now()
+    now = (await db.execute(select(type_coerce(current_time, Timestamp)))).scalar_one()
+    return depths, now
+
+async def count_in_progress(db: AsyncSession) -> int:
+    result = await db.execute(select(func.count()).select_from(Task).where(Task.status == TaskStatus.IN_PROGRESS))
+    return result.scalar_one()
+
+def _log_window(since: datetime, until: Optional[datetime]) -> list:
+    window = [TaskLog.created_at >= since]
+    if until is not None:
+        window.append(TaskLog.created_at < until)
+    return window
+
+async def get_time_in_status(
+    db: AsyncSession, since: datetime, until: Optional[datetime] = None
+) -> List[Tuple[TaskStatus, int, int, int]]:
+    """Per status: how often tasks left it in [since, until), and the total and longest time spent in it, in ms.
+
+    Reads only STATUS_CHANGED log entries, off the (event, created_at) index.
+    """
+    result = await db.execute(
+        select(TaskLog.from_status, func.count(), func.sum(TaskLog.duration_ms), func.max(TaskLog.duration_ms))
+        .where(
+            TaskLog.event == TaskEvent.STATUS_CHANGED, TaskLog.duration_ms.is_not(None), *_log_window(since, until),
+        )
+        .group_by(TaskLog.from_status)
+    )
+    return sorted(((status, count, int(total), int(longest)) for status, count, total, longest in result.all()), key=lambda row: row[0].name)
+
+# strftime formats matching date_trunc on databases without it
+_SQLITE_BUCKETS = {"minute": "%Y-%m-%d %H:%M:00", "hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d 00:00:00"}
+
+def _time_bucket(db: AsyncSession, bucket: str, column):
+    # Rendered inline rather than bound, so Postgres sees the same expression in SELECT and GROUP BY.
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc(text(f"'{bucket}'"), column)
+    return func.strftime(text(f"'{_SQLITE_BUCKETS[bucket]}'"), column)
+
+async def get_throughput(
+    db: AsyncSession, since: datetime, until: Optional[datetime], bucket: str
+) -> List[Tuple[datetime, int, int]]:
+    """(bucket start, tasks COMPLETED, tasks FAILED) per `bucket` ("minute", "hour" or "day") in [since, until)."""
+    start = _time_bucket(db, bucket, TaskLog.created_at)
+    result = await db.execute(
+        select(start, TaskLog.to_status, func.count())
+        .where(
+            TaskLog.event == TaskEvent.STATUS_CHANGED, TaskLog.to_status.in_([TaskStatus.COMPLETED, TaskStatus.FAILED]),
+            *_log_window(since, until),
+        )
+        .group_by(start, TaskLog.to_status)
+    )
+    counts: Dict[datetime, List[int]] = {}
+    for bucket_start, status, count in result.all():
+        if isinstance(bucket_start, str): # SQLite
+            bucket_start = datetime.fromisoformat(bucket_start)
+        counts.setdefault(bucket_start, [0, 0])[status == TaskStatus.FAILED] += count
+    return [(bucket_start, completed, failed) for bucket_start, (completed, failed) in sorted(counts.items())]
+
+
+class InvalidDependency(Exception):
+    """Raised when a dependency refers to a missing task or would close a cycle."""
+
+    def __init__(self, detail: str):
+        self.detail = detail
+        super().__init__(detail)
+
+# pg_advisory_xact_lock key serializing dependency edits, so two of them cannot close a cycle together.
+_DEPENDENCY_LOCK_KEY = 0x64657073 # "deps"
+
+def _graph_closure(task_ids: List[int], upstream: bool):
+    # Recursive CTE of every task reachable from `task_ids` along task_dependencies, upstream or
+    # downstream. UNION (not UNION ALL) visits each task once, even where paths rejoin.
+    near, far = (
+        (TaskDependency.task_id, TaskDependency.depends_on_id) if upstream
+        else (TaskDependency.depends_on_id, TaskDependency.task_id)
+    )
+    closure = select(far.label("id")).where(near.in_(task_ids)).cte("upstream" if upstream else "downstream", recursive=True)
+    return closure.union(select(far).join(closure, near == closure.c.id))
+
+async def get_upstream_ids(db: AsyncSession, task_id: int) -> List[int]:
+    result = await db.execute(
+        select(TaskDependency.depends_on_id).where(TaskDependency.task_id == task_id).order_by(TaskDependency.depends_on_id)
+    )
+    return list(result.scalars().all())
+
+async def add_dependencies(db: AsyncSession, task_id: int, upstream_ids: List[int]) -> Optional[List[int]]:
+    """Make `task_id` run after every task in `upstream_ids`. Returns all of its upstream ids.
+
+    Returns None if the task does not exist, and raises InvalidDependency if an upstream task
+    does not exist or is already downstream of `task_id`.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _DEPENDENCY_LOCK_KEY})
+    upstream_ids = list(dict.fromkeys(upstream_ids))
+    existing = set((await db.execute(select(Task.id).where(Task.id.in_([task_id, *upstream_ids])))).scalars().all())
+    if task_id not in existing:
+        await db.rollback()
+        return None
+    missing = [upstream_id for upstream_id in upstream_ids if upstream_id not in existing]
+    if missing:
+        await db.rollback()
+        raise InvalidDependency(f"Upstream tasks not found: {missing}")
+    downstream = _graph_closure([task_id], upstream=False)
+    downstream_ids = set((await db.execute(select(downstream.c.id))).scalars().all())
+    cyclic = [upstream_id for upstream_id in upstream_ids if upstream_id == task_id or upstream_id in downstream_ids]
+    if cyclic:
+        await db.rollback()
+        raise InvalidDependency(f"Depending on tasks {cyclic} would create a cycle")
+
+    current = set(await get_upstream_ids(db, task_id))
+    new_ids = [upstream_id for upstream_id in upstream_ids if upstream_id not in current]
+    if new_ids:
+        await db.execute(insert(TaskDependency), [{"task_id": task_id, "depends_on_id": upstream_id} for upstream_id in new_ids])
+    await db.commit()
+    return sorted(current.union(new_ids))
+
+async def remove_dependency(db: AsyncSession, task_id: int, upstream_id: int) -> bool:
+    result = await db.execute(
+        delete(TaskDependency).where(TaskDependency.task_id == task_id, TaskDependency.depends_on_id == upstream_id)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+async def get_task_graph(db: AsyncSession, task_id: int) -> Optional[Tuple[List[Row], List[Tuple[int, int]]]]:
+    """Return the tasks upstream and downstream of `task_id`, itself included, and the edges between them.
+
+    Tasks are rows of (id, title, status, started_at, finished_at); edges are (task_id, depends_on_id)
+    pairs. Returns None if the task does not exist.
+    """
+    upstream = _graph_closure([task_id], upstream=True)
+    downstream = _graph_closure([task_id], upstream=False)
+    result = await db.execute(
+        select(Task.id, Task.title, Task.status, Task.started_at, Task.finished_at)
+        .where((Task.id == task_id) | Task.id.in_(select(upstream.c.id)) | Task.id.in_(select(downstream.c.id)))
+        .order_by(Task.id)
+    )
+    nodes = list(result.all())
+    if not nodes:
+        return None
+    node_ids = [node.id for node in nodes]
+    result = await db.execute(
+        select(TaskDependency.task_id, TaskDependency.depends_on_id)
+        .where(TaskDependency.task_id.in_(node_ids), TaskDependency.depends_on_id.in_(node_ids))
+    )
+    return nodes, [tuple(edge) for edge in result.all()]
+
+async def get_ready_tasks(db: AsyncSession, *conditions) -> List[int]:
+    """Ids of armed, unqueued PENDING tasks matching `conditions` whose upstream tasks have all COMPLETED."""
+    upstream = aliased(Task)
+    blocked = (
+        select(TaskDependency.task_id)
+        .join(upstream, upstream.id == TaskDependency.depends_on_id)
+        .where(TaskDependency.task_id == Task.id, upstream.status != TaskStatus.COMPLETED)
+    )
+    result = await db.execute(
+        select(Task.id)
+        .where(
+            *conditions, Task.status == TaskStatus.PENDING, Task.awaiting_upstream.is_(True), Task.queued_at.is_(None),
+            ~blocked.exists(),
+        )
+        .order_by(Task.priority.desc(), Task.id)
+    )
+    return list(result.scalars().all())
+
+async def get_ready_dependents(db: AsyncSession, *task_ids: int) -> List[int]:
+    """The tasks that `task_ids` completing has made ready to run."""
+    dependents = select(TaskDependency.task_id).where(TaskDependency.depends_on_id.in_(task_ids))
+    return await get_ready_tasks(db, Task.id.in_(dependents))
+
+async def arm_task_graph(db: AsyncSession, task_id: int) -> Optional[Tuple[List[int], List[int]]]:
+    """Mark `task_id` and its PENDING upstream tasks to run as soon as their own upstream tasks complete.
+
+    Returns (armed ids, ids ready to run now), or None if the task does not exist. Raises
+    TaskStatusConflict if the task or one of its upstream tasks has FAILED. Arming twice is
+    harmless, so a run interrupted by a restart can simply be started again.
+    """
+    upstream = _graph_closure([task_id], upstream=True)
+    result = await db.execute(
+        select(Task.id, Task.status).where((Task.id == task_id) | Task.id.in_(select(upstream.c.id))).order_by(Task.id)
+    )
+    statuses = {row.id: row.status for row in result.all()}
+    if task_id not in statuses:
+        await db.rollback()
+        return None
+    failed = [graph_task_id for graph_task_id, status in statuses.items() if status == TaskStatus.FAILED]
+    if failed:
+        await db.rollback()
+        raise TaskStatusConflict(task_id, statuses[task_id], detail=f"Tasks {failed} of the graph have failed")
+
+    armed = await _bulk_update_returning(
+        db, [graph_task_id for graph_task_id, status in statuses.items() if status == TaskStatus.PENDING],
+        {"awaiting_upstream": True}, Task.status == TaskStatus.PENDING,
+    )
+    ready = await get_ready_tasks(db, Task.id.in_(armed)) if armed else []
+    await db.commit()
+    return sorted(armed), ready
+
+async def fail_task(db: AsyncSession, task_id: int, entry: LogEntry) -> List[int]:
+    """Mark an IN_PROGRESS task FAILED, along with every armed PENDING task downstream of it.
+
+    `entry` records why, e.g. a PROCESSING_ERROR. Returns the ids of the tasks that failed.
+    If the task is no longer IN_PROGRESS, only `entry` is logged.
+    """
+    db_task, duration_ms = await _change_status_returning(
+        db, task_id, {**_status_values(TaskStatus.FAILED), "lease_expires_at": None}, Task.status == TaskStatus.IN_PROGRESS
+    )
+    if db_task is None:
+        await create_task_log(db, task_id=task_id, entry=entry)
+        return []
+    events = [status_event(task_id, TaskStatus.IN_PROGRESS, TaskStatus.FAILED)]
+    for log_entry in (LogEntry.status_changed(TaskStatus.IN_PROGRESS, TaskStatus.FAILED, duration_ms), entry):
+        _add_log(db, events, task_id, log_entry)
+
+    downstream = _graph_closure([task_id], upstream=False)
+    failed = dict(sorted(await _change_status(
+        db, (Task.id,), {**_status_values(TaskStatus.FAILED), "queued_at": None},
+        Task.id.in_(select(downstream.c.id)), Task.status == TaskStatus.PENDING, Task.awaiting_upstream.is_(True),
+    )))
+    dependents = list(failed)
+    events.extend(status_event(dependent_id, TaskStatus.PENDING, TaskStatus.FAILED) for dependent_id in dependents)
+    await _insert_logs(db, events, [
+        (dependent_id, log_entry) for dependent_id, pending_ms in failed.items()
+        for log_entry in (
+            LogEntry.status_changed(TaskStatus.PENDING, TaskStatus.FAILED, pending_ms),
+            LogEntry(TaskEvent.UPSTREAM_FAILED, detail=str(task_id)),
+        )
+    ])
+    await db.commit()
+    await _tasks_changed(events, task_id, *dependents)
+    return [task_id, *dependents]
+
+
+async def get_scheduled_tasks(db: AsyncSession, until: datetime, limit: int) -> List[Tuple[int, datetime]]:
+    """(id, run_at) of the tasks due to run by `until`, earliest first."""
+    result = await db.execute(
+        select(Task.id, Task.run_at)
+        .where(Task.run_at.is_not(None), Task.run_at <= until)
+        .order_by(Task.run_at, Task.id)
         .limit(limit)
     )
-    return list(result.scalars().all())
\ No newline at end of file
+    return [(task_id, run_at) for task_id, run_at in result.all()]
+
+async def fire_scheduled_tasks(
+    db: AsyncSession, due: Dict[int, datetime], queue: bool, now: Optional[datetime] = None
+) -> List[int]:
+    """Claim the scheduled runs in `due` (task id -> the run_at that came due) and start them.
+
+    The timers of every process may try to fire the same run. Claiming locks the rows
+    still at that run_at and moves run_at on to the next occurrence, or clears it, in the
+    same transaction, so exactly one of them gets each run. A claimed run is skipped if the
+    previous one is still IN_PROGRESS or queued, or if the task's catch_up is SKIP and the
+    run is too late. Otherwise the task moves to IN_PROGRESS for the caller to process,
+    or with queue=True it is queued for workers. Returns the ids for the caller to process.
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    result = await db.execute(
+        select(
+            Task.id, Task.status, Task.queued_at, Task.status_changed_at,
+            Task.run_at, Task.cron, Task.interval_seconds, Task.jitter_seconds, Task.catch_up,
+        )
+        .where(tuple_(Task.id, Task.run_at).in_(list(due.items())))
+        .order_by(Task.id)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = result.all()
+    if not claimed:
+        await db.commit()
+        return []
+
+    next_runs: Dict[int, Optional[datetime]] = {}
+    runs: List[Row] = []
+    logs: List[Tuple[int, LogEntry]] = []
+    for row in claimed:
+        next_runs[row.id] = next_run_at(row.cron, row.interval_seconds, row.jitter_seconds, row.run_at, now)
+        late = (now - row.run_at).total_seconds()
+        if row.status == TaskStatus.IN_PROGRESS:
+            reason = "the previous run is still in progress"
+        elif queue and row.status == TaskStatus.PENDING and row.queued_at is not None:
+            reason = "the task is already queued"
+        elif next_runs[row.id] is not None and row.catch_up == CatchUp.SKIP and late > SCHEDULE_MISFIRE_GRACE_SECONDS:
+            reason = f"{late:.0f}s late"
+        else:
+            runs.append(row)
+            continue
+        logs.append((row.id, LogEntry(TaskEvent.SCHEDULE_SKIPPED, detail=reason)))
+
+    await db.execute(
+        update(Task)
+        .where(Task.id.in_(next_runs))
+        .values(run_at=case({task_id: literal(run_at, Timestamp) for task_id, run_at in next_runs.items()}, value=Task.id))
+        .execution_options(synchronize_session=False)
+    )
+    events = [schedule_event(task_id, run_at) for task_id, run_at in next_runs.items()]
+
+    # COMPLETED and FAILED tasks run again, so every run moves its task to the status it starts from.
+    to_status = TaskStatus.PENDING if queue else TaskStatus.IN_PROGRESS
+    restarted = await _bulk_change_status(
+        db, {row.id: row.status_changed_at for row in runs if row.status != to_status},
+        {
+            **_status_values(to_status), "awaiting_upstream": False,
+            "lease_expires_at": None if queue else lease_deadline(), "queued_at": None,
+        },
+        Task.status != TaskStatus.IN_PROGRESS,
+    )
+    if queue:
+        await _bulk_update_returning(db, [row.id for row in runs], {"queued_at": func.now()})
+    for row in runs:
+        if row.id in restarted:
+            events.append(status_event(row.id, row.status, to_status))
+            logs.append((row.id, LogEntry.status_changed(row.status, to_status, restarted[row.id])))
+        logs.append((row.id, LogEntry(TaskEvent.SCHEDULED_RUN)))
+        if queue:
+            logs.append((row.id, LogEntry(TaskEvent.QUEUED)))
+    await _insert_logs(db, events, logs)
+    await db.commit()
+    await _tasks_changed(events, *next_runs, counts_changed=bool(restarted))
+    return [] if queue else [row.id for row in runs]
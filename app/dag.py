@@ -0,0 +1,58 @@
+from graphlib import TopologicalSorter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row
+
+from app import schemas
+
+
+def critical_path(order: List[int], upstream: Dict[int, List[int]], durations: Dict[int, float]) -> Tuple[List[int], float]:
+    """Return the chain of tasks with the longest total duration, and that duration.
+
+    `order` lists the tasks upstream before downstream. Tasks that have not finished count
+    as zero, so on a running graph this is the critical path so far.
+    """
+    longest: Dict[int, float] = {}
+    previous: Dict[int, Optional[int]] = {}
+    for task_id in order:
+        before = max(upstream[task_id], key=lambda upstream_id: longest[upstream_id], default=None)
+        longest[task_id] = durations.get(task_id, 0.0) + (longest[before] if before is not None else 0.0)
+        previous[task_id] = before
+    if not longest:
+        return [], 0.0
+
+    # On ties, end at the most downstream task, so the path reaches the end of the graph.
+    end: Optional[int] = max(reversed(order), key=lambda task_id: longest[task_id])
+    total = longest[end]
+    path = []
+    while end is not None:
+        path.append(end)
+        end = previous[end]
+    return path[::-1], total
+
+
+def build_dag(task_id: int, nodes: Sequence[Row], edges: Sequence[Tuple[int, int]]) -> schemas.TaskDag:
+    """Render `crud.get_task_graph` output with per-task timings and the critical path."""
+    rows = {node.id: node for node in nodes}
+    upstream: Dict[int, List[int]] = {node_id: [] for node_id in rows}
+    for dependent_id, upstream_id in edges:
+        upstream[dependent_id].append(upstream_id)
+    order = list(TopologicalSorter({node_id: sorted(upstream_ids) for node_id, upstream_ids in upstream.items()}).static_order())
+
+    durations: Dict[int, float] = {}
+    dag_nodes = []
+    for node_id in order:
+        row = rows[node_id]
+        duration = wait = None
+        if row.started_at is not None and row.finished_at is not None:
+            duration = durations[node_id] = max((row.finished_at - row.started_at).total_seconds(), 0.0)
+        upstream_finished = [rows[upstream_id].finished_at for upstream_id in upstream[node_id]]
+        if row.started_at is not None and upstream_finished and None not in upstream_finished:
+            wait = max((row.started_at - max(upstream_finished)).total_seconds(), 0.0)
+        dag_nodes.append(schemas.DagNode(
+            id=node_id, title=row.title, status=row.status, depends_on=sorted(upstream[node_id]),
+            started_at=row.started_at, finished_at=row.finished_at, duration_seconds=duration, wait_seconds=wait,
+        ))
+
+    path, path_seconds = critical_path(order, upstream, durations)
+    return schemas.TaskDag(task_id=task_id, nodes=dag_nodes, critical_path=path, critical_path_seconds=path_seconds)
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from app.config import EVENTS_BACKEND, EVENTS_SUBSCRIBER_QUEUE_SIZE
+from app.database import engine
+from app.models import LogEntry, TaskStatus
+
+CHANNEL = "task_events"
+NOTIFY_MAX_BYTES = 8000
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+def status_event(task_id: int, from_status: Optional[TaskStatus], to_status: TaskStatus) -> dict:
+    return {
+        "type": "status",
+        "task_id": task_id,
+        "from": from_status.value if from_status else None,
+        "to": to_status.value,
+        "at": _now(),
+    }
+
+def schedule_event(task_id: int, run_at: Optional[datetime]) -> dict:
+    # Tells every process's timer (app.timers) about a new run_at; None unschedules the task.
+    return {"type": "scheduled", "task_id": task_id, "run_at": run_at.isoformat() if run_at else None, "at": _now()}
+
+def log_event(task_id: int, entry: Union[LogEntry, str]) -> dict:
+    entry = LogEntry.of(entry)
+    return {"type": "log", "task_id": task_id, "event": entry.event.name.lower(), "status": entry.render(), "at": _now()}
+
+
+def resync_event(reason: str) -> dict:
+    # Events were lost ("overflow": the subscriber fell behind, "reconnect": the listener was
+    # down). Subscribers should re-read whatever state they track.
+    return {"type": "resync", "task_id": None, "reason": reason, "at": _now()}
+
+
+_last_warned: Dict[str, float] = {}
+
+def _warn(key: str, message: str, interval: float = 10.0):
+    # Print at most once per interval per key, so a dead connection or a stuck subscriber does not flood the console.
+    now = time.monotonic()
+    if now - _last_warned.get(key, -interval) >= interval:
+        _last_warned[key] = now
+        print(f"Events: {message}")
+
+
+class Subscription(asyncio.Queue):
+    """A subscriber's queue of events for the task ids it watches; None watches every task.
+
+    It is registered with the broker from the moment it is created. Watch more tasks with
+    `add` and fewer with `discard`; `close` (or leaving `async with`) unregisters it.
+    `types` keeps only events of those types. Resync notices are always delivered.
+    """
+
+    def __init__(
+        self, broker: "EventBroker", task_ids: Iterable[Optional[int]] = (),
+        types: Optional[Iterable[str]] = None, queue_size: Optional[int] = None,
+    ):
+        super().__init__(maxsize=broker.queue_size if queue_size is None else queue_size)
+        self.broker = broker
+        self.types = set(types) if types is not None else None
+        self.task_ids: Set[Optional[int]] = set()
+        for task_id in task_ids:
+            self.add(task_id)
+
+    def add(self, task_id: Optional[int]):
+        self.task_ids.add(task_id)
+        self.broker._subscribers[task_id].add(self)
+
+    def discard(self, task_id: Optional[int]):
+        self.task_ids.discard(task_id)
+        subscribers = self.broker._subscribers.get(task_id)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.broker._subscribers[task_id]
+
+    def close(self):
+        for task_id in list(self.task_ids):
+            self.discard(task_id)
+
+    def wants(self, event: dict) -> bool:
+        return self.types is None or event["type"] in self.types or event["type"] == "resync"
+
+    def deliver(self, event: dict):
+        try:
+            self.put_nowait(event)
+        except asyncio.QueueFull:
+            # Fallen behind: what is queued is stale anyway, so replace it with a resync notice.
+            while not self.empty():
+                self.get_nowait()
+            self.put_nowait(resync_event("overflow"))
+            if not self.full():
+                self.put_nowait(event)
+            _warn("overflow", f"A slow subscriber fell {self.maxsize} events behind and was asked to resync")
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class EventBroker:
+    """In-process pub/sub for task events.
+
+    Subscribers get a bounded queue. A subscriber that falls that far behind gets a
+    resync notice in place of the events it missed, rather than holding up publishers.
+    """
+
+    name = "memory"
+
+    def __init__(self, queue_size: int = EVENTS_SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[Optional[int], Set[Subscription]] = defaultdict(set)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish_many(self, events: List[dict]):
+        for event in events:
+            self._deliver(event)
+
+    async def publish(self, event: dict):
+        await self.publish_many([event])
+
+    def _deliver(self, event: dict):
+        if event["task_id"] is None: # A notice for everyone
+            subscriptions = set().union(*self._subscribers.values())
+        else:
+            subscriptions = {*self._subscribers.get(event["task_id"], ()), *self._subscribers.get(None, ())}
+        for subscription in subscriptions:
+            if subscription.wants(event):
+                subscription.deliver(event)
+
+    def subscribe(
+        self, task_id: Optional[int] = None, types: Optional[Iterable[str]] = None, queue_size: Optional[int] = None
+    ) -> Subscription:
+        """Receive events for one task, or for every task when task_id is None.
+
+        Use it with `async with`, or call `close()` on the returned subscription. queue_size=0
+        makes the queue unbounded, for subscribers that must not miss events.
+        """
+        return Subscription(self, (task_id,), types, queue_size)
+
+
+class PostgresEventBroker(EventBroker):
+    """Fans events out to every API and worker process through Postgres LISTEN/NOTIFY.
+
+    Each process holds one listening connection and one publishing connection. A burst
+    of events costs a single round trip: one pg_notify per row of an unnest(). If that
+    fails, the events are sent one at a time, so one bad event does not lose the rest.
+    Events too large for a notification have their longest field cut short and are
+    marked "truncated". A lost listening connection is reconnected, with backoff, and
+    every subscriber is then sent a resync notice for the events missed meanwhile.
+    """
+
+    name = "postgres"
+
+    def __init__(self, dsn: str, queue_size: int = EVENTS_SUBSCRIBER_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self.dsn = dsn
+        self._listener: Any = None
+        self._publisher: Any = None
+        self._publish_lock = asyncio.Lock()
+        self._running = False
+        self._reconnecting: Optional[asyncio.Task] = None
+
+    async def _connect(self) -> Any:
+        import asyncpg
+        return await asyncpg.connect(self.dsn)
+
+    async def _listen(self) -> Any:
+        connection = await self._connect()
+        connection.add_termination_listener(self._on_listener_lost)
+        await connection.add_listener(CHANNEL, self._on_notify)
+        return connection
+
+    async def start(self):
+        self._listener = await self._listen()
+        self._publisher = await self._connect()
+        self._running = True
+
+    async def stop(self):
+        self._running = False
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            await asyncio.gather(self._reconnecting, return_exceptions=True)
+        for connection in (self._listener, self._publisher):
+            if connection is not None:
+                await connection.close()
+        self._listener = self._publisher = None
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str):
+        self._deliver(json.loads(payload))
+
+    def _on_listener_lost(self, connection: Any):
+        if self._running and self._reconnecting is None:
+            self._reconnecting = asyncio.create_task(self._reconnect_listener())
+
+    async def _reconnect_listener(self, delay: float = 0.5, max_delay: float = 30.0):
+        try:
+            while True:
+                try:
+                    self._listener = await self._listen()
+                    break
+                except Exception as e:
+                    _warn("listen", f"Reconnecting the listener failed, retrying in {delay:g}s: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, max_delay)
+            self._deliver(resync_event("reconnect"))
+        finally:
+            self._reconnecting = None
+
+    async def _notify(self, payloads: List[str]):
+        if self._publisher is None or self._publisher.is_closed():
+            self._publisher = await self._connect()
+        await self._publisher.execute("SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload", CHANNEL, payloads)
+
+    async def publish_many(self, events: List[dict]):
+        if not events:
+            return
+        if not self._running: # Not started: only this process can hear it
+            await super().publish_many(events)
+            return
+        payloads = [_payload(event) for event in events]
+        async with self._publish_lock:
+            try:
+                await self._notify(payloads)
+                return
+            except Exception:
+                pass
+            failed, error = 0, None
+            for payload in payloads:
+                try:
+                    await self._notify([payload])
+                except Exception as e:
+                    failed, error = failed + 1, e
+            if failed:
+                _warn("publish", f"Failed to publish {failed} of {len(payloads)} event(s): {error}")
+
+
+def _payload(event: dict) -> str:
+    # NOTIFY payloads must be shorter than 8000 bytes: cut the longest text fields until it fits.
+    payload = json.dumps(event)
+    if len(payload) < NOTIFY_MAX_BYTES: # json.dumps escapes non-ASCII, so characters are bytes
+        return payload
+    event = {**event, "truncated": True}
+    while True:
+        payload = json.dumps(event)
+        excess = len(payload) - NOTIFY_MAX_BYTES + 1
+        fields = [key for key, value in event.items() if isinstance(value, str) and value and key not in ("type", "at")]
+        if excess <= 0 or not fields:
+            return payload
+        field = max(fields, key=lambda key: len(event[key]))
+        value = event[field]
+        # The longest prefix whose JSON form is `excess` bytes shorter (escapes make characters up to 6 bytes)
+        target, low, high = len(json.dumps(value)) - excess, 0, len(value)
+        while low < high:
+            middle = (low + high + 1) // 2
+            low, high = (middle, high) if len(json.dumps(value[:middle])) <= target else (low, middle - 1)
+        event[field] = value[:low]
+
+
+def create_event_broker(backend: str = EVENTS_BACKEND) -> EventBroker:
+    if backend == "auto":
+        backend = "postgres" if engine.dialect.name == "postgresql" else "memory"
+    if backend == "postgres":
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresEventBroker(dsn)
+    if backend == "memory":
+        return EventBroker()
+    raise ValueError(f"Unknown EVENTS_BACKEND: {backend}")
+
+
+event_broker = create_event_broker()
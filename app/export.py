@@ -0,0 +1,78 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import EXPORT_BATCH_SIZE
+from app.crud import task_filters
+from app.models import Task, TaskLog, TaskStatus, render_log
+from app.schemas import ExportFormat
+
+# Plain column tuples rather than ORM objects; field names match the API schemas.
+TASK_EXPORT_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.status, Task.priority, Task.task_type, Task.created_at, Task.updated_at,
+    Task.run_at, Task.cron, Task.interval_seconds, Task.jitter_seconds, Task.catch_up,
+)
+TASK_LOG_EXPORT_COLUMNS = (
+    TaskLog.id, TaskLog.task_id, TaskLog.event, TaskLog.from_status, TaskLog.to_status, TaskLog.detail, TaskLog.created_at
+)
+TASK_LOG_EXPORT_FIELDS = ["id", "task_id", "status", "created_at"]
+
+MEDIA_TYPES = {ExportFormat.NDJSON: "application/x-ndjson", ExportFormat.CSV: "text/csv"}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _format_rows(names: List[str], rows: Sequence[Sequence[Any]], fmt: ExportFormat) -> str:
+    if fmt == ExportFormat.NDJSON:
+        return "".join(json.dumps(dict(zip(names, map(_plain, row))), ensure_ascii=False) + "\n" for row in rows)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def _task_log_row(row: Any) -> tuple:
+    # The log text, as GET /tasks/{id}/logs shows it, in place of the compact columns
+    return row.id, row.task_id, render_log(row.event, row.from_status, row.to_status, row.detail), row.created_at
+
+
+async def _stream_rows(
+    db: AsyncSession, query, fmt: ExportFormat, names: Optional[List[str]] = None, convert: Optional[Callable[[Any], tuple]] = None
+) -> AsyncIterator[str]:
+    """Yield the formatted result of `query` one server-side cursor batch at a time.
+
+    Rows are passed through `convert` if given, and `names` then names its output.
+    """
+    names = names or [column.key for column in query.selected_columns]
+    if fmt == ExportFormat.CSV:
+        yield _format_rows(names, [names], fmt)
+    result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    async for rows in result.partitions():
+        yield _format_rows(names, [convert(row) for row in rows] if convert else rows, fmt)
+
+
+def stream_tasks(
+    db: AsyncSession, fmt: ExportFormat, title: Optional[str] = None, status: Optional[TaskStatus] = None
+) -> AsyncIterator[str]:
+    query = select(*TASK_EXPORT_COLUMNS).where(*task_filters(title, status)).order_by(Task.id)
+    return _stream_rows(db, query, fmt)
+
+
+def stream_task_logs(db: AsyncSession, task_id: int, fmt: ExportFormat) -> AsyncIterator[str]:
+    query = (
+        select(*TASK_LOG_EXPORT_COLUMNS)
+        .where(TaskLog.task_id == task_id)
+        .order_by(TaskLog.created_at, TaskLog.id)
+    )
+    return _stream_rows(db, query, fmt, TASK_LOG_EXPORT_FIELDS, _task_log_row)
@@ -0,0 +1,100 @@
+import asyncio
+import enum
+import importlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from app.config import HANDLER_DEFAULT_TIMEOUT, HANDLER_PROCESS_POOL_SIZE, HANDLER_THREAD_POOL_SIZE, TASK_HANDLER_MODULES
+
+
+class ExecutionMode(str, enum.Enum):
+    ASYNC = "async" # Coroutine on the event loop: for I/O-bound work only
+    THREAD = "thread" # Bounded thread pool: blocking I/O, or C code that releases the GIL
+    PROCESS = "process" # Process pool: CPU-bound work, spread across cores
+
+
+class UnknownTaskType(LookupError):
+    def __init__(self, task_type: str):
+        self.task_type = task_type
+        super().__init__(f"No handler registered for task type '{task_type}'")
+
+
+class TaskHandler:
+    def __init__(self, func: Callable, mode: ExecutionMode, timeout: Optional[float]):
+        self.func = func
+        self.mode = mode
+        self.timeout = timeout
+
+
+class HandlerRegistry:
+    """Maps Task.task_type to the function that does the work and to where it runs.
+
+    Handlers take one argument, a plain dict with the task's id, title, description,
+    priority and task_type. Process-pool handlers must be module-level functions so
+    they can be pickled. A timeout stops the task from waiting, but Python cannot
+    interrupt a thread, and a timed-out process handler keeps its pool slot until
+    it returns.
+    """
+
+    def __init__(
+        self,
+        thread_pool_size: int = HANDLER_THREAD_POOL_SIZE,
+        process_pool_size: int = HANDLER_PROCESS_POOL_SIZE,
+        default_timeout: float = HANDLER_DEFAULT_TIMEOUT,
+    ):
+        self.thread_pool_size = thread_pool_size
+        self.process_pool_size = process_pool_size
+        self.default_timeout = default_timeout or None
+        self._handlers: Dict[str, TaskHandler] = {}
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def register(self, task_type: str, mode: ExecutionMode = ExecutionMode.ASYNC, timeout: Optional[float] = None):
+        """Decorator registering the handler for `task_type`. timeout=None uses the registry default."""
+        mode = ExecutionMode(mode)
+
+        def decorator(func: Callable) -> Callable:
+            if mode == ExecutionMode.ASYNC and not asyncio.iscoroutinefunction(func):
+                raise TypeError(f"Handler for '{task_type}' runs as a coroutine but {func.__name__} is not async")
+            self._handlers[task_type] = TaskHandler(func, mode, timeout if timeout is not None else self.default_timeout)
+            return func
+        return decorator
+
+    def get(self, task_type: str) -> TaskHandler:
+        try:
+            return self._handlers[task_type]
+        except KeyError:
+            raise UnknownTaskType(task_type) from None
+
+    def _executor(self, mode: ExecutionMode) -> Executor:
+        # Pools are created on first use, so an API process that runs no such handler never starts one.
+        if mode == ExecutionMode.THREAD:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.thread_pool_size, thread_name_prefix="task-handler")
+            return self._thread_pool
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_pool_size)
+        return self._process_pool
+
+    async def run(self, task_type: str, task: Dict[str, Any]) -> Any:
+        handler = self.get(task_type)
+        if handler.mode == ExecutionMode.ASYNC:
+            work = handler.func(task)
+        else:
+            work = asyncio.get_running_loop().run_in_executor(self._executor(handler.mode), handler.func, task)
+        return await asyncio.wait_for(work, timeout=handler.timeout)
+
+    def shutdown(self, wait: bool = True):
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+        self._thread_pool = self._process_pool = None
+
+
+registry = HandlerRegistry()
+register_handler = registry.register
+
+
+def load_handler_modules(modules: Iterable[str] = TASK_HANDLER_MODULES):
+    for module in modules:
+        importlib.import_module(module.strip())
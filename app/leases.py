@@ -0,0 +1,104 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud
+from app.config import TASK_DISPATCH_MODE, TASK_HEARTBEAT_INTERVAL, TASK_REAPER_INTERVAL
+from app.database import AsyncSessionLocal
+
+
+class LeaseManager:
+    """Keeps the leases of tasks running in this process alive, and reaps expired ones.
+
+    A task moved to IN_PROGRESS for processing gets a lease (`crud.lease_deadline`). While
+    its runner is tracked here, one UPDATE per heartbeat renews the leases of every task
+    this process runs. If the process dies, the leases lapse and the reaper in any other
+    API or worker process returns those tasks to PENDING. In worker mode it also requeues
+    them, so no capacity is lost after a crash or a deploy.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        heartbeat_interval: float = TASK_HEARTBEAT_INTERVAL,
+        reaper_interval: float = TASK_REAPER_INTERVAL,
+        requeue: bool = TASK_DISPATCH_MODE == "worker",
+    ):
+        self.session_factory = session_factory
+        self.heartbeat_interval = heartbeat_interval
+        self.reaper_interval = reaper_interval
+        self.requeue = requeue
+        self._running: Dict[int, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> Dict[int, asyncio.Task]:
+        return dict(self._running)
+
+    def track(self, task_id: int):
+        """Called by the runner of `task_id`, from the asyncio task that runs it."""
+        self._running[task_id] = asyncio.current_task()
+
+    def untrack(self, task_id: int):
+        self._running.pop(task_id, None)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def heartbeat(self) -> int:
+        async with self.session_factory() as db:
+            return await crud.renew_leases(db, list(self._running))
+
+    async def reap(self) -> int:
+        async with self.session_factory() as db:
+            task_ids = await crud.reap_expired_leases(db, requeue=self.requeue)
+        if task_ids:
+            print(f"Leases: Returned {len(task_ids)} orphaned task(s) to pending: {task_ids}")
+        return len(task_ids)
+
+    async def drain(self, timeout: float):
+        """Give running tasks up to `timeout` seconds to finish, then cancel the rest.
+
+        Cancelled runners release their tasks themselves (see process_task_in_background).
+        """
+        running = [task for task in self._running.values() if task is not None]
+        if not running:
+            return
+        print(f"Leases: Waiting up to {timeout:.0f}s for {len(running)} running task(s)")
+        _, pending = await asyncio.wait(running, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            print(f"Leases: Cancelled {len(pending)} task(s) still running at the drain deadline")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self):
+        last_reap = float("-inf") # Reap straight away, however recently the host booted
+        while True:
+            try:
+                if time.monotonic() - last_reap >= self.reaper_interval:
+                    last_reap = time.monotonic()
+                    await self.reap()
+                if self._running:
+                    await self.heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Leases: Error renewing or reaping leases: {e}")
+            await asyncio.sleep(min(self.heartbeat_interval, self.reaper_interval))
+
+
+lease_manager = LeaseManager()
@@ -1,54 +1,202 @@
-from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks, status as http_status
+from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks, Request, Response, WebSocket, WebSocketDisconnect, status as http_status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Annotated
+from typing import AsyncIterator, List, Optional, Annotated, Tuple
 from contextlib import asynccontextmanager
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
 import math
 
-from app import crud, models, schemas
-from app.database import get_db, engine, init_db_connection, close_db_connection
-from app.background_tasks import process_task_in_background
-from app.models import TaskStatus
+from app import crud, dag, export, models, pagination, schemas, search, serialization
+from app.cache import task_cache
+from app.handlers import load_handler_modules, registry
+from app.leases import lease_manager
+from app.timers import task_timer
+from app.database import get_db, get_read_db, engine, read_engine, init_db_connection, close_db_connection
+from app.background_tasks import dependency_dispatcher, process_task_in_background, process_tasks_in_background
+from app.models import LogEntry, TaskEvent, TaskStatus
+from app.config import TASK_DISPATCH_MODE, BULK_INSERT_BATCH_SIZE, BULK_UPDATE_MAX_TASKS, EVENTS_KEEPALIVE_SECONDS, METRICS_ENABLED, SHUTDOWN_DRAIN_SECONDS, TIMER_ENABLED
+from app.events import Subscription, event_broker, status_event
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db_connection() # Check DB connection
+    load_handler_modules()
+    await event_broker.start()
+    lease_manager.start() # Reaps tasks orphaned by a previous crash straight away
+    if TIMER_ENABLED:
+        task_timer.start()
     print("FastAPI application startup complete.")
     yield
+    await task_timer.stop() # No new scheduled runs while draining
+    dependency_dispatcher.close() # Graph tasks not started yet stay armed for the next run
+    await lease_manager.drain(SHUTDOWN_DRAIN_SECONDS)
+    await lease_manager.stop()
+    registry.shutdown(wait=False)
+    await event_broker.stop()
     await close_db_connection()
     print("FastAPI application shutdown.")
 
 app = FastAPI(title="Async Task Management API", version="0.1.0", lifespan=lifespan)
+if METRICS_ENABLED:
+    metrics.instrument_engine(engine)
+    if read_engine is not engine:
+        metrics.instrument_engine(read_engine, pool="replica")
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
 
 
 @app.post("/tasks", response_model=schemas.Task, status_code=http_status.HTTP_201_CREATED)
 async def create_new_task(task: schemas.TaskCreate, db: AsyncSession = Depends(get_db)):
     return await crud.create_task(db=db, task=task)
 
+_task_create_list = TypeAdapter(List[schemas.TaskCreate])
+
+def _body_validation_error(e: ValidationError, *loc) -> RequestValidationError:
+    return RequestValidationError([{**error, "loc": ("body", *loc, *error["loc"])} for error in e.errors(include_url=False)])
+
+async def _json_task_batches(request: Request) -> AsyncIterator[List[schemas.TaskCreate]]:
+    try:
+        tasks = _task_create_list.validate_json(await request.body())
+    except ValidationError as e:
+        raise _body_validation_error(e)
+    for start in range(0, len(tasks), BULK_INSERT_BATCH_SIZE):
+        yield tasks[start:start + BULK_INSERT_BATCH_SIZE]
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    yield buffer
+
+async def _ndjson_task_batches(request: Request) -> AsyncIterator[List[schemas.TaskCreate]]:
+    # Parse the body line by line as it arrives, so memory is bounded by the batch size.
+    batch: List[schemas.TaskCreate] = []
+    line_no = 0
+    async for line in _ndjson_lines(request):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            batch.append(schemas.TaskCreate.model_validate_json(line))
+        except ValidationError as e:
+            raise _body_validation_error(e, line_no)
+        if len(batch) >= BULK_INSERT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+@app.post("/tasks/bulk", response_model=schemas.BulkTaskCreateResult, status_code=http_status.HTTP_201_CREATED)
+async def create_tasks_bulk(request: Request, db: AsyncSession = Depends(get_db)):
+    """Create many tasks in one transaction.
+
+    Accepts either a JSON array of tasks or, with `Content-Type: application/x-ndjson`,
+    one task object per line.
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        batches = _ndjson_task_batches(request)
+    else:
+        batches = _json_task_batches(request)
+    task_ids = await crud.create_tasks_bulk(db, batches)
+    return schemas.BulkTaskCreateResult(created=len(task_ids), ids=task_ids)
+
 @app.get("/tasks", response_model=schemas.PaginatedTasks)
 async def list_tasks(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     title: Optional[str] = Query(None, min_length=1, max_length=50),
-    status: Optional[TaskStatus] = Query(None)
+    status: Optional[TaskStatus] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous page; takes precedence over page"),
+    count: schemas.CountMode = Query(schemas.CountMode.EXACT, description="How to compute total: exact, estimate or none"),
 ):
+    after = None
+    if cursor is not None:
+        try:
+            after = pagination.decode_task_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
     skip = (page - 1) * size
-    tasks, total_count = await crud.get_tasks(db, skip=skip, limit=size, title=title, status=status)
-    total_pages = math.ceil(total_count / size) if total_count > 0 else 1
-    return schemas.PaginatedTasks(items=tasks, total=total_count, page=page, size=size, pages=total_pages)
+    # Fetch one extra row to learn whether there is a next page.
+    tasks = await crud.get_task_rows(
+        db, serialization.TASK_COLUMNS, skip=skip, limit=size + 1, title=title, status=status, after=after
+    )
+    next_cursor = pagination.encode_task_cursor(tasks[size - 1]) if len(tasks) > size else None
+    total_count, total_exact = await crud.count_tasks(db, title=title, status=status, mode=count)
+    if total_count is None:
+        total_pages = None
+    else:
+        total_pages = math.ceil(total_count / size) if total_count > 0 else 1
+    # Rows go straight to JSON; the response_model above documents the shape.
+    return Response(
+        serialization.task_page(
+            tasks[:size], total=total_count, total_exact=total_exact, page=None if after is not None else page,
+            size=size, pages=total_pages, next_cursor=next_cursor,
+        ),
+        media_type="application/json",
+    )
+
+@app.get("/tasks/export")
+async def export_tasks(
+    db: AsyncSession = Depends(get_read_db),
+    format: schemas.ExportFormat = Query(schemas.ExportFormat.NDJSON),
+    title: Optional[str] = Query(None, min_length=1, max_length=50),
+    status: Optional[TaskStatus] = Query(None),
+):
+    """Stream every task matching the list_tasks filters, in id order, as NDJSON or CSV."""
+    return StreamingResponse(
+        export.stream_tasks(db, format, title=title, status=status),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
+
+@app.get("/tasks/search", response_model=List[schemas.TaskSearchResult])
+async def search_tasks(
+    db: AsyncSession = Depends(get_read_db),
+    q: str = Query(..., min_length=1, max_length=200, description="Words or phrases to find in title or description"),
+    limit: int = Query(10, ge=1, le=100),
+):
+    results = await search.search_tasks(db, q=q, limit=limit)
+    return [
+        schemas.TaskSearchResult(**schemas.Task.model_validate(task).model_dump(), rank=rank) for task, rank in results
+    ]
 
 @app.get("/tasks/{task_id}", response_model=schemas.Task)
 async def read_task(task_id: int, db: AsyncSession = Depends(get_db)):
+    # Cache misses read from the primary: a lagging replica would refill the cache with stale rows.
+    cached_task = await task_cache.get(task_id)
+    if cached_task is not None:
+        return cached_task
     db_task = await crud.get_task(db=db, task_id=task_id)
     if db_task is None:
         raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
+    await task_cache.set(db_task)
     return db_task
 
+async def _release_dependents(db: AsyncSession, task_ids: List[int]):
+    # Completing tasks by hand releases the armed tasks downstream of them, as finishing a run does.
+    ready = await crud.get_ready_dependents(db, *task_ids) if task_ids else []
+    if ready:
+        await dependency_dispatcher.dispatch(ready)
+
 @app.put("/tasks/{task_id}", response_model=schemas.Task)
 async def update_existing_task(task_id: int, task: schemas.TaskUpdate, db: AsyncSession = Depends(get_db)):
-    updated_task = await crud.update_task(db=db, task_id=task_id, task_update_data=task)
+    try:
+        updated_task = await crud.update_task(db=db, task_id=task_id, task_update_data=task)
+    except crud.TaskStatusConflict as e:
+        raise HTTPException(status_code=http_status.HTTP_409_CONFLICT, detail=e.detail)
     if updated_task is None:
         raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
+    if task.status == TaskStatus.COMPLETED and updated_task.status == TaskStatus.COMPLETED:
+        await _release_dependents(db, [task_id])
     return updated_task
 
 @app.delete("/tasks/{task_id}", status_code=http_status.HTTP_204_NO_CONTENT)
@@ -60,29 +208,280 @@ async def remove_task(task_id: int, db: AsyncSession = Depends(get_db)):
 
 @app.post("/tasks/{task_id}/process", status_code=http_status.HTTP_202_ACCEPTED)
 async def start_task_processing(task_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
-    db_task = await crud.get_task(db=db, task_id=task_id)
+    # Both branches claim the task with a conditional UPDATE, so concurrent calls cannot dispatch it twice.
+    try:
+        if TASK_DISPATCH_MODE == "worker":
+            db_task = await crud.enqueue_task(db, task_id=task_id)
+        else:
+            db_task = await crud.transition_task_status(
+                db, task_id, from_status=TaskStatus.PENDING, to_status=TaskStatus.IN_PROGRESS,
+                extra_log_entries=(LogEntry(TaskEvent.PROCESSING_STARTED),), lease_expires_at=crud.lease_deadline(),
+            )
+    except crud.TaskStatusConflict as e:
+        raise HTTPException(status_code=http_status.HTTP_409_CONFLICT, detail=e.detail)
     if db_task is None:
         raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
-    if db_task.status == TaskStatus.IN_PROGRESS:
-         raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=f"Task is already {db_task.status.value}")
-    elif db_task.status == TaskStatus.COMPLETED:
-         raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=f"Task is already {db_task.status.value}")
 
+    if TASK_DISPATCH_MODE == "worker":
+        return {"message": "Task queued for processing by a worker."}
     background_tasks.add_task(process_task_in_background, task_id)
-    await crud.create_task_log(db, task_id=task_id, status_message="Task processing initiated in background.")
     return {"message": "Task processing started in the background."}
 
+async def _selected_task_ids(db: AsyncSession, selection: schemas.TaskSelection) -> List[int]:
+    if selection.ids is not None:
+        return selection.ids
+    task_ids = await crud.get_task_ids(
+        db, title=selection.filter.title, status=selection.filter.status, limit=BULK_UPDATE_MAX_TASKS + 1
+    )
+    if len(task_ids) > BULK_UPDATE_MAX_TASKS:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"Filter matches more than {BULK_UPDATE_MAX_TASKS} tasks; narrow it or pass ids",
+        )
+    return task_ids
+
+@app.patch("/tasks/status", response_model=schemas.BulkTaskResult)
+async def update_task_statuses(status_update: schemas.BulkStatusUpdate, db: AsyncSession = Depends(get_db)):
+    task_ids = await _selected_task_ids(db, status_update)
+    changed, skipped = await crud.bulk_update_status(db, task_ids, status_update.status)
+    if status_update.status == TaskStatus.COMPLETED:
+        await _release_dependents(db, changed)
+    return schemas.BulkTaskResult(changed=len(changed), ids=changed, skipped=skipped)
+
+@app.post("/tasks/process", response_model=schemas.BulkTaskResult, status_code=http_status.HTTP_202_ACCEPTED)
+async def start_tasks_processing(
+    selection: schemas.TaskSelection, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)
+):
+    task_ids = await _selected_task_ids(db, selection)
+    changed, skipped = await crud.bulk_dispatch(db, task_ids, queue=TASK_DISPATCH_MODE == "worker")
+    if changed and TASK_DISPATCH_MODE != "worker":
+        background_tasks.add_task(process_tasks_in_background, changed)
+    return schemas.BulkTaskResult(changed=len(changed), ids=changed, skipped=skipped)
+
+@app.post("/tasks/{task_id}/dependencies", response_model=schemas.TaskDependencies)
+async def add_task_dependencies(task_id: int, dependencies: schemas.TaskDependencyCreate, db: AsyncSession = Depends(get_db)):
+    """Make the task run after each task in `depends_on` has COMPLETED."""
+    try:
+        upstream_ids = await crud.add_dependencies(db, task_id, dependencies.depends_on)
+    except crud.InvalidDependency as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=e.detail)
+    if upstream_ids is None:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return schemas.TaskDependencies(task_id=task_id, depends_on=upstream_ids)
+
+@app.delete("/tasks/{task_id}/dependencies/{upstream_id}", status_code=http_status.HTTP_204_NO_CONTENT)
+async def remove_task_dependency(task_id: int, upstream_id: int, db: AsyncSession = Depends(get_db)):
+    removed = await crud.remove_dependency(db, task_id, upstream_id)
+    if not removed:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Dependency not found")
+    return None
+
+@app.post("/tasks/{task_id}/dag/process", response_model=schemas.DagRunResult, status_code=http_status.HTTP_202_ACCEPTED)
+async def start_dag_processing(task_id: int, db: AsyncSession = Depends(get_db)):
+    """Run the task and everything upstream of it, each task as soon as its own upstream tasks complete.
+
+    Tasks already COMPLETED are not run again. Calling it again after a restart resumes the run.
+    """
+    try:
+        armed = await crud.arm_task_graph(db, task_id)
+    except crud.TaskStatusConflict as e:
+        raise HTTPException(status_code=http_status.HTTP_409_CONFLICT, detail=e.detail)
+    if armed is None:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
+    armed_ids, ready_ids = armed
+    dispatched = await dependency_dispatcher.dispatch(ready_ids)
+    return schemas.DagRunResult(dispatched=dispatched, waiting=[armed_id for armed_id in armed_ids if armed_id not in dispatched])
+
+@app.get("/tasks/{task_id}/dag", response_model=schemas.TaskDag)
+async def read_task_dag(task_id: int, db: AsyncSession = Depends(get_read_db)):
+    """The task's dependency graph, upstream and downstream, with per-task timings and the critical path."""
+    graph = await crud.get_task_graph(db, task_id)
+    if graph is None:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return dag.build_dag(task_id, *graph)
+
+@app.get("/tasks/{task_id}/logs/export")
+async def export_task_logs(
+    task_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    format: schemas.ExportFormat = Query(schemas.ExportFormat.NDJSON),
+):
+    """Stream all logs of a task, oldest first, as NDJSON or CSV."""
+    db_task = await crud.get_task(db=db, task_id=task_id)
+    if db_task is None:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return StreamingResponse(
+        export.stream_task_logs(db, task_id, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="task_{task_id}_logs.{format.value}"'},
+    )
+
+async def task_event_stream(subscription: Subscription, task_id: int, current_status: TaskStatus) -> AsyncIterator[str]:
+    """Server-sent events for one task: its current status first, then every change and log line.
+
+    The subscription must be open before `current_status` is read, so that no change is
+    lost in between; one may then repeat the status already sent. A "resync" event means
+    events were lost and the client should fetch the task again. The subscription is
+    closed when the stream ends.
+    """
+    try:
+        event = status_event(task_id, None, current_status)
+        while True:
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                    break
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n" # Keeps idle proxies from closing the connection
+    finally:
+        subscription.close()
+
+@app.get("/tasks/{task_id}/events")
+async def stream_task_events(task_id: int, db: AsyncSession = Depends(get_db)):
+    # Subscribe first: a change committed while the status is read still reaches the stream.
+    # The status comes from the primary; a replica's could be older than the events that follow.
+    subscription = event_broker.subscribe(task_id)
+    try:
+        db_task = await crud.get_task(db=db, task_id=task_id)
+        if db_task is None:
+            raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
+    except BaseException:
+        subscription.close()
+        raise
+    await db.close() # Don't hold a connection for the lifetime of the stream
+    return StreamingResponse(
+        task_event_stream(subscription, task_id, db_task.status),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(subscription.close), # In case the stream never starts
+    )
+
+@app.websocket("/ws/tasks")
+async def task_events_websocket(websocket: WebSocket):
+    """Multiplexed task events. Clients send {"action": "subscribe" | "unsubscribe", "task_id": N}.
+
+    Only events of subscribed tasks are sent. A {"type": "resync"} message means events were
+    lost and the client should fetch the tasks it follows again.
+    """
+    await websocket.accept()
+
+    async with Subscription(event_broker) as subscription:
+        async def receive_commands():
+            while True:
+                try:
+                    message = await websocket.receive_json()
+                except (WebSocketDisconnect, ValueError):
+                    return
+                if not isinstance(message, dict) or not isinstance(message.get("task_id"), int):
+                    await websocket.send_json({"type": "error", "detail": "Expected an action and an integer task_id"})
+                elif message.get("action") == "subscribe":
+                    subscription.add(message["task_id"])
+                elif message.get("action") == "unsubscribe":
+                    subscription.discard(message["task_id"])
+                else:
+                    await websocket.send_json({"type": "error", "detail": "Unknown action"})
+
+        receiver = asyncio.create_task(receive_commands())
+        try:
+            while not receiver.done():
+                getter = asyncio.ensure_future(subscription.get())
+                await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                await websocket.send_json(getter.result())
+        finally:
+            receiver.cancel()
+
+@app.get("/cache/stats", response_model=schemas.CacheStats)
+async def read_cache_stats():
+    return task_cache.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/queue/stats", response_model=schemas.QueueStats)
+async def read_queue_stats(db: AsyncSession = Depends(get_read_db)):
+    depths, now = await crud.get_queue_depths(db)
+    levels = [
+        schemas.QueueLevel(priority=priority, depth=depth, oldest_wait_seconds=max((now - oldest).total_seconds(), 0.0))
+        for priority, depth, oldest in depths
+    ]
+    return schemas.QueueStats(
+        levels=levels,
+        queued=sum(level.depth for level in levels),
+        in_progress=await crud.count_in_progress(db),
+    )
+
+def _stats_window(since: Optional[datetime], until: Optional[datetime]) -> Tuple[datetime, Optional[datetime], datetime]:
+    # Log timestamps are naive UTC: convert aware bounds, and default to the last 24 hours.
+    # Returns (since, until or None when open-ended, the until to report).
+    if until is not None and until.tzinfo is not None:
+        until = until.astimezone(timezone.utc).replace(tzinfo=None)
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    end = until or datetime.now(timezone.utc).replace(tzinfo=None)
+    since = since or end - timedelta(days=1)
+    if since >= end:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail="since must be before until")
+    return since, until, end
+
+@app.get("/stats/time-in-status", response_model=schemas.TimeInStatus)
+async def read_time_in_status(
+    db: AsyncSession = Depends(get_read_db),
+    since: Optional[datetime] = Query(None, description="Defaults to 24 hours before until"),
+    until: Optional[datetime] = Query(None, description="Defaults to now"),
+):
+    # Covers the logs kept in full; older ones are compacted by app.maintenance.
+    since, until, end = _stats_window(since, until)
+    statuses = [
+        schemas.StatusTime(
+            status=status, transitions=count, avg_seconds=total_ms / count / 1000,
+            max_seconds=longest_ms / 1000, total_seconds=total_ms / 1000,
+        )
+        for status, count, total_ms, longest_ms in await crud.get_time_in_status(db, since, until)
+    ]
+    return schemas.TimeInStatus(since=since, until=end, statuses=statuses)
+
+@app.get("/stats/throughput", response_model=schemas.Throughput)
+async def read_throughput(
+    db: AsyncSession = Depends(get_read_db),
+    since: Optional[datetime] = Query(None, description="Defaults to 24 hours before until"),
+    until: Optional[datetime] = Query(None, description="Defaults to now"),
+    bucket: schemas.StatsBucket = Query(schemas.StatsBucket.HOUR),
+):
+    since, until, end = _stats_window(since, until)
+    points = [
+        schemas.ThroughputPoint(start=start, completed=completed, failed=failed)
+        for start, completed, failed in await crud.get_throughput(db, since, until, bucket.value)
+    ]
+    return schemas.Throughput(since=since, until=end, bucket=bucket, points=points)
+
 @app.get("/tasks/{task_id}/logs", response_model=List[schemas.TaskLog])
 async def read_task_logs(
     task_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
-    size: int = Query(10, ge=1, le=100)
+    size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from a previous page; takes precedence over page"),
 ):
+    after = None
+    if cursor is not None:
+        try:
+            after = pagination.decode_task_log_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
     db_task = await crud.get_task(db=db, task_id=task_id)
     if db_task is None:
         raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Task not found")
 
     skip = (page - 1) * size
-    logs = await crud.get_task_logs(db, task_id=task_id, skip=skip, limit=size)
-    return logs
+    logs = await crud.get_task_log_rows(
+        db, task_id=task_id, columns=serialization.TASK_LOG_COLUMNS, skip=skip, limit=size + 1, after=after
+    )
+    headers = {}
+    if len(logs) > size:
+        headers["X-Next-Cursor"] = pagination.encode_task_log_cursor(logs[size - 1])
+    return Response(serialization.task_logs(logs[:size]), media_type="application/json", headers=headers)
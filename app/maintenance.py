@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.future import select
+
+from app.config import TASK_LOG_COMPACT_AFTER_DAYS, TASK_LOG_PARTITIONS_AHEAD, TASK_LOG_RETENTION_DAYS
+from app.database import AsyncSessionLocal, engine, close_db_connection
+from app.models import LogEntry, TaskEvent, TaskLog
+
+COMPACTION_BATCH_SIZE = 500
+_PARTITION_NAME = re.compile(r"^task_logs_(\d{4})_(\d{2})$")
+
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+def _add_months(month_start: datetime, months: int) -> datetime:
+    year, month = divmod(month_start.month - 1 + months, 12)
+    return datetime(month_start.year + year, month + 1, 1)
+
+def partition_name(month_start: datetime) -> str:
+    return f"task_logs_{month_start:%Y_%m}"
+
+
+async def _partition_names(conn: AsyncConnection) -> List[str]:
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'task_logs'::regclass"
+    ))
+    return list(result.scalars().all())
+
+async def ensure_partitions(conn: AsyncConnection, now: datetime, months_ahead: int = TASK_LOG_PARTITIONS_AHEAD) -> List[str]:
+    """Create monthly task_logs partitions from the current month to `months_ahead` months out.
+
+    Rows that already landed in the default partition for a new month are moved into it,
+    since Postgres refuses to attach a partition whose range overlaps rows in the default.
+    """
+    existing = set(await _partition_names(conn))
+    created = []
+    for offset in range(months_ahead + 1):
+        start = _add_months(_month_start(now), offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        end = _add_months(start, 1)
+        bounds = {"start": start, "end": end}
+        await conn.exec_driver_sql(f"CREATE TABLE {name} (LIKE task_logs INCLUDING DEFAULTS)")
+        await conn.execute(text(
+            f"INSERT INTO {name} SELECT * FROM task_logs_default WHERE created_at >= :start AND created_at < :end"
+        ), bounds)
+        await conn.execute(text("DELETE FROM task_logs_default WHERE created_at >= :start AND created_at < :end"), bounds)
+        await conn.exec_driver_sql(
+            f"ALTER TABLE task_logs ATTACH PARTITION {name} FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        created.append(name)
+    return created
+
+async def drop_expired_partitions(conn: AsyncConnection, now: datetime, retention_days: int = TASK_LOG_RETENTION_DAYS) -> List[str]:
+    """Drop monthly partitions whose whole range is older than the retention period."""
+    cutoff = now - timedelta(days=retention_days)
+    dropped = []
+    for name in sorted(await _partition_names(conn)):
+        match = _PARTITION_NAME.match(name)
+        if not match:
+            continue
+        end = _add_months(datetime(int(match.group(1)), int(match.group(2)), 1), 1)
+        if end <= cutoff:
+            await conn.exec_driver_sql(f"DROP TABLE {name}")
+            dropped.append(name)
+    return dropped
+
+
+async def compact_task_logs(db: AsyncSession, older_than: datetime) -> int:
+    """Replace each task's logs older than `older_than` with a single summary row.
+
+    The summary keeps the newest compacted timestamp, so it sorts where the compacted rows
+    did, and it folds in the counts of earlier summaries. Returns the number of rows removed.
+    """
+    result = await db.execute(
+        select(TaskLog.task_id)
+        .where(TaskLog.created_at < older_than)
+        .group_by(TaskLog.task_id)
+        .having(func.count() > 1)
+    )
+    task_ids = list(result.scalars().all())
+    removed = 0
+    for start in range(0, len(task_ids), COMPACTION_BATCH_SIZE):
+        batch = task_ids[start:start + COMPACTION_BATCH_SIZE]
+        old_logs = TaskLog.task_id.in_(batch), TaskLog.created_at < older_than
+        rows = (await db.execute(
+            select(TaskLog.task_id, TaskLog.event, TaskLog.detail, TaskLog.created_at).where(*old_logs)
+        )).all()
+
+        entries = defaultdict(int)
+        newest = {}
+        for task_id, event, detail, created_at in rows:
+            entries[task_id] += int(detail) if event == TaskEvent.COMPACTED else 1
+            newest[task_id] = max(created_at, newest.get(task_id, created_at))
+
+        await db.execute(delete(TaskLog).where(*old_logs))
+        await db.execute(insert(TaskLog), [
+            {"task_id": task_id, **LogEntry(TaskEvent.COMPACTED, detail=str(count)).values(), "created_at": newest[task_id]}
+            for task_id, count in entries.items()
+        ])
+        await db.commit()
+        removed += len(rows) - len(entries)
+    return removed
+
+
+async def main(command: str, now: Optional[datetime] = None):
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    try:
+        if command in ("partitions", "all"):
+            if engine.dialect.name != "postgresql":
+                print("Maintenance: task_logs partitioning requires Postgres, skipping")
+            else:
+                async with engine.begin() as conn:
+                    created = await ensure_partitions(conn, now)
+                    dropped = await drop_expired_partitions(conn, now)
+                print(f"Maintenance: Created partitions {created or 'none'}, dropped {dropped or 'none'}")
+        if command in ("compact", "all"):
+            async with AsyncSessionLocal() as db:
+                removed = await compact_task_logs(db, now - timedelta(days=TASK_LOG_COMPACT_AFTER_DAYS))
+            print(f"Maintenance: Compacted away {removed} task log row(s)")
+    finally:
+        await close_db_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="task_logs partition management and retention.")
+    parser.add_argument("command", choices=["partitions", "compact", "all"], nargs="?", default="all")
+    args = parser.parse_args()
+    asyncio.run(main(args.command))
@@ -0,0 +1,262 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Prometheus text exposition format, hand-rolled to keep the hot path to a dict lookup and a
+# bisect per observation. Everything runs on the event loop thread, so no locking is needed.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+TASK_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+QUEUE_WAIT_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """A gauge read when the metrics are scraped, so it is never stale and costs nothing in between."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._readers: Dict[Tuple[str, ...], Callable[[], Optional[float]]] = {}
+
+    def track(self, read: Callable[[], Optional[float]], *labels: str):
+        self._readers[labels] = read
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, read in sorted(self._readers.items()):
+            value = read()
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        if not lines:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", *lines]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], list] = {} # labels -> [per-bucket counts (+Inf last), sum]
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+# SQL statements run while handling the current HTTP request; None outside of one.
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route.", LATENCY_BUCKETS, ("method", "route", "status"),
+        )
+        self.request_queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per HTTP request.", QUERY_COUNT_BUCKETS, ("method", "route"),
+        )
+        self.request_query_seconds = Histogram(
+            "http_request_db_seconds", "Time spent in SQL statements per HTTP request.", LATENCY_BUCKETS, ("method", "route"),
+        )
+        self.query_duration = Histogram("db_query_duration_seconds", "SQL statement latency, from any caller.", LATENCY_BUCKETS)
+        self.background_tasks = Counter("background_tasks_total", "Background task runs by outcome.", ("status",))
+        self.background_task_duration = Histogram(
+            "background_task_duration_seconds", "Background task run time by outcome.", TASK_DURATION_BUCKETS, ("status",),
+        )
+        self.queue_wait = Histogram(
+            "task_queue_wait_seconds", "Time tasks waited in the worker queue before being claimed, by priority.",
+            QUEUE_WAIT_BUCKETS, ("priority",),
+        )
+        self.background_tasks_running = 0
+        self.tasks_running = Gauge("background_tasks_running", "Background tasks running in this process.")
+        self.tasks_running.track(lambda: self.background_tasks_running)
+        self.pool_gauges = {
+            attr: Gauge(name, help, ("pool",))
+            for name, help, attr in (
+                ("db_pool_size", "Configured size of the connection pool.", "size"),
+                ("db_pool_checked_out", "Connections currently checked out of the pool.", "checkedout"),
+                ("db_pool_checked_in", "Idle connections in the pool.", "checkedin"),
+                ("db_pool_overflow", "Connections open beyond the pool size.", "overflow"),
+            )
+        }
+
+    # SQLAlchemy hooks
+
+    def instrument_engine(self, engine: AsyncEngine, pool: str = "primary"):
+        """Time every statement the engine runs and expose its pool's gauges, labelled `pool`."""
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        for attr, gauge in self.pool_gauges.items():
+            gauge.track(self._pool_reader(engine, attr), pool)
+
+    @staticmethod
+    def _pool_reader(engine: AsyncEngine, attr: str) -> Callable[[], Optional[float]]:
+        def read():
+            # Looked up on every scrape because dispose() replaces the pool. StaticPool (SQLite) has no counters.
+            method = getattr(engine.sync_engine.pool, attr, None)
+            return method() if method is not None else None
+        return read
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        self.query_duration.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+    # Background tasks
+
+    def task_started(self) -> float:
+        self.background_tasks_running += 1
+        return time.perf_counter()
+
+    def task_finished(self, started: float, status: str):
+        self.background_tasks_running -= 1
+        self.background_tasks.inc(status)
+        self.background_task_duration.observe(time.perf_counter() - started, status)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (
+            self.request_duration, self.request_queries, self.request_query_seconds, self.query_duration,
+            self.background_tasks, self.background_task_duration, self.queue_wait, self.tasks_running,
+            *self.pool_gauges.values(),
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and SQL usage per route template.
+
+    Routes are labelled by their path template (/tasks/{task_id}), so label cardinality stays
+    bounded; unmatched paths share a single label. Timing stops when the last body chunk is
+    sent, so streaming responses are timed to the end of the stream and background tasks
+    are not counted.
+    """
+
+    def __init__(self, app, metrics: "Metrics"):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+        stats = RequestStats()
+        started = time.perf_counter()
+        recorded = False
+
+        def record():
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            self.metrics.request_duration.observe(elapsed, method, route_label, status)
+            self.metrics.request_queries.observe(stats.queries, method, route_label)
+            self.metrics.request_query_seconds.observe(stats.query_seconds, method, route_label)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # BackgroundTasks run after this inside the same call; keep them out of the request's numbers.
+                _request_stats.set(None)
+                record()
+
+        token = _request_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            record()
+
+
+metrics = Metrics()
@@ -1,28 +1,176 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, ForeignKey, Enum as SQLAlchemyEnum
-from sqlalchemy.sql import func
+from sqlalchemy import BigInteger, Boolean, Column, Integer, SmallInteger, String, Text, TIMESTAMP, ForeignKey, Index, Enum as SQLAlchemyEnum
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.sql import false, func, text
 from app.database import Base
+from typing import NamedTuple, Optional, Union
 import enum
 
+# SQLite's CURRENT_TIMESTAMP has second resolution. Bind Python datetimes in the same format
+# there, so keyset comparisons against server-generated timestamps line up.
+Timestamp = TIMESTAMP().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"), "sqlite"
+)
+
 class TaskStatus(str, enum.Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
+    FAILED = "failed" # The handler raised, or an upstream task of its dependency graph failed
+
+class CatchUp(str, enum.Enum):
+    # What a recurring task does about a run its timer fires late, e.g. after downtime
+    RUN_ONCE = "run_once" # Run once, however many occurrences were missed
+    SKIP = "skip" # Skip it if it is more than SCHEDULE_MISFIRE_GRACE_SECONDS late
+
+class TaskEvent(enum.IntEnum):
+    # Stored in task_logs.event; the codes are persisted, so only ever append new ones
+    MESSAGE = 0 # Free text, kept in detail
+    CREATED = 1
+    STATUS_CHANGED = 2
+    UPDATED = 3
+    QUEUED = 4
+    PROCESSING_STARTED = 5
+    GRAPH_STARTED = 6
+    PROCESSING_ERROR = 7 # detail holds the exception text
+    LEASE_EXPIRED = 8
+    INTERRUPTED = 9
+    UPSTREAM_FAILED = 10 # detail holds the failed upstream task id
+    COMPACTED = 11 # detail holds the number of entries compacted
+    SCHEDULED_RUN = 12
+    SCHEDULE_SKIPPED = 13 # detail holds the reason
+
+_EVENT_TEXT = {
+    TaskEvent.UPDATED: "Task details updated.",
+    TaskEvent.QUEUED: "Task queued for worker processing.",
+    TaskEvent.PROCESSING_STARTED: "Task processing initiated in background.",
+    TaskEvent.GRAPH_STARTED: "Task processing started by its dependency graph.",
+    TaskEvent.LEASE_EXPIRED: "Lease expired; task returned to pending after its runner stopped.",
+    TaskEvent.INTERRUPTED: "Processing interrupted by shutdown; task returned to pending.",
+    TaskEvent.SCHEDULED_RUN: "Task run by its schedule.",
+}
+
+def render_log(event: int, from_status: Optional[TaskStatus], to_status: Optional[TaskStatus], detail: Optional[str]) -> str:
+    """The log line shown for a task_logs row, as served by the API."""
+    event = TaskEvent(event)
+    if event == TaskEvent.CREATED:
+        return f"Task created with status {to_status.value}"
+    if event == TaskEvent.STATUS_CHANGED:
+        return f"Status changed from {from_status.value} to {to_status.value}"
+    if event == TaskEvent.PROCESSING_ERROR:
+        return f"Error during background processing: {detail}"
+    if event == TaskEvent.UPSTREAM_FAILED:
+        return f"Upstream task {detail} failed."
+    if event == TaskEvent.COMPACTED:
+        return f"Compacted {detail} log entries"
+    if event == TaskEvent.SCHEDULE_SKIPPED:
+        return f"Scheduled run skipped: {detail}"
+    if event == TaskEvent.MESSAGE:
+        return detail or ""
+    return _EVENT_TEXT[event]
+
+class LogEntry(NamedTuple):
+    """A task log entry in the compact form it is stored in."""
+    event: TaskEvent
+    from_status: Optional[TaskStatus] = None
+    to_status: Optional[TaskStatus] = None
+    duration_ms: Optional[int] = None # For STATUS_CHANGED: time spent in from_status
+    detail: Optional[str] = None
+
+    @classmethod
+    def of(cls, entry: Union["LogEntry", str]) -> "LogEntry":
+        # Plain strings are logged as free-text messages
+        return cls(TaskEvent.MESSAGE, detail=entry) if isinstance(entry, str) else entry
+
+    @classmethod
+    def created(cls, status: TaskStatus) -> "LogEntry":
+        return cls(TaskEvent.CREATED, to_status=status)
+
+    @classmethod
+    def status_changed(cls, from_status: TaskStatus, to_status: TaskStatus, duration_ms: Optional[int] = None) -> "LogEntry":
+        return cls(TaskEvent.STATUS_CHANGED, from_status, to_status, duration_ms)
+
+    def values(self) -> dict:
+        # TaskLog column values; the event as a plain int, as drivers bind it
+        return {**self._asdict(), "event": int(self.event)}
+
+    def render(self) -> str:
+        return render_log(self.event, self.from_status, self.to_status, self.detail)
 
 class Task(Base): # type: ignore
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves the (priority desc, created_at desc, id desc) ordering and keyset pagination of get_tasks
+        Index("ix_tasks_priority_created_at_id", "priority", "created_at", "id"),
+        # Trigram indexes for substring search (plain b-trees on SQLite, where the options are ignored)
+        Index("ix_tasks_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_tasks_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        # Per-priority queue scans of the scheduler; partial, so it only holds tasks waiting for a worker
+        Index(
+            "ix_tasks_queue_priority_queued_at_id", "priority", "queued_at", "id",
+            postgresql_where=text("queued_at IS NOT NULL"), sqlite_where=text("queued_at IS NOT NULL"),
+        ),
+        # Range scans of the timers (app.timers); partial, so it only holds scheduled tasks
+        Index(
+            "ix_tasks_run_at", "run_at",
+            postgresql_where=text("run_at IS NOT NULL"), sqlite_where=text("run_at IS NOT NULL"),
+        ),
+    )
+    # On Postgres the table also has a generated `search_vector` tsvector column (see the
+    # 0002 migration). It is not mapped here so the model stays portable to SQLite.
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     status = Column(SQLAlchemyEnum(TaskStatus), nullable=False, default=TaskStatus.PENDING)
     priority = Column(Integer, nullable=False, default=1) # Higher number means higher priority
-    created_at = Column(TIMESTAMP, server_default=func.now())
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    task_type = Column(String(50), nullable=False, default="default", server_default="default") # Selects the handler in app.handlers
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
+    queued_at = Column(Timestamp, nullable=True, index=True) # Set when the task is waiting for a worker
+    lease_expires_at = Column(Timestamp, nullable=True, index=True) # Renewed while a runner is alive; see app.leases
+    # Run timings, set by every status change: started_at on IN_PROGRESS, finished_at on COMPLETED or FAILED
+    started_at = Column(Timestamp, nullable=True)
+    finished_at = Column(Timestamp, nullable=True)
+    # Set by POST /tasks/{id}/dag/process: dispatch the task once all its upstream tasks are COMPLETED
+    awaiting_upstream = Column(Boolean, nullable=False, default=False, server_default=false())
+    # Set by every status change; the STATUS_CHANGED log entry records the time spent since the previous one
+    status_changed_at = Column(Timestamp, nullable=True, server_default=func.now())
+    # Scheduling: the task runs at run_at, then at every cron or interval_seconds occurrence (see app.schedules)
+    run_at = Column(Timestamp, nullable=True)
+    cron = Column(String(100), nullable=True) # 5-field cron expression, in UTC
+    interval_seconds = Column(Integer, nullable=True)
+    jitter_seconds = Column(Integer, nullable=True) # None means SCHEDULE_JITTER_SECONDS
+    catch_up = Column(SQLAlchemyEnum(CatchUp), nullable=False, default=CatchUp.RUN_ONCE, server_default=CatchUp.RUN_ONCE.name)
+
+class TaskDependency(Base): # type: ignore
+    # Edge of a task dependency graph: `task_id` runs after `depends_on_id` has COMPLETED.
+    __tablename__ = "task_dependencies"
+
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    depends_on_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True, index=True)
 
 class TaskLog(Base): # type: ignore
+    # On Postgres this table is range-partitioned by month on created_at (see the 0003
+    # migration and app.maintenance), with primary key (id, created_at).
     __tablename__ = "task_logs"
+    __table_args__ = (
+        Index("ix_task_logs_task_id_created_at_id", "task_id", "created_at", "id"),
+        # Serves the /stats aggregates as index-only scans on Postgres
+        Index(
+            "ix_task_logs_event_created_at", "event", "created_at",
+            postgresql_include=["from_status", "to_status", "duration_ms"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"))
-    status = Column(String(50), nullable=False) # Can store old status or new status or a message
-    created_at = Column(TIMESTAMP, server_default=func.now())
\ No newline at end of file
+    event = Column(SmallInteger, nullable=False) # A TaskEvent code
+    from_status = Column(SQLAlchemyEnum(TaskStatus), nullable=True)
+    to_status = Column(SQLAlchemyEnum(TaskStatus), nullable=True)
+    duration_ms = Column(BigInteger, nullable=True)
+    detail = Column(Text, nullable=True) # Only for events that carry free text
+    created_at = Column(Timestamp, nullable=False, server_default=func.now())
+
+    @property
+    def status(self) -> str:
+        return render_log(self.event, self.from_status, self.to_status, self.detail)
\ No newline at end of file
@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Tuple
+
+from app.models import Task, TaskLog
+
+# Cursors are opaque to clients: url-safe base64 of a JSON array holding the sort key of
+# the last row on the page. The next page starts strictly after that key.
+
+def _encode(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+def _parse_datetime(value: Any) -> datetime:
+    if not isinstance(value, str):
+        raise ValueError("Invalid cursor")
+    return datetime.fromisoformat(value)
+
+def _parse_int(value: Any) -> int:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def encode_task_cursor(task: Task) -> str:
+    return _encode([task.priority, task.created_at.isoformat(), task.id])
+
+def decode_task_cursor(cursor: str) -> Tuple[int, datetime, int]:
+    """Return the (priority, created_at, id) key encoded by `encode_task_cursor`."""
+    priority, created_at, task_id = _decode(cursor, 3)
+    return _parse_int(priority), _parse_datetime(created_at), _parse_int(task_id)
+
+def encode_task_log_cursor(task_log: TaskLog) -> str:
+    return _encode([task_log.created_at.isoformat(), task_log.id])
+
+def decode_task_log_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Return the (created_at, id) key encoded by `encode_task_log_cursor`."""
+    created_at, log_id = _decode(cursor, 2)
+    return _parse_datetime(created_at), _parse_int(log_id)
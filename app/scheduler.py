@@ -0,0 +1,101 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.config import SCHEDULER_AGING_SECONDS, SCHEDULER_GLOBAL_CONCURRENCY, SCHEDULER_PRIORITY_WEIGHTS
+from app.metrics import metrics
+
+# pg_advisory_xact_lock key serializing claims when a global concurrency cap is set.
+_GLOBAL_CAP_LOCK_KEY = 0x7461736b # "task"
+
+
+class PriorityScheduler:
+    """Decides how many tasks to claim from each priority level.
+
+    Free slots are split between the levels that have queued work using smooth weighted
+    round-robin (as in nginx upstreams). Each level's weight is its configured weight,
+    multiplied by (1 + oldest wait / aging interval). Urgent work gets most of the slots,
+    while a level that has waited long enough eventually outweighs everything else.
+    Round-robin credit carries over between calls, so shares stay fair across small batches.
+    """
+
+    def __init__(
+        self,
+        weights: Dict[int, float] = SCHEDULER_PRIORITY_WEIGHTS,
+        aging_seconds: float = SCHEDULER_AGING_SECONDS,
+        global_concurrency: int = SCHEDULER_GLOBAL_CONCURRENCY,
+    ):
+        self.weights = weights
+        self.aging_seconds = aging_seconds
+        self.global_concurrency = global_concurrency
+        self._credit: Dict[int, float] = {}
+        self._claimed: Dict[int, int] = {}
+        self._total_wait: Dict[int, float] = {}
+        self._max_wait: Dict[int, float] = {}
+
+    def effective_weight(self, priority: int, oldest_wait: float) -> float:
+        weight = self.weights.get(priority, float(priority))
+        return weight * (1 + max(oldest_wait, 0.0) / self.aging_seconds) if self.aging_seconds > 0 else weight
+
+    def plan(self, slots: int, depths: List[Tuple[int, int, datetime]], now: datetime) -> Dict[int, int]:
+        """Return {priority: number of tasks to claim} for `slots` free slots."""
+        remaining = {priority: depth for priority, depth, _ in depths if depth > 0}
+        weights = {
+            priority: self.effective_weight(priority, (now - oldest).total_seconds())
+            for priority, depth, oldest in depths if depth > 0
+        }
+        plan: Dict[int, int] = {}
+        for _ in range(slots):
+            if not remaining:
+                break
+            total = sum(weights[priority] for priority in remaining)
+            for priority in remaining:
+                self._credit[priority] = self._credit.get(priority, 0.0) + weights[priority]
+            chosen = max(remaining, key=lambda priority: (self._credit[priority], priority))
+            self._credit[chosen] -= total
+            plan[chosen] = plan.get(chosen, 0) + 1
+            remaining[chosen] -= 1
+            if remaining[chosen] == 0:
+                del remaining[chosen]
+        return plan
+
+    async def claim(self, db: AsyncSession, slots: int) -> List[int]:
+        """Claim up to `slots` queued tasks, split across priority levels by `plan`."""
+        if self.global_concurrency > 0:
+            if db.get_bind().dialect.name == "postgresql":
+                # Held until the claim commits, so two workers cannot both fill the same headroom.
+                await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _GLOBAL_CAP_LOCK_KEY})
+            slots = min(slots, self.global_concurrency - await crud.count_in_progress(db))
+        if slots <= 0:
+            await db.commit()
+            return []
+
+        depths, now = await crud.get_queue_depths(db)
+        plan = self.plan(slots, depths, now)
+        if not plan:
+            await db.commit()
+            return []
+        claimed = await crud.claim_tasks_by_priority(db, plan)
+        for task in claimed:
+            self._record_wait(task.priority, (now - task.queued_at).total_seconds())
+        return [task.task_id for task in claimed]
+
+    def _record_wait(self, priority: int, wait: float):
+        self._claimed[priority] = self._claimed.get(priority, 0) + 1
+        self._total_wait[priority] = self._total_wait.get(priority, 0.0) + wait
+        self._max_wait[priority] = max(wait, self._max_wait.get(priority, 0.0))
+        metrics.queue_wait.observe(wait, str(priority))
+
+    def stats(self) -> Dict[int, dict]:
+        """Queue wait observed at claim time, per priority, since this scheduler started."""
+        return {
+            priority: {
+                "claimed": self._claimed[priority],
+                "avg_wait_seconds": self._total_wait[priority] / self._claimed[priority],
+                "max_wait_seconds": self._max_wait[priority],
+            }
+            for priority in sorted(self._claimed, reverse=True)
+        }
@@ -0,0 +1,106 @@
+import random
+from datetime import datetime, timedelta
+from typing import FrozenSet, NamedTuple, Optional
+
+from app.config import SCHEDULE_JITTER_SECONDS
+
+# (low, high) per field: minute, hour, day of month, month, day of week (0 or 7 = Sunday)
+_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# How far ahead next_after looks before deciding an expression never fires (e.g. "0 0 30 2 *")
+_SEARCH_YEARS = 5
+
+
+def _parse_field(field: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in field.split(","):
+        span, _, step = part.partition("/")
+        try:
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(bound) for bound in span.split("-", 1))
+            else:
+                start = int(span)
+                end = high if step else start # "5/15" means from 5 to the end, every 15
+            every = int(step) if step else 1
+        except ValueError:
+            raise ValueError(f"Invalid cron field {field!r}") from None
+        if not low <= start <= end <= high or every < 1:
+            raise ValueError(f"Invalid cron field {field!r}: values must be within {low}-{high}")
+        values.update(range(start, end + 1, every))
+    return frozenset(values)
+
+
+class CronSchedule(NamedTuple):
+    """A standard 5-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields take numbers, `*`, ranges (`1-5`), steps (`*/15`, `0-30/10`) and lists. As in
+    cron, when both day fields are restricted a day matching either one fires.
+    """
+    minutes: FrozenSet[int]
+    hours: FrozenSet[int]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int] # 0 = Sunday
+    any_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> "CronSchedule":
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("A cron expression has 5 fields: minute hour day-of-month month day-of-week")
+        minutes, hours, days, months, weekdays = (_parse_field(field, low, high) for field, (low, high) in zip(fields, _FIELDS))
+        return cls(
+            minutes, hours, days, months, frozenset(day % 7 for day in weekdays),
+            fields[2].startswith("*"), fields[4].startswith("*"),
+        )
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, after: datetime) -> datetime:
+        """The first time strictly after `after` that matches. Raises ValueError if there is none."""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        while moment.year <= after.year + _SEARCH_YEARS:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12) # The 1st of the next month
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                later = [minute for minute in self.minutes if minute > moment.minute]
+                moment = moment.replace(minute=min(later)) if later else moment.replace(minute=0) + timedelta(hours=1)
+            else:
+                return moment
+        raise ValueError("The cron expression never fires")
+
+
+def next_run_at(
+    cron: Optional[str], interval_seconds: Optional[int], jitter_seconds: Optional[int],
+    previous: Optional[datetime], now: datetime,
+) -> Optional[datetime]:
+    """The next run_at of a recurring task after `now`, or None if the task does not recur.
+
+    `previous` is the run_at that just fired, or None for a new schedule. Cron runs get a
+    fresh random delay of up to `jitter_seconds` each time. Interval runs keep the phase
+    of their first run, which is jittered once, so a batch of tasks created together still
+    spreads out and nothing drifts. Times are naive UTC, in whole seconds.
+    """
+    jitter = SCHEDULE_JITTER_SECONDS if jitter_seconds is None else jitter_seconds
+    if cron:
+        start = max(now, previous) if previous is not None else now
+        return CronSchedule.parse(cron).next_after(start) + timedelta(seconds=random.randint(0, jitter))
+    if interval_seconds:
+        interval = timedelta(seconds=interval_seconds)
+        if previous is None:
+            return now.replace(microsecond=0) + interval + timedelta(seconds=random.randint(0, min(jitter, interval_seconds)))
+        # Skip the occurrences already missed, keeping the phase
+        return previous + max((now - previous) // interval + 1, 1) * interval
+    return None
@@ -1,21 +1,134 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from typing import Optional, List
-from datetime import datetime
-from app.models import TaskStatus
+from datetime import datetime, timezone
+from app.config import BULK_UPDATE_MAX_TASKS
+from app.models import CatchUp, TaskStatus
+from app.schedules import CronSchedule
+import enum
+
+class CountMode(str, enum.Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class StatsBucket(str, enum.Enum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
 
 class TaskBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=255)
     description: Optional[str] = None
     priority: int = Field(1, ge=1, le=5) # Can be 1 to 5
+    task_type: str = Field("default", min_length=1, max_length=50)
+    # Scheduling: run at run_at (UTC), then at every cron or interval_seconds occurrence.
+    # A recurring task without run_at first runs at its next occurrence.
+    run_at: Optional[datetime] = None
+    cron: Optional[str] = Field(None, max_length=100) # 5-field cron expression, in UTC
+    interval_seconds: Optional[int] = Field(None, ge=1)
+    jitter_seconds: Optional[int] = Field(None, ge=0) # Random delay added to recurring runs; None means the default
+    catch_up: CatchUp = CatchUp.RUN_ONCE
 
-class TaskCreate(TaskBase):
+class ScheduleValidation(BaseModel):
+    @model_validator(mode="after")
+    def _check_schedule(self):
+        if self.cron is not None and self.interval_seconds is not None:
+            raise ValueError("Provide at most one of 'cron' and 'interval_seconds'")
+        if self.cron is not None:
+            CronSchedule.parse(self.cron).next_after(datetime.now(timezone.utc).replace(tzinfo=None))
+        if self.run_at is not None:
+            # Stored as naive UTC in whole seconds, which is what the timers compare against
+            if self.run_at.tzinfo is not None:
+                self.run_at = self.run_at.astimezone(timezone.utc).replace(tzinfo=None)
+            self.run_at = self.run_at.replace(microsecond=0)
+        return self
+
+class TaskCreate(ScheduleValidation, TaskBase):
     status: Optional[TaskStatus] = None
 
-class TaskUpdate(BaseModel):
+class BulkTaskCreateResult(BaseModel):
+    created: int
+    ids: List[int]
+
+class TaskUpdate(ScheduleValidation):
     title: Optional[str] = Field(None, min_length=1, max_length=255)
     description: Optional[str] = None
     status: Optional[TaskStatus] = None
     priority: Optional[int] = Field(None, ge=1, le=5)
+    task_type: Optional[str] = Field(None, min_length=1, max_length=50)
+    # Setting cron or interval_seconds replaces the recurrence, and reschedules the task unless run_at is given
+    run_at: Optional[datetime] = None
+    cron: Optional[str] = Field(None, max_length=100)
+    interval_seconds: Optional[int] = Field(None, ge=1)
+    jitter_seconds: Optional[int] = Field(None, ge=0)
+    catch_up: Optional[CatchUp] = None
+
+class TaskFilter(BaseModel):
+    # Same filters as GET /tasks
+    title: Optional[str] = Field(None, min_length=1, max_length=50)
+    status: Optional[TaskStatus] = None
+
+class TaskSelection(BaseModel):
+    """Tasks a bulk operation applies to: either explicit ids or a filter."""
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=BULK_UPDATE_MAX_TASKS)
+    filter: Optional[TaskFilter] = None
+
+    @model_validator(mode="after")
+    def _ids_or_filter(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of 'ids' or 'filter'")
+        return self
+
+class BulkStatusUpdate(TaskSelection):
+    status: TaskStatus
+
+class BulkSkipReason(str, enum.Enum):
+    MISSING = "missing"
+    COMPLETED = "completed" # COMPLETED tasks are left alone by bulk operations
+    UNCHANGED = "unchanged" # Already in the requested status
+    NOT_PENDING = "not_pending" # Only PENDING tasks can be processed
+    QUEUED = "queued" # Already waiting for a worker
+
+class SkippedTask(BaseModel):
+    id: int
+    reason: BulkSkipReason
+    status: Optional[TaskStatus] = None # None when the task is missing
+
+class BulkTaskResult(BaseModel):
+    changed: int
+    ids: List[int]
+    skipped: List[SkippedTask]
+
+class TaskDependencyCreate(BaseModel):
+    depends_on: List[int] = Field(..., min_length=1, max_length=BULK_UPDATE_MAX_TASKS)
+
+class TaskDependencies(BaseModel):
+    task_id: int
+    depends_on: List[int]
+
+class DagRunResult(BaseModel):
+    dispatched: List[int] # Ready straight away: queued or started
+    waiting: List[int] # Armed; each starts once its upstream tasks have COMPLETED
+
+class DagNode(BaseModel):
+    id: int
+    title: str
+    status: TaskStatus
+    depends_on: List[int]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    duration_seconds: Optional[float] # finished_at - started_at
+    wait_seconds: Optional[float] # From the last upstream task finishing to this one starting
+
+class TaskDag(BaseModel):
+    task_id: int
+    nodes: List[DagNode] # Upstream before downstream
+    critical_path: List[int] # The chain of tasks with the longest total duration
+    critical_path_seconds: float
 
 class TaskInDBBase(TaskBase):
     id: int
@@ -29,6 +142,9 @@ class TaskInDBBase(TaskBase):
 class Task(TaskInDBBase):
     pass
 
+class TaskSearchResult(Task):
+    rank: float
+
 class TaskLogBase(BaseModel):
     task_id: int
     status: str
@@ -44,7 +160,48 @@ class TaskLog(TaskLogBase):
 
 class PaginatedTasks(BaseModel):
     items: List[Task]
-    total: int
-    page: int
+    total: Optional[int] # None when count=none
+    total_exact: bool = True # False when total is a planner estimate or was skipped
+    page: Optional[int] # None when paging by cursor
     size: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
+
+class CacheStats(BaseModel):
+    backend: str
+    hits: int
+    misses: int
+    hit_ratio: float
+
+class QueueLevel(BaseModel):
+    priority: int
+    depth: int
+    oldest_wait_seconds: float
+
+class QueueStats(BaseModel):
+    levels: List[QueueLevel] # Highest priority first; only levels with queued tasks
+    queued: int
+    in_progress: int
+
+class StatusTime(BaseModel):
+    status: TaskStatus
+    transitions: int # How many times a task left this status in the window
+    avg_seconds: float # Time spent in the status before leaving it
+    max_seconds: float
+    total_seconds: float
+
+class TimeInStatus(BaseModel):
+    since: datetime
+    until: datetime
+    statuses: List[StatusTime]
+
+class ThroughputPoint(BaseModel):
+    start: datetime
+    completed: int
+    failed: int
+
+class Throughput(BaseModel):
+    since: datetime
+    until: datetime
+    bucket: StatsBucket
+    points: List[ThroughputPoint] # Oldest first; only buckets in which tasks finished
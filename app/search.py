@@ -0,0 +1,62 @@
+from typing import List, Tuple
+
+from sqlalchemy import func, literal_column, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models import Task
+
+# Must match the configuration used for tasks.search_vector in the 0002 migration.
+TEXT_SEARCH_CONFIG = "english"
+
+
+def _contains(term: str) -> str:
+    # An ILIKE pattern matching `term` literally: % and _ typed by the user are not wildcards.
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def search_tasks(db: AsyncSession, q: str, limit: int = 10) -> List[Tuple[Task, float]]:
+    """Return up to `limit` (task, rank) pairs matching `q` in title or description, best first."""
+    if db.get_bind().dialect.name == "postgresql":
+        return await _search_postgres(db, q, limit)
+    return await _search_fallback(db, q, limit)
+
+
+async def _search_postgres(db: AsyncSession, q: str, limit: int) -> List[Tuple[Task, float]]:
+    # Full-text matches via the GIN-indexed tsvector, plus trigram-indexed substring matches
+    # on the title so partial words still hit. Postgres combines both with a BitmapOr.
+    search_vector = literal_column("tasks.search_vector")
+    tsquery = func.websearch_to_tsquery(literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig"), q)
+    rank = func.ts_rank_cd(search_vector, tsquery) + func.similarity(Task.title, q)
+    result = await db.execute(
+        select(Task, rank.label("rank"))
+        .where(or_(search_vector.op("@@")(tsquery), Task.title.ilike(_contains(q), escape="\\")))
+        .order_by(rank.desc(), Task.id.desc())
+        .limit(limit)
+    )
+    return [(task, float(task_rank)) for task, task_rank in result.all()]
+
+
+async def _search_fallback(db: AsyncSession, q: str, limit: int) -> List[Tuple[Task, float]]:
+    # Without text search support every term must appear as a substring of the title or the
+    # description. Matches are ranked in memory, weighting title hits like setweight 'A'.
+    terms = [term.lower() for term in q.split()]
+    if not terms:
+        return []
+    result = await db.execute(
+        select(Task).where(
+            and_(*[
+                or_(Task.title.ilike(_contains(term), escape="\\"), Task.description.ilike(_contains(term), escape="\\"))
+                for term in terms
+            ])
+        )
+    )
+    ranked = []
+    for task in result.scalars().all():
+        title = task.title.lower()
+        description = (task.description or "").lower()
+        rank = sum(1.0 * title.count(term) + 0.4 * description.count(term) for term in terms)
+        ranked.append((task, rank))
+    ranked.sort(key=lambda item: (item[1], item[0].id), reverse=True)
+    return ranked[:limit]
@@ -0,0 +1,68 @@
+import enum
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from app import schemas
+from app.models import Task, TaskLog, render_log
+
+try:
+    import orjson
+except ImportError: # Optional speed-up; the stdlib encoder produces the same bytes
+    orjson = None
+
+# Fast path for the hottest list endpoints: select only the columns the response schema has
+# and encode the rows straight to JSON, skipping ORM objects and Pydantic validation.
+# Field names and order come from the schemas, so the bytes match what FastAPI would send.
+TASK_FIELDS = tuple(schemas.Task.model_fields)
+TASK_COLUMNS = tuple(getattr(Task, name) for name in TASK_FIELDS)
+TASK_LOG_FIELDS = tuple(schemas.TaskLog.model_fields)
+# task_logs stores entries in compact form; the `status` text is rendered from these columns.
+TASK_LOG_COLUMNS = (
+    TaskLog.id, TaskLog.task_id, TaskLog.event, TaskLog.from_status, TaskLog.to_status, TaskLog.detail, TaskLog.created_at
+)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON, as FastAPI renders response models: no whitespace and no ASCII escaping."""
+    if orjson is not None:
+        # Naive timestamps come out as isoformat() does; OPT_UTC_Z matches Pydantic for aware UTC ones.
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def task_page(
+    rows: Sequence[Sequence[Any]], total: Optional[int], total_exact: bool, page: Optional[int], size: int,
+    pages: Optional[int], next_cursor: Optional[str],
+) -> bytes:
+    """JSON body of schemas.PaginatedTasks for rows selected with TASK_COLUMNS."""
+    return dumps({
+        "items": [dict(zip(TASK_FIELDS, row)) for row in rows],
+        "total": total,
+        "total_exact": total_exact,
+        "page": page,
+        "size": size,
+        "pages": pages,
+        "next_cursor": next_cursor,
+    })
+
+
+def task_logs(rows: Sequence[Sequence[Any]]) -> bytes:
+    """JSON body of List[schemas.TaskLog] for rows selected with TASK_LOG_COLUMNS."""
+    return dumps([_task_log(row) for row in rows])
+
+
+def _task_log(row: Any) -> dict:
+    values = {
+        "id": row.id, "task_id": row.task_id, "created_at": row.created_at,
+        "status": render_log(row.event, row.from_status, row.to_status, row.detail),
+    }
+    return {name: values[name] for name in TASK_LOG_FIELDS}
@@ -0,0 +1,157 @@
+import asyncio
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud
+from app.background_tasks import process_task_in_background
+from app.config import TASK_DISPATCH_MODE, TIMER_BATCH_SIZE, TIMER_CONCURRENCY, TIMER_HORIZON_SECONDS
+from app.database import AsyncSessionLocal
+from app.events import event_broker
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TaskTimer:
+    """Fires scheduled tasks (run_at, cron, interval_seconds) when they come due.
+
+    Every API and worker process runs one. It holds the runs due within `horizon` seconds
+    in a heap, loaded with one range scan of the run_at index, and sleeps until the
+    earliest is due. It reloads halfway through the horizon, and hears about new and
+    changed schedules through "scheduled" events, so an idle timer does not poll the
+    tasks table. Should any be missed, say while the event listener reconnects, it
+    reloads at once. All timers hold the same runs, but `crud.fire_scheduled_tasks` claims
+    each run with a compare-and-set on run_at, so exactly one process starts it.
+
+    Runs started in this process are capped at `concurrency`. Only as many due runs as
+    there are free slots are claimed; the rest stay on the heap until a run finishes, so
+    a claimed task never sits IN_PROGRESS without its lease being renewed. With
+    queue=True runs are queued for the workers instead, and the cap does not apply.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        horizon: float = TIMER_HORIZON_SECONDS,
+        batch_size: int = TIMER_BATCH_SIZE,
+        concurrency: int = TIMER_CONCURRENCY,
+        queue: bool = TASK_DISPATCH_MODE == "worker",
+    ):
+        self.session_factory = session_factory
+        self.horizon = timedelta(seconds=horizon)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.queue = queue
+        self._heap: List[Tuple[datetime, int]] = []
+        # The run_at held per task. Heap entries that no longer match it are stale and skipped.
+        self._due: Dict[int, datetime] = {}
+        self._loaded_until: Optional[datetime] = None
+        self._reload = False
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._running: Set[asyncio.Task] = set()
+
+    def schedule(self, task_id: int, run_at: Optional[datetime]):
+        """Note a task's new run_at; None unschedules it."""
+        if run_at is None or self._loaded_until is None or run_at > self._loaded_until:
+            self._due.pop(task_id, None) # Beyond the horizon: the next load picks it up
+            return
+        if self._due.get(task_id) != run_at:
+            self._due[task_id] = run_at
+            heapq.heappush(self._heap, (run_at, task_id))
+            self._wakeup.set()
+
+    async def load(self, now: datetime):
+        """Replace the heap with the runs due by now + horizon."""
+        async with self.session_factory() as db:
+            rows = await crud.get_scheduled_tasks(db, until=now + self.horizon, limit=self.batch_size)
+        self._due = dict(rows)
+        self._heap = [(run_at, task_id) for task_id, run_at in rows]
+        heapq.heapify(self._heap)
+        # A full batch may have left out runs due before the horizon: load again once the last one is reached.
+        self._loaded_until = rows[-1][1] if len(rows) == self.batch_size else now + self.horizon
+
+    def _free_slots(self) -> int:
+        return self.batch_size if self.queue else min(self.batch_size, self.concurrency - len(self._running))
+
+    async def fire_due(self, now: datetime) -> int:
+        """Claim and start the runs due by `now`, up to the free slots. Returns how many were taken off the heap."""
+        due: Dict[int, datetime] = {}
+        limit = self._free_slots()
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            run_at, task_id = heapq.heappop(self._heap)
+            if self._due.get(task_id) == run_at:
+                due[task_id] = self._due.pop(task_id)
+        if not due:
+            return 0
+        async with self.session_factory() as db:
+            started = await crud.fire_scheduled_tasks(db, due, queue=self.queue, now=now)
+        for task_id in started:
+            print(f"Timer: Starting scheduled task {task_id}")
+            running = asyncio.create_task(process_task_in_background(task_id, self.session_factory))
+            self._running.add(running)
+            running.add_done_callback(self._finished)
+        return len(due)
+
+    def _finished(self, running: asyncio.Task):
+        self._running.discard(running)
+        self._wakeup.set() # A slot is free for runs held back
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._run())]
+
+    async def stop(self):
+        """Stop firing. Runs already started are left to the shutdown drain (see app.leases)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _listen(self):
+        # An unbounded queue of its own: a dropped "scheduled" event would be a run that never fires.
+        async with event_broker.subscribe(types={"scheduled", "deleted"}, queue_size=0) as events:
+            while True:
+                event = await events.get()
+                if event["type"] == "scheduled":
+                    self.schedule(event["task_id"], datetime.fromisoformat(event["run_at"]) if event["run_at"] else None)
+                elif event["type"] == "deleted":
+                    self.schedule(event["task_id"], None)
+                elif event["type"] == "resync": # Events were missed: reload from the database
+                    self._reload = True
+                    self._wakeup.set()
+
+    async def _run(self):
+        reload_at: Optional[datetime] = None
+        while True:
+            self._wakeup.clear()
+            now = _utcnow()
+            try:
+                if reload_at is None or now >= reload_at or self._reload:
+                    self._reload = False
+                    await self.load(now)
+                    reload_at = min(now + self.horizon / 2, self._loaded_until)
+                if await self.fire_due(now) == self.batch_size:
+                    continue # More may be due already
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Timer: Error loading or firing scheduled tasks: {e}")
+                reload_at = None # Start over from the database
+                await asyncio.sleep(1)
+                continue
+
+            wake_at = reload_at
+            if self._heap and self._free_slots() > 0: # Otherwise a finishing run wakes the timer
+                wake_at = min(wake_at, self._heap[0][0])
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max((wake_at - _utcnow()).total_seconds(), 0))
+            except asyncio.TimeoutError:
+                pass
+
+
+task_timer = TaskTimer()
@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import signal
+from typing import Optional, Set
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.background_tasks import dependency_dispatcher, process_task_in_background
+from app.config import SHUTDOWN_DRAIN_SECONDS, TIMER_ENABLED, WORKER_CONCURRENCY, WORKER_METRICS_PORT, WORKER_POLL_INTERVAL
+from app.database import AsyncSessionLocal, engine, init_db_connection, close_db_connection
+from app.events import event_broker
+from app.handlers import load_handler_modules, registry
+from app.leases import lease_manager
+from app.timers import task_timer
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
+from app.scheduler import PriorityScheduler
+
+
+class Worker:
+    """Claims queued tasks from the database and processes up to `concurrency` of them at once.
+
+    Any number of workers can run against the same database, on one node or many; claiming
+    goes through `crud.claim_tasks_by_priority`, so each task is handed to exactly one of them.
+    The scheduler decides how the free slots are shared between priority levels.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = WORKER_CONCURRENCY,
+        poll_interval: float = WORKER_POLL_INTERVAL,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        scheduler: Optional[PriorityScheduler] = None,
+        drain_timeout: float = SHUTDOWN_DRAIN_SECONDS,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self.scheduler = scheduler or PriorityScheduler()
+        self.drain_timeout = drain_timeout
+        self._running: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def claim(self) -> int:
+        """Claim as many tasks as there are free slots and start processing them."""
+        free_slots = self.concurrency - len(self._running)
+        if free_slots <= 0:
+            return 0
+        async with self.session_factory() as db:
+            task_ids = await self.scheduler.claim(db, free_slots)
+        for task_id in task_ids:
+            print(f"Worker: Claimed task {task_id}")
+            running = asyncio.create_task(process_task_in_background(task_id, self.session_factory))
+            self._running.add(running)
+            running.add_done_callback(self._running.discard)
+        return len(task_ids)
+
+    async def run(self):
+        print(f"Worker: Started with concurrency {self.concurrency}")
+        while not self._stopping.is_set():
+            try:
+                claimed = await self.claim()
+            except Exception as e:
+                print(f"Worker: Error claiming tasks: {e}")
+                claimed = 0
+
+            # Poll again straight away while there is both work and capacity.
+            if claimed and len(self._running) < self.concurrency:
+                continue
+            await self._wait()
+
+        if self._running:
+            print(f"Worker: Waiting up to {self.drain_timeout:.0f}s for {len(self._running)} running task(s) to finish")
+            _, pending = await asyncio.wait(self._running, timeout=self.drain_timeout)
+            for running in pending:
+                running.cancel() # The task is returned to the queue; see process_task_in_background
+            await asyncio.gather(*pending, return_exceptions=True)
+        for priority, stats in self.scheduler.stats().items():
+            print(
+                f"Worker: Priority {priority}: claimed {stats['claimed']}, "
+                f"avg wait {stats['avg_wait_seconds']:.1f}s, max wait {stats['max_wait_seconds']:.1f}s"
+            )
+        print("Worker: Stopped")
+
+    async def _wait(self):
+        """Sleep until the poll interval elapses, a running task finishes or the worker is stopped."""
+        waiters = {asyncio.ensure_future(self._stopping.wait()), *self._running}
+        _, pending = await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in pending:
+            if waiter not in self._running:
+                waiter.cancel()
+
+
+async def serve_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Answer any HTTP request with this process's metrics, which is all a Prometheus scrape needs."""
+    try:
+        while await reader.readline() not in (b"\r\n", b"\n", b""): # Skip the request line and headers
+            pass
+        body = metrics.render().encode()
+        head = f"HTTP/1.1 200 OK\r\nContent-Type: {METRICS_CONTENT_TYPE}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        writer.write(head.encode() + body)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def main(concurrency: int, poll_interval: float):
+    await init_db_connection()
+    load_handler_modules()
+    worker = Worker(concurrency=concurrency, poll_interval=poll_interval)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await event_broker.start() # So API processes hear about the status changes made here
+    lease_manager.requeue = True # Orphaned tasks go back to the worker queue
+    dependency_dispatcher.queue = True # So do graph tasks released by tasks run here
+    task_timer.queue = True # Scheduled runs are queued for the workers to claim
+    lease_manager.start()
+    if TIMER_ENABLED:
+        task_timer.start()
+    metrics_server = None
+    if WORKER_METRICS_PORT:
+        metrics.instrument_engine(engine)
+        metrics_server = await asyncio.start_server(serve_metrics, port=WORKER_METRICS_PORT)
+    try:
+        await worker.run()
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        await task_timer.stop()
+        await lease_manager.stop()
+        registry.shutdown()
+        await event_broker.stop()
+        await close_db_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process queued tasks outside the API process.")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="Tasks processed at once by this worker")
+    parser.add_argument("--poll-interval", type=float, default=WORKER_POLL_INTERVAL, help="Seconds to wait between polls when idle")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.poll_interval))
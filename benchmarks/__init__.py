@@ -0,0 +1 @@
+"""Load benchmarks for the API and CRUD layer; run with `python -m benchmarks --help`."""
@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from benchmarks.harness import SCENARIOS
+
+# The app reads its settings at import time, so they are set before it is imported in run().
+# /process would otherwise run the 10 second default handler inside each request, because
+# the ASGI transport waits for background tasks before returning the response.
+DEFAULT_DISPATCH_MODE = "worker"
+
+
+async def run(args) -> dict:
+    from httpx import ASGITransport, AsyncClient
+    from app.database import Base, engine, close_db_connection
+    from app.main import app
+    from benchmarks.harness import run_suite
+
+    # Run the app's lifespan, so the event broker, lease manager and timer are measured too.
+    # The ASGI transport does not run it. The app prints to stdout, which the report may go to.
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            if engine.dialect.name == "sqlite":
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+            async with app.router.lifespan_context(app):
+                async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client:
+                    results = await run_suite(
+                        client, engine, args.scenario or list(SCENARIOS), args.requests, args.concurrency, args.seed,
+                        page_size=args.page_size, warmup=args.warmup,
+                    )
+    finally:
+        await close_db_connection()
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "app_version": app.version,
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "dispatch_mode": os.environ["TASK_DISPATCH_MODE"],
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the API in-process and report latency, throughput and queries per request as JSON.",
+    )
+    parser.add_argument(
+        "--database-url",
+        help="Database to benchmark against. Postgres must already be migrated (alembic upgrade head). "
+             "Defaults to a throwaway SQLite file.",
+    )
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Scenario to run; repeat for several (default: all)")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients")
+    parser.add_argument("--seed", type=int, default=2000, help="Tasks created before the scenarios run")
+    parser.add_argument("--page-size", type=int, default=20, help="Page size of the list scenarios")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests before each scenario")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'benchmark.db')}"
+        os.environ.setdefault("TASK_DISPATCH_MODE", DEFAULT_DISPATCH_MODE)
+        report = asyncio.run(run(args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import asyncio
+import math
+import sys
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+from httpx import AsyncClient, Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+SEED_BATCH_SIZE = 500
+
+
+class QueryCounter:
+    """Counts the SQL statements an engine sends to the database."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine.sync_engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+class BenchmarkContext:
+    """Data the scenarios share: the seeded tasks, and a supply of fresh tasks for /process."""
+
+    def __init__(self, task_ids: List[int], page_size: int):
+        self.task_ids = task_ids
+        self.page_size = page_size
+        self.pages = max(math.ceil(len(task_ids) / page_size), 1)
+        self.unprocessed: List[int] = []
+
+    def task_id(self, i: int) -> int:
+        return self.task_ids[i % len(self.task_ids)]
+
+
+Scenario = Callable[[AsyncClient, BenchmarkContext, int], Awaitable[Response]]
+
+
+async def _create_task(client: AsyncClient, ctx: BenchmarkContext, i: int) -> Response:
+    return await client.post("/tasks", json={"title": f"Bench create {i}", "description": "benchmark", "priority": i % 5 + 1})
+
+async def _list_tasks_shallow(client: AsyncClient, ctx: BenchmarkContext, i: int) -> Response:
+    return await client.get("/tasks", params={"page": 1, "size": ctx.page_size})
+
+async def _list_tasks_deep(client: AsyncClient, ctx: BenchmarkContext, i: int) -> Response:
+    return await client.get("/tasks", params={"page": ctx.pages, "size": ctx.page_size})
+
+async def _list_tasks_filtered(client: AsyncClient, ctx: BenchmarkContext, i: int) -> Response:
+    return await client.get("/tasks", params={"title": f"Bench seed {i % 10}", "status": "pending", "size": ctx.page_size})
+
+async def _update_task(client: AsyncClient, ctx: BenchmarkContext, i: int) -> Response:
+    return await client.put(f"/tasks/{ctx.task_id(i)}", json={"description": f"updated {i}"})
+
+async def _process_task(client: AsyncClient, ctx: BenchmarkContext, i: int) -> Response:
+    return await client.post(f"/tasks/{ctx.unprocessed.pop()}/process")
+
+async def _task_logs(client: AsyncClient, ctx: BenchmarkContext, i: int) -> Response:
+    return await client.get(f"/tasks/{ctx.task_id(i)}/logs", params={"size": ctx.page_size})
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "create_task": _create_task,
+    "list_tasks_shallow": _list_tasks_shallow,
+    "list_tasks_deep": _list_tasks_deep,
+    "list_tasks_filtered": _list_tasks_filtered,
+    "update_task": _update_task,
+    "process_task": _process_task,
+    "task_logs": _task_logs,
+}
+
+
+async def seed_tasks(client: AsyncClient, count: int) -> List[int]:
+    """Create `count` tasks through POST /tasks/bulk and return their ids."""
+    task_ids: List[int] = []
+    for start in range(0, count, SEED_BATCH_SIZE):
+        tasks = [
+            {"title": f"Bench seed {i % 10} #{i}", "description": "seeded", "priority": i % 5 + 1}
+            for i in range(start, min(start + SEED_BATCH_SIZE, count))
+        ]
+        response = await client.post("/tasks/bulk", json=tasks)
+        response.raise_for_status()
+        task_ids.extend(response.json()["ids"])
+    return task_ids
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(
+    client: AsyncClient,
+    engine: AsyncEngine,
+    scenario: Scenario,
+    ctx: BenchmarkContext,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """Send `requests` requests from `concurrency` concurrent clients and summarize them."""
+    latencies: List[float] = []
+    errors = 0
+    next_request = iter(range(requests))
+
+    async def client_loop():
+        nonlocal errors
+        for i in next_request:
+            start = time.perf_counter()
+            response = await scenario(client, ctx, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    with QueryCounter(engine) as queries:
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 4),
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "queries_per_request": round(queries.count / len(latencies), 2) if latencies else 0.0,
+        # Whole-process CPU (client, app and driver threads alike), so compare it between versions, not absolutely.
+        "cpu_ms_per_request": round(cpu * 1000 / len(latencies), 3) if latencies else 0.0,
+    }
+
+
+async def run_suite(
+    client: AsyncClient,
+    engine: AsyncEngine,
+    scenarios: Iterable[str],
+    requests: int,
+    concurrency: int,
+    seed: int,
+    page_size: int = 20,
+    warmup: int = 10,
+) -> Dict[str, dict]:
+    """Seed the database, then run each named scenario in turn, after `warmup` unmeasured requests."""
+    scenarios = list(scenarios)
+    # Each /process request needs a task that is still PENDING.
+    unprocessed = await seed_tasks(client, requests + warmup) if "process_task" in scenarios else []
+    ctx = BenchmarkContext(await seed_tasks(client, seed), page_size)
+    ctx.unprocessed = unprocessed
+    results: Dict[str, dict] = {}
+    for name in scenarios:
+        scenario = SCENARIOS[name]
+        if warmup:
+            await run_scenario(client, engine, scenario, ctx, warmup, min(concurrency, warmup))
+        results[name] = await run_scenario(client, engine, scenario, ctx, requests, concurrency)
+        print(f"Benchmark: {name}: {results[name]['requests_per_second']} req/s, p95 {results[name]['latency_ms']['p95']} ms", file=sys.stderr)
+    return results
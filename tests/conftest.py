@@ -5,8 +5,9 @@ from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db
 from app.main import app
+from app.metrics import metrics
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -23,6 +24,8 @@ async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
+metrics.instrument_engine(engine) # The app instruments its own engine, which the tests swap out
 
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def setup_test_database():
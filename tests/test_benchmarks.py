@@ -0,0 +1,30 @@
+import pytest
+from httpx import AsyncClient
+
+from benchmarks.harness import SCENARIOS, percentile, run_suite
+from app import crud
+from tests.conftest import TestingSessionLocal, engine
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_run_suite_reports_every_scenario(client: AsyncClient, mocker):
+    mocker.patch("app.main.TASK_DISPATCH_MODE", "worker")
+    # The in-memory test database is a single shared connection, so stay sequential here.
+    results = await run_suite(client, engine, SCENARIOS, requests=6, concurrency=1, seed=30, page_size=5, warmup=2)
+
+    assert list(results) == list(SCENARIOS)
+    for name, result in results.items():
+        assert result["requests"] == 6, name
+        assert result["errors"] == 0, name
+        assert 0 < result["latency_ms"]["p50"] <= result["latency_ms"]["p95"] <= result["latency_ms"]["p99"]
+        assert result["queries_per_request"] >= 1, name
+
+    async with TestingSessionLocal() as db: # Don't leave the process_task tasks queued for other tests
+        while await crud.claim_tasks(db, limit=100):
+            pass
+
+
+@pytest.mark.parametrize("pct, expected", [(50, 5), (95, 10), (99, 10), (10, 1)])
+async def test_percentile_is_nearest_rank(pct, expected):
+    assert percentile([float(v) for v in range(1, 11)], pct) == expected
@@ -0,0 +1,68 @@
+import pytest
+from httpx import AsyncClient
+
+from app.cache import MemoryCache, RedisCache, TaskCache, task_cache
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRedis:
+    """Local stand-in for a redis.asyncio client."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+async def test_memory_cache_lru_and_ttl():
+    cache = MemoryCache(max_entries=2)
+    await cache.set("a", "1", ttl=60)
+    await cache.set("b", "2", ttl=60)
+    assert await cache.get("a") == "1" # Touch "a" so "b" is least recently used
+    await cache.set("c", "3", ttl=60)
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+
+    await cache.set("d", "4", ttl=-1)
+    assert await cache.get("d") is None
+
+
+async def test_read_task_is_cached_and_invalidated(client: AsyncClient):
+    task_id = (await client.post("/tasks", json={"title": "Cache Me"})).json()["id"]
+    before = task_cache.stats()
+
+    assert (await client.get(f"/tasks/{task_id}")).json()["title"] == "Cache Me"
+    assert (await client.get(f"/tasks/{task_id}")).json()["title"] == "Cache Me"
+    stats = (await client.get("/cache/stats")).json()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+    await client.put(f"/tasks/{task_id}", json={"title": "Cache Me Again"})
+    assert (await client.get(f"/tasks/{task_id}")).json()["title"] == "Cache Me Again"
+
+    await client.delete(f"/tasks/{task_id}")
+    assert (await client.get(f"/tasks/{task_id}")).status_code == 404
+
+
+async def test_shared_backend_stand_in(client: AsyncClient, mocker):
+    fake_redis = FakeRedis()
+    shared_cache = TaskCache(RedisCache(fake_redis), ttl=60)
+    mocker.patch("app.main.task_cache", shared_cache)
+    mocker.patch("app.crud.task_cache", shared_cache)
+
+    task_id = (await client.post("/tasks", json={"title": "Shared Cache"})).json()["id"]
+    await client.get(f"/tasks/{task_id}")
+    assert f"task:{task_id}" in fake_redis.data
+
+    await client.put(f"/tasks/{task_id}", json={"priority": 3})
+    assert f"task:{task_id}" not in fake_redis.data
+    assert (await client.get(f"/tasks/{task_id}")).json()["priority"] == 3
+    assert shared_cache.stats()["backend"] == "redis"
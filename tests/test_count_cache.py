@@ -0,0 +1,29 @@
+from app.count_cache import CountCache
+
+
+def test_count_cache_hit_and_bump():
+    cache = CountCache(ttl=60, max_entries=10)
+    cache.set(("a", None), 5, cache.generation)
+    assert cache.get(("a", None)) == 5
+    cache.bump()
+    assert cache.get(("a", None)) is None
+
+
+def test_count_cache_discards_counts_from_older_generation():
+    cache = CountCache(ttl=60, max_entries=10)
+    generation = cache.generation
+    cache.bump() # A write committed while the count query was running
+    cache.set(("a", None), 5, generation)
+    assert cache.get(("a", None)) is None
+
+
+def test_count_cache_expires_and_evicts():
+    cache = CountCache(ttl=0, max_entries=10)
+    cache.set("a", 1, cache.generation)
+    assert cache.get("a") is None
+
+    cache = CountCache(ttl=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, 1, cache.generation)
+    assert cache.get("a") is None
+    assert cache.get("c") == 1
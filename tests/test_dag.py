@@ -0,0 +1,150 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.background_tasks import DependencyDispatcher, process_task_in_background
+from app.dag import critical_path
+from app.models import TaskStatus
+from tests.conftest import TestingSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _diamond(client: AsyncClient, task_type: str = "default") -> list:
+    # extract -> (clean, enrich) -> load
+    ids = [
+        (await client.post("/tasks", json={"title": title, "task_type": task_type})).json()["id"]
+        for title in ("extract", "clean", "enrich", "load")
+    ]
+    extract, clean, enrich, load = ids
+    for task_id, upstream_ids in ((clean, [extract]), (enrich, [extract]), (load, [clean, enrich])):
+        response = await client.post(f"/tasks/{task_id}/dependencies", json={"depends_on": upstream_ids})
+        assert response.status_code == 200
+    return ids
+
+
+def _test_dispatcher(mocker) -> DependencyDispatcher:
+    # One task at a time: the test sessions share a single SQLite connection.
+    dispatcher = DependencyDispatcher(concurrency=1, queue=False)
+    dispatch = dispatcher.dispatch
+
+    async def dispatch_in_tests(task_ids, session_factory=TestingSessionLocal):
+        return await dispatch(task_ids, session_factory)
+
+    mocker.patch.object(dispatcher, "dispatch", side_effect=dispatch_in_tests)
+    mocker.patch("app.main.dependency_dispatcher", dispatcher)
+    mocker.patch("app.background_tasks.dependency_dispatcher", dispatcher)
+    return dispatcher
+
+
+async def test_dependencies_reject_cycles_and_missing_tasks(client: AsyncClient):
+    extract, clean, _, load = await _diamond(client)
+
+    response = await client.post(f"/tasks/{extract}/dependencies", json={"depends_on": [load]})
+    assert response.status_code == 400
+    assert "cycle" in response.json()["detail"]
+    assert (await client.post(f"/tasks/{clean}/dependencies", json={"depends_on": [clean]})).status_code == 400
+    assert (await client.post(f"/tasks/{clean}/dependencies", json={"depends_on": [99999]})).status_code == 400
+    assert (await client.post("/tasks/99999/dependencies", json={"depends_on": [clean]})).status_code == 404
+
+    response = await client.post(f"/tasks/{load}/dependencies", json={"depends_on": [clean, extract]})
+    assert response.json() == {"task_id": load, "depends_on": sorted([extract, clean, clean + 1])}
+    assert (await client.delete(f"/tasks/{load}/dependencies/{extract}")).status_code == 204
+    assert (await client.delete(f"/tasks/{load}/dependencies/{extract}")).status_code == 404
+
+
+async def test_graph_runs_each_task_once_its_upstream_tasks_complete(client: AsyncClient, mocker):
+    dispatcher = _test_dispatcher(mocker)
+    order = []
+
+    async def handler(task_type, task):
+        order.append(task["title"])
+
+    mocker.patch("app.background_tasks.registry.run", side_effect=handler)
+    extract, clean, enrich, load = await _diamond(client)
+
+    response = await client.post(f"/tasks/{load}/dag/process")
+    assert response.status_code == 202
+    assert response.json() == {"dispatched": [extract], "waiting": [clean, enrich, load]}
+    await dispatcher.join()
+
+    assert order[0] == "extract" and order[-1] == "load"
+    assert sorted(order[1:3]) == ["clean", "enrich"]
+    for task_id in (extract, clean, enrich, load):
+        assert (await client.get(f"/tasks/{task_id}")).json()["status"] == "completed"
+
+    dag = (await client.get(f"/tasks/{clean}/dag")).json()
+    assert [node["id"] for node in dag["nodes"]][0] == extract
+    assert {node["id"] for node in dag["nodes"]} == {extract, clean, load}
+    assert all(node["duration_seconds"] is not None for node in dag["nodes"])
+    assert dag["critical_path"][0] == extract and dag["critical_path"][-1] == load
+
+    # Nothing left to run
+    assert (await client.post(f"/tasks/{load}/dag/process")).json() == {"dispatched": [], "waiting": []}
+
+
+async def test_failure_fails_armed_downstream_tasks(client: AsyncClient, mocker):
+    dispatcher = _test_dispatcher(mocker)
+
+    async def handler(task_type, task):
+        if task["title"] == "clean":
+            raise RuntimeError("bad row")
+
+    mocker.patch("app.background_tasks.registry.run", side_effect=handler)
+    extract, clean, enrich, load = await _diamond(client)
+
+    await client.post(f"/tasks/{load}/dag/process")
+    await dispatcher.join()
+
+    assert (await client.get(f"/tasks/{clean}")).json()["status"] == "failed"
+    assert (await client.get(f"/tasks/{load}")).json()["status"] == "failed"
+    assert (await client.get(f"/tasks/{enrich}")).json()["status"] == "completed"
+    logs = [log["status"] for log in (await client.get(f"/tasks/{load}/logs")).json()]
+    assert logs[0] == f"Upstream task {clean} failed."
+
+    response = await client.post(f"/tasks/{load}/dag/process")
+    assert response.status_code == 409
+
+
+async def test_completion_queues_released_tasks_in_worker_mode(client: AsyncClient, db_session: AsyncSession, mocker):
+    mocker.patch("app.background_tasks.registry.run", mocker.AsyncMock())
+    mocker.patch("app.background_tasks.dependency_dispatcher", DependencyDispatcher(queue=True))
+    extract, clean, enrich, load = await _diamond(client)
+
+    armed_ids, ready_ids = await crud.arm_task_graph(db_session, load)
+    assert ready_ids == [extract]
+    await crud.transition_task_status(db_session, extract, TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+    await process_task_in_background(extract, TestingSessionLocal)
+
+    claimed = [task.task_id for task in await crud.claim_tasks(db_session, limit=10)]
+    assert sorted(claimed) == [clean, enrich]
+
+
+async def test_completing_tasks_by_hand_releases_their_dependents(client: AsyncClient, db_session: AsyncSession, mocker):
+    dispatcher = DependencyDispatcher(queue=True)
+    dispatch = dispatcher.dispatch
+
+    async def dispatch_in_tests(task_ids, session_factory=TestingSessionLocal):
+        return await dispatch(task_ids, session_factory)
+
+    mocker.patch.object(dispatcher, "dispatch", side_effect=dispatch_in_tests)
+    mocker.patch("app.main.dependency_dispatcher", dispatcher)
+    extract, clean, enrich, load = await _diamond(client)
+    await crud.arm_task_graph(db_session, load)
+
+    assert (await client.put(f"/tasks/{extract}", json={"status": "completed"})).status_code == 200
+    claimed = [task.task_id for task in await crud.claim_tasks(db_session, limit=1000)]
+    assert clean in claimed and enrich in claimed and load not in claimed
+
+    response = await client.patch("/tasks/status", json={"ids": [clean, enrich], "status": "completed"})
+    assert response.json()["changed"] == 2
+    claimed = [task.task_id for task in await crud.claim_tasks(db_session, limit=1000)]
+    assert load in claimed
+
+
+async def test_critical_path_follows_the_longest_chain():
+    upstream = {1: [], 2: [1], 3: [1], 4: [2, 3]}
+    path, seconds = critical_path([1, 2, 3, 4], upstream, {1: 1.0, 2: 5.0, 3: 2.0, 4: 1.0})
+    assert path == [1, 2, 4]
+    assert seconds == 7.0
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app import database
+from app.database import LAST_WRITE_COOKIE, READ_CONSISTENCY_HEADER, get_db, get_read_db, reads_from_primary
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_request(method: str = "GET", headers: dict = None, cookies: dict = None) -> Request:
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    if cookies:
+        raw_headers.append((b"cookie", "; ".join(f"{k}={v}" for k, v in cookies.items()).encode()))
+    return Request({"type": "http", "method": method, "path": "/", "headers": raw_headers, "query_string": b""})
+
+
+class FakeSessionFactory:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self.name
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", FakeSessionFactory("primary"))
+    monkeypatch.setattr(database, "ReadSessionLocal", FakeSessionFactory("replica"))
+
+
+async def _session(dependency, *args):
+    generator = dependency(*args)
+    session = await generator.__anext__()
+    await generator.aclose()
+    return session
+
+
+async def test_reads_go_to_replica_unless_primary_is_requested(replica):
+    assert await _session(get_read_db, make_request()) == "replica"
+    assert await _session(get_read_db, make_request(headers={READ_CONSISTENCY_HEADER: "primary"})) == "primary"
+
+
+async def test_recent_write_cookie_pins_reads_to_primary(replica):
+    response = Response()
+    assert await _session(get_db, make_request("POST"), response) == "primary"
+    assert LAST_WRITE_COOKIE in response.headers["set-cookie"]
+
+    assert reads_from_primary(make_request(cookies={LAST_WRITE_COOKIE: f"{time.time():.3f}"}))
+    stale = time.time() - database.READ_YOUR_WRITES_SECONDS - 1
+    assert not reads_from_primary(make_request(cookies={LAST_WRITE_COOKIE: f"{stale:.3f}"}))
+    assert not reads_from_primary(make_request(cookies={LAST_WRITE_COOKIE: "garbage"}))
+
+
+async def test_reads_do_not_set_the_write_cookie(replica):
+    response = Response()
+    await _session(get_db, make_request("GET"), response)
+    assert "set-cookie" not in response.headers
+
+
+async def test_pool_options_skip_sqlite_and_configure_asyncpg(mocker):
+    create = mocker.patch("app.database.create_async_engine")
+    database._create_engine("sqlite+aiosqlite:///:memory:")
+    assert "pool_size" not in create.call_args.kwargs
+
+    database._create_engine("postgresql+asyncpg://user:password@db/tasks")
+    kwargs = create.call_args.kwargs
+    assert kwargs["pool_size"] == database.DB_POOL_SIZE
+    assert kwargs["pool_pre_ping"] == database.DB_POOL_PRE_PING
+    assert kwargs["connect_args"] == {"prepared_statement_cache_size": database.DB_STATEMENT_CACHE_SIZE}
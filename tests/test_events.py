@@ -0,0 +1,147 @@
+import json
+from typing import List
+from unittest.mock import ANY
+
+import pytest
+from httpx import AsyncClient
+from starlette.testclient import TestClient
+
+from app.events import EventBroker, PostgresEventBroker, Subscription, event_broker, log_event, resync_event, status_event
+from app.main import app, task_event_stream
+from app.models import TaskStatus
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_per_task_and_to_all():
+    broker = EventBroker(queue_size=2)
+    async with broker.subscribe(1) as task_one, broker.subscribe() as everything:
+        await broker.publish_many([log_event(1, "a"), log_event(2, "b"), log_event(3, "c")])
+        assert (await task_one.get())["status"] == "a"
+        assert task_one.empty()
+        # The queue was full when the third event arrived: what it held is replaced by a resync notice.
+        assert (await everything.get()) == {**resync_event("overflow"), "at": ANY}
+        assert (await everything.get())["status"] == "c"
+        assert everything.empty()
+    assert not broker._subscribers
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_follow_added_tasks_and_types():
+    broker = EventBroker()
+    async with Subscription(broker) as subscription, broker.subscribe(types={"status"}) as statuses:
+        subscription.add(1)
+        subscription.add(2)
+        subscription.discard(1)
+        await broker.publish_many([log_event(1, "one"), log_event(2, "two"), status_event(3, None, TaskStatus.PENDING)])
+        assert (await subscription.get())["status"] == "two"
+        assert subscription.empty()
+        assert (await statuses.get())["task_id"] == 3
+        assert statuses.empty()
+        # Notices reach every subscriber, whatever it filters on
+        await broker.publish(resync_event("reconnect"))
+        assert (await subscription.get())["type"] == (await statuses.get())["type"] == "resync"
+    assert not broker._subscribers
+
+
+@pytest.mark.asyncio
+async def test_task_event_stream_pushes_status_changes(client: AsyncClient):
+    task_id = (await client.post("/tasks", json={"title": "Watch Me"})).json()["id"]
+    subscription = event_broker.subscribe(task_id)
+    # A change made after subscribing but before the status is read is not lost
+    await client.put(f"/tasks/{task_id}", json={"status": "in_progress"})
+    stream = task_event_stream(subscription, task_id, TaskStatus.PENDING)
+
+    first = await anext(stream)
+    assert first.startswith("event: status\n")
+    assert json.loads(first.split("data: ")[1])["to"] == "pending"
+    status_change = json.loads((await anext(stream)).split("data: ")[1])
+    assert status_change == {**status_change, "type": "status", "task_id": task_id, "from": "pending", "to": "in_progress"}
+    log_line = json.loads((await anext(stream)).split("data: ")[1])
+    assert log_line["status"] == "Status changed from pending to in_progress"
+    await stream.aclose()
+    assert task_id not in event_broker._subscribers
+
+    assert (await client.get("/tasks/99999/events")).status_code == 404
+    assert 99999 not in event_broker._subscribers
+
+
+class FakeConnection:
+    def __init__(self, fail_over: int = 8000):
+        self.fail_over = fail_over
+        self.sent: List[str] = []
+        self.closed = False
+        self.on_terminated = None
+
+    def add_termination_listener(self, callback):
+        self.on_terminated = callback
+
+    async def add_listener(self, channel, callback):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+        if self.on_terminated is not None:
+            self.on_terminated(self)
+
+    async def execute(self, query, channel, payloads):
+        if any(len(payload.encode()) >= self.fail_over for payload in payloads):
+            raise ValueError("payload string too long")
+        self.sent.extend(payloads)
+
+
+@pytest.mark.asyncio
+async def test_postgres_broker_truncates_and_isolates_bad_events(mocker):
+    broker = PostgresEventBroker("postgresql://unused")
+    connections = [FakeConnection(), FakeConnection(fail_over=2000)]
+    mocker.patch.object(broker, "_connect", side_effect=connections)
+    await broker.start()
+    listener, publisher = connections
+
+    await broker.publish_many([log_event(1, "x" * 20000), log_event(2, "ok")])
+    # The batch failed on the large event alone: the other one was still sent
+    assert [json.loads(payload)["task_id"] for payload in publisher.sent] == [2]
+
+    publisher.fail_over = 8000
+    await broker.publish_many([log_event(1, "ü" * 20000), log_event(2, "ok")])
+    truncated = json.loads(publisher.sent[1])
+    assert truncated["truncated"] and truncated["status"].startswith("ü") and len(publisher.sent[1]) < 8000
+    await broker.stop()
+
+
+@pytest.mark.asyncio
+async def test_postgres_broker_reconnects_its_listener(mocker):
+    broker = PostgresEventBroker("postgresql://unused")
+    connections = [FakeConnection(), FakeConnection(), FakeConnection()]
+    connect = mocker.patch.object(broker, "_connect", side_effect=[connections[0], connections[1], OSError("down"), connections[2]])
+    mocker.patch("app.events.asyncio.sleep", new=mocker.AsyncMock())
+    await broker.start()
+    async with broker.subscribe(1) as subscription:
+        connections[0].on_terminated(connections[0]) # The server went away
+        await broker._reconnecting
+        assert broker._listener is connections[2] and connect.call_count == 4
+        assert (await subscription.get())["reason"] == "reconnect"
+    await broker.stop()
+    assert broker._reconnecting is None
+
+
+def test_websocket_multiplexes_subscriptions():
+    with TestClient(app).websocket_connect("/ws/tasks") as websocket:
+        websocket.send_json({"action": "subscribe", "task_id": 1001})
+        websocket.send_json({"action": "subscribe"})
+        assert websocket.receive_json()["type"] == "error"
+
+        websocket.portal.call(event_broker.publish, log_event(1002, "not subscribed"))
+        websocket.portal.call(event_broker.publish, log_event(1001, "hello"))
+        assert websocket.receive_json()["status"] == "hello"
+
+        websocket.send_json({"action": "unsubscribe", "task_id": 1001})
+        websocket.send_json({"action": "subscribe", "task_id": 1002})
+        websocket.send_json({"action": "subscribe"})
+        assert websocket.receive_json()["type"] == "error" # Both commands were handled before this one
+        websocket.portal.call(event_broker.publish, log_event(1001, "unsubscribed"))
+        websocket.portal.call(event_broker.publish, log_event(1002, "now subscribed"))
+        assert websocket.receive_json()["status"] == "now subscribed"
+    assert 1001 not in event_broker._subscribers and 1002 not in event_broker._subscribers
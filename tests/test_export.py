@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_export_tasks_ndjson_matches_api(client: AsyncClient):
+    await client.post("/tasks/bulk", json=[{"title": "Export A", "description": "ü"}, {"title": "Export B", "priority": 4}])
+
+    response = await client.get("/tasks/export?title=Export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Export A", "Export B"]
+
+    api_task = (await client.get(f"/tasks/{rows[0]['id']}")).json()
+    assert rows[0] == api_task
+
+
+async def test_export_tasks_csv_with_filters(client: AsyncClient, mocker):
+    mocker.patch("app.export.EXPORT_BATCH_SIZE", 1) # Several server-side cursor batches
+    await client.post("/tasks/bulk", json=[{"title": f"CSV Export {i}", "status": "completed"} for i in range(3)])
+    await client.post("/tasks", json={"title": "CSV Export pending"})
+
+    response = await client.get("/tasks/export?format=csv&title=CSV Export&status=completed")
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == [f"CSV Export {i}" for i in range(3)]
+    assert {row["status"] for row in rows} == {"completed"}
+
+
+async def test_export_task_logs(client: AsyncClient):
+    task_id = (await client.post("/tasks", json={"title": "Export Logs"})).json()["id"]
+    await client.put(f"/tasks/{task_id}", json={"priority": 2})
+
+    response = await client.get(f"/tasks/{task_id}/logs/export")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["status"] for row in rows] == ["Task created with status pending", "Task details updated."]
+    assert set(rows[0]) == {"id", "task_id", "status", "created_at"}
+
+    assert (await client.get("/tasks/99999/logs/export")).status_code == 404
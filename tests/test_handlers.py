@@ -0,0 +1,68 @@
+import asyncio
+import os
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from app.background_tasks import process_task_in_background
+from app.handlers import ExecutionMode, HandlerRegistry, UnknownTaskType
+from tests.conftest import TestingSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+
+def cpu_bound(task: dict) -> int:
+    return os.getpid()
+
+
+async def test_registry_runs_each_execution_mode():
+    registry = HandlerRegistry(thread_pool_size=1, process_pool_size=1)
+
+    @registry.register("io")
+    async def io_handler(task):
+        return task["id"]
+
+    @registry.register("blocking", mode=ExecutionMode.THREAD)
+    def blocking_handler(task):
+        return threading.current_thread().name
+
+    registry.register("cpu", mode=ExecutionMode.PROCESS)(cpu_bound)
+    try:
+        assert await registry.run("io", {"id": 7}) == 7
+        assert (await registry.run("blocking", {})).startswith("task-handler")
+        assert await registry.run("cpu", {}) != os.getpid()
+        with pytest.raises(UnknownTaskType):
+            await registry.run("missing", {})
+    finally:
+        registry.shutdown()
+
+
+async def test_registry_enforces_timeouts():
+    registry = HandlerRegistry(default_timeout=5)
+
+    @registry.register("slow", timeout=0.01)
+    async def slow_handler(task):
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await registry.run("slow", {})
+    assert registry.get("slow").timeout == 0.01
+
+    with pytest.raises(TypeError):
+        registry.register("not-async")(lambda task: None)
+
+
+async def test_background_processing_dispatches_on_task_type(client: AsyncClient, mocker):
+    mocker.patch("app.main.process_task_in_background")
+    run = mocker.patch("app.background_tasks.registry.run", mocker.AsyncMock())
+    task_id = (await client.post("/tasks", json={"title": "Typed", "task_type": "report"})).json()["id"]
+    await client.post(f"/tasks/{task_id}/process")
+
+    await process_task_in_background(task_id, TestingSessionLocal)
+
+    run.assert_awaited_once()
+    task_type, task = run.call_args.args
+    assert task_type == "report"
+    assert task["id"] == task_id and task["title"] == "Typed"
+    assert (await client.get(f"/tasks/{task_id}")).json()["status"] == "completed"
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.background_tasks import process_task_in_background, process_tasks_in_background
+from app.leases import LeaseManager, lease_manager
+from app.models import Task, TaskStatus
+from tests.conftest import TestingSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _start_with_expired_lease(db: AsyncSession, client: AsyncClient, title: str) -> int:
+    task_id = (await client.post("/tasks", json={"title": title})).json()["id"]
+    expired = crud.lease_deadline() - timedelta(hours=1)
+    await crud.transition_task_status(db, task_id, TaskStatus.PENDING, TaskStatus.IN_PROGRESS, lease_expires_at=expired)
+    return task_id
+
+
+async def _lease(db: AsyncSession, task_id: int):
+    db_task = await crud.get_task(db, task_id)
+    await db.refresh(db_task)
+    return db_task.lease_expires_at
+
+
+async def test_process_takes_a_lease_and_completion_drops_it(client: AsyncClient, db_session: AsyncSession, mocker):
+    mocker.patch("app.main.process_task_in_background")
+    mocker.patch("app.background_tasks.registry.run", mocker.AsyncMock())
+    task_id = (await client.post("/tasks", json={"title": "Leased"})).json()["id"]
+    await client.post(f"/tasks/{task_id}/process")
+    assert await _lease(db_session, task_id) is not None
+
+    await process_task_in_background(task_id, TestingSessionLocal)
+    assert await _lease(db_session, task_id) is None
+
+
+async def test_reaper_returns_expired_leases_to_pending(client: AsyncClient, db_session: AsyncSession):
+    expired_id = await _start_with_expired_lease(db_session, client, "Orphaned")
+    live_id = (await client.post("/tasks", json={"title": "Still Running"})).json()["id"]
+    await crud.transition_task_status(
+        db_session, live_id, TaskStatus.PENDING, TaskStatus.IN_PROGRESS, lease_expires_at=crud.lease_deadline()
+    )
+    manual_id = (await client.post("/tasks", json={"title": "Set By Hand"})).json()["id"]
+    await client.put(f"/tasks/{manual_id}", json={"status": "in_progress"})
+
+    reaper = LeaseManager(session_factory=TestingSessionLocal, requeue=True)
+    assert await reaper.reap() == 1
+
+    data = (await client.get(f"/tasks/{expired_id}")).json()
+    assert data["status"] == "pending"
+    logs = [log["status"] for log in (await client.get(f"/tasks/{expired_id}/logs")).json()]
+    assert logs[0] == "Lease expired; task returned to pending after its runner stopped."
+    assert (await client.get(f"/tasks/{live_id}")).json()["status"] == "in_progress"
+    assert (await client.get(f"/tasks/{manual_id}")).json()["status"] == "in_progress"
+    assert expired_id in [task.task_id for task in await crud.claim_tasks(db_session, limit=100)] # Requeued
+
+
+async def test_heartbeat_renews_tracked_leases(client: AsyncClient, db_session: AsyncSession):
+    task_id = await _start_with_expired_lease(db_session, client, "Heartbeat")
+    manager = LeaseManager(session_factory=TestingSessionLocal)
+    manager.track(task_id)
+    before = await _lease(db_session, task_id)
+
+    assert await manager.heartbeat() == 1
+    assert await _lease(db_session, task_id) > before
+    manager.untrack(task_id)
+    assert await manager.reap() == 0
+
+
+async def test_bulk_runs_waiting_for_a_slot_keep_their_leases(client: AsyncClient, db_session: AsyncSession, mocker):
+    mocker.patch("app.main.process_tasks_in_background")
+    release = asyncio.Event()
+    handled = []
+    async def handler(task_type, task):
+        handled.append(task["id"])
+        await release.wait()
+
+    mocker.patch("app.background_tasks.registry.run", side_effect=handler)
+    ids = [(await client.post("/tasks", json={"title": f"Batch {i}"})).json()["id"] for i in range(3)]
+    await client.post("/tasks/process", json={"ids": ids})
+    batch = asyncio.create_task(process_tasks_in_background(ids, TestingSessionLocal, concurrency=1))
+    while not handled:
+        await asyncio.sleep(0.01)
+
+    # Every lease has lapsed, but the waiting tasks are tracked too, so a heartbeat renews them all
+    await db_session.execute(update(Task).where(Task.id.in_(ids)).values(lease_expires_at=crud.lease_deadline() - timedelta(hours=1)))
+    await db_session.commit()
+    assert set(ids) <= set(lease_manager.running)
+    await crud.renew_leases(db_session, list(lease_manager.running))
+    reaper = LeaseManager(session_factory=TestingSessionLocal)
+    await reaper.reap()
+    assert [(await client.get(f"/tasks/{task_id}")).json()["status"] for task_id in ids] == ["in_progress"] * 3
+
+    # A task reaped all the same (its heartbeats failed, say) is not run once a slot frees up
+    await db_session.execute(update(Task).where(Task.id == ids[2]).values(lease_expires_at=crud.lease_deadline() - timedelta(hours=1)))
+    await db_session.commit()
+    await reaper.reap()
+    release.set()
+    await batch
+    assert handled == ids[:2]
+    assert [(await client.get(f"/tasks/{task_id}")).json()["status"] for task_id in ids] == ["completed", "completed", "pending"]
+    assert not set(ids) & set(lease_manager.running)
+
+
+async def test_drain_cancels_overdue_tasks_and_hands_them_back(client: AsyncClient, mocker):
+    mocker.patch("app.main.process_task_in_background")
+    async def slow_handler(*args):
+        await asyncio.sleep(30)
+
+    mocker.patch("app.background_tasks.registry.run", side_effect=slow_handler)
+    task_id = (await client.post("/tasks", json={"title": "Slow"})).json()["id"]
+    await client.post(f"/tasks/{task_id}/process")
+
+    running = asyncio.create_task(process_task_in_background(task_id, TestingSessionLocal))
+    while task_id not in lease_manager.running:
+        await asyncio.sleep(0.01)
+    await lease_manager.drain(timeout=0.05)
+
+    assert running.cancelled()
+    assert task_id not in lease_manager.running
+    assert (await client.get(f"/tasks/{task_id}")).json()["status"] == "pending"
+    logs = [log["status"] for log in (await client.get(f"/tasks/{task_id}/logs")).json()]
+    assert logs[0] == "Processing interrupted by shutdown; task returned to pending."
+
+
+async def test_start_reaps_straight_away_on_a_freshly_booted_host(mocker):
+    clock = mocker.patch("app.leases.time") # Not time.monotonic itself: the event loop reads that too
+    clock.monotonic.return_value = 5.0 # Less than the reaper interval since boot
+    manager = LeaseManager(session_factory=TestingSessionLocal, heartbeat_interval=60, reaper_interval=60)
+    reap = mocker.patch.object(manager, "reap", mocker.AsyncMock())
+    manager.start()
+    await asyncio.sleep(0.01)
+    await manager.stop()
+    reap.assert_awaited_once()
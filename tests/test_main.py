@@ -115,7 +115,7 @@ async def test_process_task_already_in_progress(client: AsyncClient):
     await client.put(f"/tasks/{task_id}", json={"status": TaskStatus.IN_PROGRESS.value})
 
     response = await client.post(f"/tasks/{task_id}/process")
-    assert response.status_code == 400
+    assert response.status_code == 409
     assert "Task is already in_progress" in response.json()["detail"]
 
 
@@ -125,5 +125,260 @@ async def test_process_task_completed(client: AsyncClient):
     await client.put(f"/tasks/{task_id}", json={"status": TaskStatus.COMPLETED.value})
 
     response = await client.post(f"/tasks/{task_id}/process")
-    assert response.status_code == 400
+    assert response.status_code == 409
     assert "Task is already completed" in response.json()["detail"]
+
+
+async def test_create_tasks_bulk(client: AsyncClient):
+    payload = [{"title": "Bulk A", "priority": 2}, {"title": "Bulk B", "status": "in_progress"}]
+    response = await client.post("/tasks/bulk", json=payload)
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 2
+    first_id, second_id = data["ids"]
+
+    first = (await client.get(f"/tasks/{first_id}")).json()
+    assert first["title"] == "Bulk A"
+    assert first["status"] == "pending"
+    second = (await client.get(f"/tasks/{second_id}")).json()
+    assert second["status"] == "in_progress"
+
+    logs = (await client.get(f"/tasks/{second_id}/logs")).json()
+    assert [log["status"] for log in logs] == ["Task created with status in_progress"]
+
+
+async def test_create_tasks_bulk_ndjson(client: AsyncClient):
+    body = b'{"title": "NDJSON 1"}\n\n{"title": "NDJSON 2", "priority": 5}\n'
+    response = await client.post("/tasks/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 201
+    ids = response.json()["ids"]
+    assert len(ids) == 2
+    assert (await client.get(f"/tasks/{ids[1]}")).json()["priority"] == 5
+
+
+async def test_create_tasks_bulk_is_atomic(client: AsyncClient, mocker):
+    mocker.patch("app.main.BULK_INSERT_BATCH_SIZE", 1) # Flush the valid line before the invalid one is read
+    before = (await client.get("/tasks")).json()["total"]
+    body = b'{"title": "Valid"}\n{"title": ""}\n'
+    response = await client.post("/tasks/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:2] == ["body", 2]
+    assert (await client.get("/tasks")).json()["total"] == before
+
+
+async def test_list_tasks_cursor_pagination(client: AsyncClient):
+    await client.post("/tasks/bulk", json=[{"title": f"Cursor {i}", "priority": i % 2 + 1} for i in range(5)])
+
+    paged = (await client.get("/tasks?title=Cursor&size=5")).json()
+    expected = [task["id"] for task in paged["items"]]
+    assert len(expected) == 5
+    assert paged["next_cursor"] is None
+
+    first = (await client.get("/tasks?title=Cursor&size=2")).json()
+    seen = [task["id"] for task in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        data = (await client.get("/tasks", params={"title": "Cursor", "size": 2, "cursor": cursor})).json()
+        assert data["page"] is None
+        seen.extend(task["id"] for task in data["items"])
+        cursor = data["next_cursor"]
+    assert seen == expected
+
+    response = await client.get("/tasks?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+async def test_read_task_logs_cursor_pagination(client: AsyncClient):
+    task_id = (await client.post("/tasks", json={"title": "Log Cursor"})).json()["id"]
+    for priority in range(2, 5):
+        await client.put(f"/tasks/{task_id}", json={"priority": priority})
+
+    expected = [log["id"] for log in (await client.get(f"/tasks/{task_id}/logs")).json()]
+    assert len(expected) == 4
+
+    response = await client.get(f"/tasks/{task_id}/logs?size=3")
+    seen = [log["id"] for log in response.json()]
+    response = await client.get(f"/tasks/{task_id}/logs", params={"size": 3, "cursor": response.headers["X-Next-Cursor"]})
+    seen.extend(log["id"] for log in response.json())
+    assert "X-Next-Cursor" not in response.headers
+    assert seen == expected
+
+
+async def test_list_tasks_count_modes(client: AsyncClient):
+    await client.post("/tasks", json={"title": "Counted Task"})
+
+    exact = (await client.get("/tasks?title=Counted")).json()
+    assert exact["total"] == 1
+    assert exact["total_exact"] is True
+
+    # SQLite has no planner statistics, so estimates fall back to the exact count.
+    estimate = (await client.get("/tasks?title=Counted&count=estimate")).json()
+    assert estimate["total"] == 1
+
+    skipped = (await client.get("/tasks?title=Counted&count=none")).json()
+    assert skipped["total"] is None
+    assert skipped["pages"] is None
+    assert skipped["total_exact"] is False
+    assert len(skipped["items"]) == 1
+
+
+async def test_list_tasks_count_cache_invalidated_by_writes(client: AsyncClient):
+    assert (await client.get("/tasks?title=Cache Count")).json()["total"] == 0
+    task_id = (await client.post("/tasks", json={"title": "Cache Count"})).json()["id"]
+    assert (await client.get("/tasks?title=Cache Count")).json()["total"] == 1
+    assert (await client.get("/tasks?title=Cache Count&status=completed")).json()["total"] == 0
+    await client.put(f"/tasks/{task_id}", json={"status": "completed"})
+    assert (await client.get("/tasks?title=Cache Count&status=completed")).json()["total"] == 1
+    await client.delete(f"/tasks/{task_id}")
+    assert (await client.get("/tasks?title=Cache Count")).json()["total"] == 0
+
+
+async def test_search_tasks(client: AsyncClient):
+    await client.post("/tasks", json={"title": "Rebuild search index", "description": "nightly job"})
+    await client.post("/tasks", json={"title": "Send invoices", "description": "Search for unpaid orders first"})
+    await client.post("/tasks", json={"title": "Unrelated work"})
+
+    response = await client.get("/tasks/search?q=search")
+    assert response.status_code == 200
+    results = response.json()
+    titles = [result["title"] for result in results]
+    assert titles[:2] == ["Rebuild search index", "Send invoices"] # Title matches rank first
+    assert "Unrelated work" not in titles
+    assert results[0]["rank"] > results[1]["rank"]
+
+    both_terms = (await client.get("/tasks/search?q=unpaid search")).json()
+    assert [result["title"] for result in both_terms] == ["Send invoices"]
+
+    assert (await client.get("/tasks/search?q=")).status_code == 422
+
+
+async def test_search_treats_wildcards_literally(client: AsyncClient):
+    await client.post("/tasks", json={"title": "Discount 100% off"})
+    await client.post("/tasks", json={"title": "Discount 1000 off"})
+
+    titles = [result["title"] for result in (await client.get("/tasks/search", params={"q": "100%"})).json()]
+    assert titles == ["Discount 100% off"]
+    assert (await client.get("/tasks/search", params={"q": "t_x_y"})).json() == []
+
+
+async def test_process_task_dispatches_only_once(client: AsyncClient, mocker):
+    mocked_process = mocker.patch("app.main.process_task_in_background")
+    task_id = (await client.post("/tasks", json={"title": "Dispatch Once"})).json()["id"]
+
+    first = await client.post(f"/tasks/{task_id}/process")
+    second = await client.post(f"/tasks/{task_id}/process")
+    assert first.status_code == 202
+    assert second.status_code == 409
+    mocked_process.assert_called_once_with(task_id)
+    assert (await client.get(f"/tasks/{task_id}")).json()["status"] == "in_progress"
+
+    assert (await client.post("/tasks/99999/process")).status_code == 404
+
+
+async def test_transition_task_status_conflict(db_session: AsyncSession):
+    from app import crud
+    from app.schemas import TaskCreate
+
+    task = await crud.create_task(db_session, TaskCreate(title="Transition Me"))
+    updated = await crud.transition_task_status(db_session, task.id, TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+    assert updated.status == TaskStatus.IN_PROGRESS
+
+    with pytest.raises(crud.TaskStatusConflict) as exc_info:
+        await crud.transition_task_status(db_session, task.id, TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+    assert exc_info.value.status == TaskStatus.IN_PROGRESS
+    assert await crud.transition_task_status(db_session, 99999, TaskStatus.PENDING, TaskStatus.IN_PROGRESS) is None
+
+
+async def test_process_task_in_background_completes_task(client: AsyncClient, mocker):
+    from app.background_tasks import process_task_in_background
+    from tests.conftest import TestingSessionLocal
+
+    mocker.patch("app.background_tasks.simulate_long_task_processing", mocker.AsyncMock())
+    mocker.patch("app.main.process_task_in_background")
+    task_id = (await client.post("/tasks", json={"title": "Run Me"})).json()["id"]
+    await client.post(f"/tasks/{task_id}/process")
+
+    await process_task_in_background(task_id, TestingSessionLocal)
+
+    assert (await client.get(f"/tasks/{task_id}")).json()["status"] == "completed"
+    logs = [log["status"] for log in (await client.get(f"/tasks/{task_id}/logs")).json()]
+    assert logs[0] == "Status changed from in_progress to completed"
+
+
+async def test_bulk_status_update_reports_per_id_outcomes(client: AsyncClient):
+    ids = [(await client.post("/tasks", json={"title": f"Bulk Status {i}"})).json()["id"] for i in range(4)]
+    await client.put(f"/tasks/{ids[1]}", json={"status": "completed"})
+    await client.put(f"/tasks/{ids[2]}", json={"status": "in_progress"})
+
+    response = await client.patch("/tasks/status", json={"ids": [*ids, 99999], "status": "in_progress"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["changed"] == 2
+    assert data["ids"] == [ids[0], ids[3]]
+    assert data["skipped"] == [
+        {"id": ids[1], "reason": "completed", "status": "completed"},
+        {"id": ids[2], "reason": "unchanged", "status": "in_progress"},
+        {"id": 99999, "reason": "missing", "status": None},
+    ]
+    assert (await client.get(f"/tasks/{ids[3]}")).json()["status"] == "in_progress"
+    logs = [log["status"] for log in (await client.get(f"/tasks/{ids[0]}/logs")).json()]
+    assert logs[0] == "Status changed from pending to in_progress"
+
+
+async def test_bulk_status_update_by_filter(client: AsyncClient):
+    ids = [(await client.post("/tasks", json={"title": f"Filtered Reset {i}"})).json()["id"] for i in range(3)]
+    response = await client.patch("/tasks/status", json={"filter": {"title": "Filtered Reset"}, "status": "completed"})
+    assert response.status_code == 200
+    assert response.json()["ids"] == ids
+
+    response = await client.patch("/tasks/status", json={"filter": {"title": "Filtered Reset"}, "status": "pending"})
+    assert response.json()["changed"] == 0
+    assert {skip["reason"] for skip in response.json()["skipped"]} == {"completed"}
+
+
+async def test_bulk_status_update_requires_ids_or_filter(client: AsyncClient, mocker):
+    assert (await client.patch("/tasks/status", json={"status": "pending"})).status_code == 422
+    assert (await client.patch("/tasks/status", json={"ids": [1], "filter": {}, "status": "pending"})).status_code == 422
+
+    mocker.patch("app.main.BULK_UPDATE_MAX_TASKS", 1)
+    for i in range(2):
+        await client.post("/tasks", json={"title": f"Too Many {i}"})
+    response = await client.patch("/tasks/status", json={"filter": {"title": "Too Many"}, "status": "completed"})
+    assert response.status_code == 400
+
+
+async def test_bulk_process_dispatches_pending_tasks_once(client: AsyncClient, mocker):
+    mocked_process = mocker.patch("app.main.process_tasks_in_background")
+    ids = [(await client.post("/tasks", json={"title": f"Bulk Process {i}"})).json()["id"] for i in range(3)]
+    await client.put(f"/tasks/{ids[2]}", json={"status": "completed"})
+
+    response = await client.post("/tasks/process", json={"ids": ids})
+    assert response.status_code == 202
+    assert response.json()["ids"] == ids[:2]
+    assert response.json()["skipped"] == [{"id": ids[2], "reason": "completed", "status": "completed"}]
+    mocked_process.assert_called_once_with(ids[:2])
+
+    response = await client.post("/tasks/process", json={"ids": ids[:2]})
+    assert response.json()["changed"] == 0
+    assert [skip["reason"] for skip in response.json()["skipped"]] == ["not_pending", "not_pending"]
+    logs = [log["status"] for log in (await client.get(f"/tasks/{ids[0]}/logs")).json()]
+    assert logs[:2] == ["Task processing initiated in background.", "Status changed from pending to in_progress"]
+
+
+async def test_bulk_process_enqueues_in_worker_mode(client: AsyncClient, mocker):
+    from app import crud
+    from tests.conftest import TestingSessionLocal
+
+    mocker.patch("app.main.TASK_DISPATCH_MODE", "worker")
+    mocked_process = mocker.patch("app.main.process_tasks_in_background")
+    ids = [(await client.post("/tasks", json={"title": f"Bulk Queue {i}"})).json()["id"] for i in range(2)]
+
+    response = await client.post("/tasks/process", json={"ids": ids})
+    assert response.json()["ids"] == ids
+    mocked_process.assert_not_called()
+    response = await client.post("/tasks/process", json={"filter": {"title": "Bulk Queue"}})
+    assert [skip["reason"] for skip in response.json()["skipped"]] == ["queued", "queued"]
+
+    async with TestingSessionLocal() as db:
+        claimed = [task.task_id for task in await crud.claim_tasks(db, limit=100)]
+    assert set(ids) <= set(claimed)
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.maintenance import _add_months, compact_task_logs, partition_name
+from app.models import TaskEvent, TaskLog
+
+
+def test_partition_months():
+    assert _add_months(datetime(2026, 11, 1), 2) == datetime(2027, 1, 1)
+    assert partition_name(datetime(2027, 1, 1)) == "task_logs_2027_01"
+
+
+@pytest.mark.asyncio
+async def test_compact_task_logs(client: AsyncClient, db_session: AsyncSession):
+    task_id = (await client.post("/tasks", json={"title": "Compact Me"})).json()["id"]
+    await db_session.execute(insert(TaskLog), [
+        {"task_id": task_id, "event": TaskEvent.COMPACTED, "detail": "5", "created_at": datetime(2020, 1, 1)},
+        {"task_id": task_id, "event": TaskEvent.UPDATED, "detail": None, "created_at": datetime(2020, 2, 1)},
+        {"task_id": task_id, "event": TaskEvent.MESSAGE, "detail": "old update", "created_at": datetime(2020, 3, 1)},
+    ])
+    await db_session.commit()
+
+    assert await compact_task_logs(db_session, older_than=datetime(2021, 1, 1)) == 2
+
+    logs = (await client.get(f"/tasks/{task_id}/logs?size=10")).json()
+    assert [log["status"] for log in logs] == ["Task created with status pending", "Compacted 7 log entries"]
+    assert logs[1]["created_at"] == "2020-03-01T00:00:00"
+
+    # Nothing left to fold: a lone summary row is not compacted again.
+    assert await compact_task_logs(db_session, older_than=datetime(2021, 1, 1)) == 0
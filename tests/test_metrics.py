@@ -0,0 +1,77 @@
+import pytest
+from httpx import AsyncClient
+
+from app.background_tasks import process_task_in_background
+from app.metrics import Counter, Histogram, metrics
+from tests.conftest import TestingSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("job_seconds", "Job time.", (0.1, 1.0), ("queue",))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "default")
+
+    assert histogram.render() == [
+        "# HELP job_seconds Job time.",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{queue="default",le="0.1"} 2',
+        'job_seconds_bucket{queue="default",le="1"} 3',
+        'job_seconds_bucket{queue="default",le="+Inf"} 4',
+        'job_seconds_sum{queue="default"} 3.65',
+        'job_seconds_count{queue="default"} 4',
+    ]
+
+
+async def test_counter_escapes_label_values():
+    counter = Counter("events_total", "Events.", ("name",))
+    counter.inc('say "hi"\n')
+    assert counter.render()[-1] == 'events_total{name="say \\"hi\\"\\n"} 1'
+
+
+async def test_requests_are_recorded_per_route_with_query_counts(client: AsyncClient):
+    task_id = (await client.post("/tasks", json={"title": "Measured"})).json()["id"]
+    before = metrics.request_duration.count("GET", "/tasks/{task_id}", "200")
+    queries_before = metrics.request_queries.count("GET", "/tasks/{task_id}")
+
+    await client.get(f"/tasks/{task_id}/logs")
+    await client.get(f"/tasks/{task_id}")
+    await client.get("/tasks/999999")
+
+    assert metrics.request_duration.count("GET", "/tasks/{task_id}", "200") == before + 1
+    assert metrics.request_duration.count("GET", "/tasks/{task_id}", "404") >= 1
+    assert metrics.request_queries.count("GET", "/tasks/{task_id}") >= queries_before + 2
+    _, query_total = metrics.request_queries._series[("GET", "/tasks/{task_id}/logs")]
+    assert query_total >= 2 # The task lookup and the log page
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/tasks/{task_id}",status="200"}' in body
+    assert "# TYPE http_request_db_queries histogram" in body
+    assert "# TYPE db_query_duration_seconds histogram" in body
+    assert "background_tasks_running 0" in body
+
+
+async def test_unmatched_routes_share_a_label(client: AsyncClient):
+    await client.get("/no/such/path")
+    assert metrics.request_duration.count("GET", "unmatched", "404") >= 1
+
+
+async def test_background_task_outcomes_are_counted(client: AsyncClient, mocker):
+    mocker.patch("app.main.process_task_in_background")
+    mocker.patch("app.background_tasks.registry.run", mocker.AsyncMock())
+    completed = metrics.background_tasks.value("completed")
+    not_found = metrics.background_tasks.value("not_found")
+    task_id = (await client.post("/tasks", json={"title": "Timed"})).json()["id"]
+    await client.post(f"/tasks/{task_id}/process")
+
+    await process_task_in_background(task_id, TestingSessionLocal)
+    await process_task_in_background(999999, TestingSessionLocal)
+
+    assert metrics.background_tasks.value("completed") == completed + 1
+    assert metrics.background_tasks.value("not_found") == not_found + 1
+    assert metrics.background_task_duration.count("completed") >= 1
+    assert metrics.background_tasks_running == 0
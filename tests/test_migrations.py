@@ -0,0 +1,40 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.models import Base
+
+alembic_config = pytest.importorskip("alembic.config")
+alembic_command = pytest.importorskip("alembic.command")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _config(database: Path):
+    config = alembic_config.Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{database}")
+    return config
+
+
+def test_migrations_upgrade_and_downgrade_on_sqlite(tmp_path: Path):
+    database = tmp_path / "migrations.db"
+    config = _config(database)
+    alembic_command.upgrade(config, "head")
+
+    connection = sqlite3.connect(database)
+    try:
+        for table in ("tasks", "task_logs", "task_dependencies"):
+            columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+            assert columns == {column.name for column in Base.metadata.tables[table].columns}
+        # Server-side defaults work on SQLite too
+        connection.execute("INSERT INTO tasks (title, status, priority) VALUES ('Migrated', 'PENDING', 1)")
+        created_at, status_changed_at = connection.execute("SELECT created_at, status_changed_at FROM tasks").fetchone()
+        assert created_at is not None and status_changed_at is not None
+        connection.commit()
+    finally:
+        connection.close()
+
+    alembic_command.downgrade(config, "base")
+    alembic_command.upgrade(config, "head")
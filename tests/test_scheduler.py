@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.metrics import metrics
+from app.scheduler import PriorityScheduler
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+async def _drain_queue(db: AsyncSession):
+    # Tasks queued by other tests share the database; clear them out first.
+    while await crud.claim_tasks(db, limit=100):
+        pass
+
+
+async def _queue_tasks(client: AsyncClient, db: AsyncSession, priority: int, count: int):
+    task_ids = []
+    for i in range(count):
+        task_id = (await client.post("/tasks", json={"title": f"P{priority} {i}", "priority": priority})).json()["id"]
+        await crud.enqueue_task(db, task_id)
+        task_ids.append(task_id)
+    return task_ids
+
+
+def test_plan_splits_slots_by_weight():
+    scheduler = PriorityScheduler(weights={1: 1, 3: 3}, aging_seconds=0)
+    depths = [(3, 100, NOW), (1, 100, NOW)]
+    plan = scheduler.plan(8, depths, NOW)
+    assert plan == {3: 6, 1: 2}
+
+
+def test_plan_credit_carries_over_between_calls():
+    scheduler = PriorityScheduler(weights={1: 1, 3: 3}, aging_seconds=0)
+    depths = [(3, 100, NOW), (1, 100, NOW)]
+    plans = [scheduler.plan(1, depths, NOW) for _ in range(4)]
+    assert sum(plan.get(1, 0) for plan in plans) == 1
+    assert sum(plan.get(3, 0) for plan in plans) == 3
+
+
+def test_plan_never_exceeds_queue_depth():
+    scheduler = PriorityScheduler(weights={1: 1, 5: 16}, aging_seconds=0)
+    plan = scheduler.plan(10, [(5, 2, NOW), (1, 50, NOW)], NOW)
+    assert plan == {5: 2, 1: 8}
+    assert scheduler.plan(10, [], NOW) == {}
+
+
+def test_aging_lets_old_low_priority_work_win():
+    scheduler = PriorityScheduler(weights={1: 1, 5: 16}, aging_seconds=60)
+    starved = NOW - timedelta(minutes=30) # effective weight 1 * (1 + 30) = 31
+    plan = scheduler.plan(1, [(5, 10, NOW), (1, 10, starved)], NOW)
+    assert plan == {1: 1}
+
+
+@pytest.mark.asyncio
+async def test_claim_prefers_higher_priority_and_records_waits(client: AsyncClient, db_session: AsyncSession):
+    await _drain_queue(db_session)
+    low = await _queue_tasks(client, db_session, priority=1, count=3)
+    high = await _queue_tasks(client, db_session, priority=5, count=3)
+
+    observed = metrics.queue_wait.count("5")
+    scheduler = PriorityScheduler(weights={1: 1, 5: 16}, aging_seconds=0)
+    claimed = await scheduler.claim(db_session, 3)
+    assert sorted(claimed) == sorted(high)
+
+    claimed = await scheduler.claim(db_session, 10)
+    assert claimed == low
+    stats = scheduler.stats()
+    assert list(stats) == [5, 1]
+    assert stats[5]["claimed"] == 3 and stats[1]["claimed"] == 3
+    assert stats[1]["max_wait_seconds"] >= stats[1]["avg_wait_seconds"] >= 0
+    assert metrics.queue_wait.count("5") == observed + 3
+    assert 'task_queue_wait_seconds_count{priority="5"}' in (await client.get("/metrics")).text
+
+
+@pytest.mark.asyncio
+async def test_claim_respects_global_concurrency(client: AsyncClient, db_session: AsyncSession):
+    await _drain_queue(db_session)
+    await _queue_tasks(client, db_session, priority=2, count=3)
+    in_progress = await crud.count_in_progress(db_session)
+
+    scheduler = PriorityScheduler(global_concurrency=in_progress + 1)
+    assert len(await scheduler.claim(db_session, 3)) == 1
+    assert await scheduler.claim(db_session, 3) == []
+    await _drain_queue(db_session)
+
+
+@pytest.mark.asyncio
+async def test_queue_stats_endpoint(client: AsyncClient, db_session: AsyncSession):
+    await _drain_queue(db_session)
+    await _queue_tasks(client, db_session, priority=4, count=2)
+    await _queue_tasks(client, db_session, priority=2, count=1)
+
+    response = await client.get("/queue/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert [(level["priority"], level["depth"]) for level in data["levels"]] == [(4, 2), (2, 1)]
+    assert data["queued"] == 3
+    assert all(level["oldest_wait_seconds"] >= 0 for level in data["levels"])
+    assert data["in_progress"] == await crud.count_in_progress(db_session)
+    await _drain_queue(db_session)
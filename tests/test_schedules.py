@@ -0,0 +1,213 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.config import EVENTS_SUBSCRIBER_QUEUE_SIZE
+from app.events import event_broker, log_event, resync_event, schedule_event
+from app.models import Task, TaskEvent, TaskLog, TaskStatus
+from app.schedules import CronSchedule, next_run_at
+from app.timers import TaskTimer
+from tests.conftest import TestingSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+async def _run_at(db: AsyncSession, task_id: int) -> datetime:
+    db.expire_all()
+    return (await db.execute(select(Task.run_at).where(Task.id == task_id))).scalar_one()
+
+async def _events(db: AsyncSession, task_id: int) -> list:
+    result = await db.execute(select(TaskLog.event).where(TaskLog.task_id == task_id).order_by(TaskLog.id))
+    return list(result.scalars().all())
+
+
+async def test_cron_next_after():
+    start = datetime(2026, 10, 16, 14, 7, 30) # A Friday
+    assert CronSchedule.parse("*/15 * * * *").next_after(start) == datetime(2026, 10, 16, 14, 15)
+    assert CronSchedule.parse("0 9 * * 1-5").next_after(start) == datetime(2026, 10, 19, 9, 0)
+    assert CronSchedule.parse("30 2 29 2 *").next_after(start) == datetime(2028, 2, 29, 2, 30)
+    # Both day fields restricted: the 1st of the month or any Sunday
+    assert CronSchedule.parse("0 0 1 * 7").next_after(start) == datetime(2026, 10, 18, 0, 0)
+    for expression in ("* * *", "60 * * * *", "*/0 * * * *", "a * * * *"):
+        with pytest.raises(ValueError):
+            CronSchedule.parse(expression)
+    with pytest.raises(ValueError):
+        CronSchedule.parse("0 0 30 2 *").next_after(start)
+
+
+async def test_interval_runs_keep_their_phase():
+    previous = datetime(2026, 10, 16, 14, 0, 0)
+    assert next_run_at(None, 60, 0, previous, previous + timedelta(seconds=2)) == previous + timedelta(seconds=60)
+    # Runs missed while nothing was firing are skipped, not replayed
+    assert next_run_at(None, 60, 0, previous, previous + timedelta(seconds=200)) == previous + timedelta(seconds=240)
+    first = next_run_at(None, 60, 10, None, previous)
+    assert previous + timedelta(seconds=60) <= first <= previous + timedelta(seconds=70)
+    assert next_run_at(None, None, 0, previous, previous) is None
+
+
+async def test_invalid_schedules_are_rejected(client: AsyncClient):
+    response = await client.post("/tasks", json={"title": "Never", "cron": "0 0 30 2 *"})
+    assert response.status_code == 422
+    response = await client.post("/tasks", json={"title": "Both", "cron": "* * * * *", "interval_seconds": 60})
+    assert response.status_code == 422
+    response = await client.post("/tasks", json={"title": "Zero", "interval_seconds": 0})
+    assert response.status_code == 422
+
+
+async def test_recurring_task_fires_once_per_run(client: AsyncClient, db_session: AsyncSession, mocker):
+    before = _now()
+    response = await client.post("/tasks", json={"title": "Every minute", "interval_seconds": 60, "jitter_seconds": 0})
+    assert response.status_code == 201
+    task_id = response.json()["id"]
+    run_at = await _run_at(db_session, task_id)
+    assert before + timedelta(seconds=60) <= run_at <= _now() + timedelta(seconds=60)
+
+    # The run came due: both timers try to fire it, only one gets it
+    due = run_at - timedelta(seconds=60)
+    await db_session.execute(update(Task).where(Task.id == task_id).values(run_at=due))
+    await db_session.commit()
+    now = due + timedelta(seconds=1)
+    async with TestingSessionLocal() as db:
+        assert await crud.fire_scheduled_tasks(db, {task_id: due}, queue=False, now=now) == [task_id]
+    async with TestingSessionLocal() as db:
+        assert await crud.fire_scheduled_tasks(db, {task_id: due}, queue=False, now=now) == []
+
+    db_session.expire_all()
+    task = await db_session.get(Task, task_id)
+    assert task.status == TaskStatus.IN_PROGRESS
+    assert task.run_at == due + timedelta(seconds=60)
+    assert (await _events(db_session, task_id))[-2:] == [TaskEvent.STATUS_CHANGED, TaskEvent.SCHEDULED_RUN]
+
+    # The next run finds the previous one still in progress and is skipped
+    async with TestingSessionLocal() as db:
+        assert await crud.fire_scheduled_tasks(db, {task_id: task.run_at}, queue=False, now=task.run_at) == []
+    assert (await _events(db_session, task_id))[-1] == TaskEvent.SCHEDULE_SKIPPED
+    assert await _run_at(db_session, task_id) == due + timedelta(seconds=120)
+
+    # A finished task runs again
+    await client.put(f"/tasks/{task_id}", json={"status": "completed"})
+    run_at = await _run_at(db_session, task_id)
+    async with TestingSessionLocal() as db:
+        assert await crud.fire_scheduled_tasks(db, {task_id: run_at}, queue=False, now=run_at) == [task_id]
+    logs = [log["status"] for log in (await client.get(f"/tasks/{task_id}/logs")).json()]
+    assert logs[:2] == ["Task run by its schedule.", "Status changed from completed to in_progress"]
+
+
+async def test_one_off_run_clears_run_at_and_queues(client: AsyncClient, db_session: AsyncSession):
+    run_at = _now() + timedelta(minutes=5)
+    response = await client.post("/tasks", json={"title": "Later", "run_at": run_at.isoformat() + "Z"})
+    task_id = response.json()["id"]
+    assert await _run_at(db_session, task_id) == run_at
+
+    async with TestingSessionLocal() as db:
+        assert await crud.fire_scheduled_tasks(db, {task_id: run_at}, queue=True, now=run_at) == []
+    assert await _run_at(db_session, task_id) is None
+    async with TestingSessionLocal() as db:
+        claimed = await crud.claim_tasks(db, limit=1000)
+    assert task_id in [task.task_id for task in claimed]
+
+
+async def test_late_runs_are_skipped_when_catch_up_is_skip(client: AsyncClient, db_session: AsyncSession):
+    response = await client.post("/tasks", json={"title": "Hourly", "cron": "0 * * * *", "catch_up": "skip"})
+    task_id = response.json()["id"]
+    late = _now() - timedelta(hours=3)
+    await db_session.execute(update(Task).where(Task.id == task_id).values(run_at=late))
+    await db_session.commit()
+
+    async with TestingSessionLocal() as db:
+        assert await crud.fire_scheduled_tasks(db, {task_id: late}, queue=False) == []
+    db_session.expire_all()
+    task = await db_session.get(Task, task_id)
+    assert task.status == TaskStatus.PENDING
+    assert task.run_at > _now() - timedelta(seconds=5)
+    assert (await _events(db_session, task_id))[-1] == TaskEvent.SCHEDULE_SKIPPED
+
+
+async def test_timer_loads_and_fires_due_runs(client: AsyncClient, db_session: AsyncSession, mocker):
+    process = mocker.patch("app.timers.process_task_in_background", new=mocker.AsyncMock())
+    now = _now()
+    due_id = (await client.post("/tasks", json={"title": "Due", "run_at": (now - timedelta(seconds=1)).isoformat()})).json()["id"]
+    later_id = (await client.post("/tasks", json={"title": "Later", "run_at": (now + timedelta(seconds=30)).isoformat()})).json()["id"]
+    far_id = (await client.post("/tasks", json={"title": "Far", "run_at": (now + timedelta(hours=1)).isoformat()})).json()["id"]
+
+    timer = TaskTimer(session_factory=TestingSessionLocal, horizon=60, batch_size=500, queue=False)
+    await timer.load(now)
+    assert due_id in timer._due and later_id in timer._due and far_id not in timer._due
+
+    # Rescheduling leaves a stale heap entry behind, which is skipped
+    response = await client.put(f"/tasks/{later_id}", json={"run_at": (now + timedelta(seconds=40)).isoformat()})
+    assert response.status_code == 200
+    timer.schedule(later_id, now + timedelta(seconds=40)) # As its "scheduled" event would
+    assert len(timer._heap) > len(timer._due)
+    timer.schedule(far_id, now + timedelta(hours=2))
+    assert far_id not in timer._due
+
+    await timer.fire_due(now)
+    await timer.fire_due(now) # Nothing left to fire
+    started = [call.args[0] for call in process.call_args_list]
+    assert started.count(due_id) == 1 and later_id not in started
+    assert await _run_at(db_session, due_id) is None
+
+    await timer.fire_due(now + timedelta(seconds=45))
+    started = [call.args[0] for call in process.call_args_list]
+    assert started.count(later_id) == 1
+
+
+async def test_timer_starts_no_more_runs_than_its_concurrency(client: AsyncClient, db_session: AsyncSession, mocker):
+    release = asyncio.Event()
+    started = []
+    async def run(task_id, session_factory):
+        started.append(task_id)
+        await release.wait()
+    mocker.patch("app.timers.process_task_in_background", side_effect=run)
+    now = _now()
+    run_at = now - timedelta(seconds=1)
+    ids = [(await client.post("/tasks", json={"title": f"Due {i}", "run_at": run_at.isoformat()})).json()["id"] for i in range(3)]
+
+    timer = TaskTimer(session_factory=TestingSessionLocal, horizon=60, batch_size=500, concurrency=2, queue=False)
+    timer._loaded_until = now + timedelta(seconds=60)
+    for task_id in ids:
+        timer.schedule(task_id, run_at)
+    assert await timer.fire_due(now) == 2
+    await asyncio.sleep(0)
+    assert started == ids[:2]
+    # The third run is not claimed while both slots are busy
+    assert await timer.fire_due(now) == 0
+    assert await _run_at(db_session, ids[2]) == run_at
+
+    release.set()
+    await asyncio.gather(*timer._running)
+    assert await timer.fire_due(now) == 1
+    await asyncio.sleep(0)
+    assert started == ids
+    await asyncio.gather(*timer._running)
+
+
+async def test_timer_hears_every_schedule_change():
+    timer = TaskTimer(session_factory=TestingSessionLocal, horizon=60, batch_size=500, queue=False)
+    now = _now()
+    timer._loaded_until = now + timedelta(seconds=60)
+    listener = asyncio.create_task(timer._listen())
+    await asyncio.sleep(0)
+    try:
+        # Many more changes at once than a subscriber queue holds: none is dropped
+        task_ids = range(10**6, 10**6 + 3 * EVENTS_SUBSCRIBER_QUEUE_SIZE)
+        await event_broker.publish_many([schedule_event(task_id, now + timedelta(seconds=30)) for task_id in task_ids])
+        await event_broker.publish(log_event(task_ids[0], "Not for the timer"))
+        await asyncio.sleep(0)
+        assert set(task_ids) <= timer._due.keys()
+
+        await event_broker.publish(resync_event("reconnect"))
+        await asyncio.sleep(0)
+        assert timer._reload
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import List
+
+import pytest
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, schemas, serialization
+from app.models import CatchUp, TaskStatus
+
+pytestmark = pytest.mark.asyncio
+
+_task_logs = TypeAdapter(List[schemas.TaskLog])
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+async def test_task_page_matches_pydantic_bytes(client: AsyncClient, db_session: AsyncSession, encoder):
+    for title, description in (("Ünïcödé ✓ \"quoted\"", None), ("Plain", "line\nbreak\ttab")):
+        await client.post("/tasks", json={"title": title, "description": description, "priority": 5, "task_type": "fast"})
+
+    response = await client.get("/tasks", params={"size": 2})
+    page = response.json()
+    expected = schemas.PaginatedTasks(
+        items=await crud.get_tasks(db_session, limit=2), total=page["total"], total_exact=True, page=1, size=2,
+        pages=page["pages"], next_cursor=page["next_cursor"],
+    )
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == expected.model_dump_json().encode()
+
+
+async def test_task_logs_match_pydantic_bytes(client: AsyncClient, db_session: AsyncSession, encoder):
+    task_id = (await client.post("/tasks", json={"title": "Logged"})).json()["id"]
+    await crud.create_task_log(db_session, task_id, "Ünïcödé log")
+
+    response = await client.get(f"/tasks/{task_id}/logs", params={"size": 1})
+    logs = await crud.get_task_logs(db_session, task_id, limit=1)
+    assert response.content == _task_logs.dump_json(_task_logs.validate_python(logs))
+    assert "X-Next-Cursor" in response.headers
+
+
+async def test_timestamps_keep_microseconds(encoder):
+    row = (
+        "t", None, 1, "default", datetime(2026, 1, 2, 8, 30), "0 * * * *", None, None, CatchUp.RUN_ONCE,
+        1, TaskStatus.PENDING, datetime(2026, 1, 1, 12, 0, 0, 120000), datetime(2026, 1, 1),
+    )
+    body = serialization.task_page([row], total=1, total_exact=True, page=1, size=10, pages=1, next_cursor=None)
+    expected = schemas.PaginatedTasks(
+        items=[schemas.Task(**dict(zip(serialization.TASK_FIELDS, row)))], total=1, total_exact=True, page=1,
+        size=10, pages=1, next_cursor=None,
+    )
+    assert body == expected.model_dump_json().encode()
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.background_tasks import process_task_in_background
+from app.models import Task, TaskEvent, TaskLog, TaskStatus
+from tests.conftest import TestingSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_status_changes_record_time_in_previous_status(client: AsyncClient, db_session: AsyncSession):
+    task_id = (await client.post("/tasks", json={"title": "Timed"})).json()["id"]
+    entered = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=90)
+    await db_session.execute(update(Task).where(Task.id == task_id).values(status_changed_at=entered))
+    await db_session.commit()
+
+    await client.put(f"/tasks/{task_id}", json={"status": "in_progress"})
+    await client.put(f"/tasks/{task_id}", json={"status": "completed"})
+
+    rows = (await db_session.execute(
+        select(TaskLog.from_status, TaskLog.to_status, TaskLog.duration_ms)
+        .where(TaskLog.task_id == task_id, TaskLog.event == TaskEvent.STATUS_CHANGED)
+        .order_by(TaskLog.id)
+    )).all()
+    assert [(row.from_status, row.to_status) for row in rows] == [
+        (TaskStatus.PENDING, TaskStatus.IN_PROGRESS), (TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED),
+    ]
+    assert 89000 <= rows[0].duration_ms <= 95000
+    assert rows[1].duration_ms < 5000
+
+    logs = [log["status"] for log in (await client.get(f"/tasks/{task_id}/logs")).json()]
+    assert logs == [
+        "Status changed from in_progress to completed", "Status changed from pending to in_progress",
+        "Task created with status pending",
+    ]
+
+    stats = (await client.get("/stats/time-in-status")).json()
+    pending = next(row for row in stats["statuses"] if row["status"] == "pending")
+    assert pending["transitions"] >= 1
+    assert 89 <= pending["max_seconds"] <= 95
+
+
+async def test_transitions_and_reaping_record_time_in_previous_status(client: AsyncClient, db_session: AsyncSession):
+    task_id = (await client.post("/tasks", json={"title": "Timed Run"})).json()["id"]
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    await db_session.execute(update(Task).where(Task.id == task_id).values(status_changed_at=now - timedelta(seconds=30)))
+    await db_session.commit()
+    await crud.transition_task_status(
+        db_session, task_id, TaskStatus.PENDING, TaskStatus.IN_PROGRESS, lease_expires_at=now - timedelta(hours=1)
+    )
+    await db_session.execute(update(Task).where(Task.id == task_id).values(status_changed_at=now - timedelta(seconds=60)))
+    await db_session.commit()
+    assert task_id in await crud.reap_expired_leases(db_session, requeue=False)
+
+    rows = (await db_session.execute(
+        select(TaskLog.duration_ms)
+        .where(TaskLog.task_id == task_id, TaskLog.event == TaskEvent.STATUS_CHANGED)
+        .order_by(TaskLog.id)
+    )).scalars().all()
+    assert 29000 <= rows[0] <= 35000
+    assert 59000 <= rows[1] <= 65000
+
+
+async def _finished(client: AsyncClient) -> tuple:
+    response = await client.get("/stats/throughput", params={"bucket": "minute"})
+    assert response.status_code == 200
+    points = response.json()["points"]
+    assert all(point["start"].endswith(":00") for point in points)
+    return sum(point["completed"] for point in points), sum(point["failed"] for point in points)
+
+
+async def test_throughput_counts_finished_tasks_per_bucket(client: AsyncClient):
+    completed, failed = await _finished(client)
+    ids = [(await client.post("/tasks", json={"title": f"Task {i}"})).json()["id"] for i in range(3)]
+    await client.patch("/tasks/status", json={"ids": ids[:2], "status": "completed"})
+    await client.put(f"/tasks/{ids[2]}", json={"status": "failed"})
+
+    assert await _finished(client) == (completed + 2, failed + 1)
+
+    now = datetime.now(timezone.utc)
+    response = await client.get("/stats/throughput", params={"since": now.isoformat(), "until": (now - timedelta(hours=1)).isoformat()})
+    assert response.status_code == 400
+
+
+async def test_error_detail_is_not_truncated(client: AsyncClient, mocker):
+    message = "connection reset while streaming rows " * 5
+    mocker.patch("app.background_tasks.registry.run", side_effect=RuntimeError(message))
+    task_id = (await client.post("/tasks", json={"title": "Breaks"})).json()["id"]
+    await client.put(f"/tasks/{task_id}", json={"status": "in_progress"})
+
+    await process_task_in_background(task_id, TestingSessionLocal)
+
+    logs = [log["status"] for log in (await client.get(f"/tasks/{task_id}/logs")).json()]
+    assert logs[0] == f"Error during background processing: {message}"
+    assert logs[1] == "Status changed from in_progress to failed"
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.models import TaskStatus
+from app.worker import Worker, serve_metrics
+from tests.conftest import TestingSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_process_enqueues_in_worker_mode(client: AsyncClient, mocker):
+    mocker.patch("app.main.TASK_DISPATCH_MODE", "worker")
+    mocked_process = mocker.patch("app.main.process_task_in_background")
+    task_id = (await client.post("/tasks", json={"title": "Queue Me", "priority": 2})).json()["id"]
+
+    response = await client.post(f"/tasks/{task_id}/process")
+    assert response.status_code == 202
+    assert response.json()["message"] == "Task queued for processing by a worker."
+    mocked_process.assert_not_called()
+
+    response = await client.post(f"/tasks/{task_id}/process")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Task is already queued"
+
+    async with TestingSessionLocal() as db:
+        assert [task.task_id for task in await crud.claim_tasks(db, limit=10)] == [task_id]
+        assert await crud.claim_tasks(db, limit=10) == []
+
+    data = (await client.get(f"/tasks/{task_id}")).json()
+    assert data["status"] == "in_progress"
+
+
+async def test_claim_tasks_respects_limit_and_queue_order(client: AsyncClient, db_session: AsyncSession):
+    task_ids = []
+    for i in range(3):
+        task_ids.append((await client.post("/tasks", json={"title": f"Claim {i}", "priority": 1})).json()["id"])
+    for task_id in task_ids:
+        await crud.enqueue_task(db_session, task_id)
+
+    assert [task.task_id for task in await crud.claim_tasks(db_session, limit=2)] == task_ids[:2]
+    assert [task.task_id for task in await crud.claim_tasks(db_session, limit=2)] == task_ids[2:]
+
+
+async def test_worker_processes_claimed_tasks(client: AsyncClient, db_session: AsyncSession, mocker):
+    mocked_process = mocker.patch("app.worker.process_task_in_background", mocker.AsyncMock())
+    task_id = (await client.post("/tasks", json={"title": "Work Me", "priority": 3})).json()["id"]
+    await crud.enqueue_task(db_session, task_id)
+
+    worker = Worker(concurrency=2, poll_interval=0.01, session_factory=TestingSessionLocal)
+    assert await worker.claim() == 1
+    assert await worker.claim() == 0
+    mocked_process.assert_called_once_with(task_id, TestingSessionLocal)
+
+    db_task = await crud.get_task(db_session, task_id)
+    await db_session.refresh(db_task)
+    assert db_task.status == TaskStatus.IN_PROGRESS
+    assert db_task.queued_at is None
+
+
+async def test_worker_serves_metrics():
+    server = await asyncio.start_server(serve_metrics, "127.0.0.1", 0)
+    try:
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: worker\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert b"# TYPE task_queue_wait_seconds histogram" in response